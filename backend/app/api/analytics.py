@@ -2,13 +2,17 @@
 Analytics API endpoints
 """
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func
 from typing import Dict, Any
 
 from app.core.database import get_session, DocumentationJob, Repository
 from app.models.schemas import AnalyticsData
+from app.services.analysis_cache import analysis_cache
+from app.services.ai_response_cache import ai_response_cache
+from app.services.model_router import model_router
+from app.services.ai_usage import merge_usage
 
 router = APIRouter()
 
@@ -180,3 +184,44 @@ async def get_performance_stats(db: AsyncSession = Depends(get_session)):
             stats[category]['avg_time'] = round(stats[category]['avg_time'], 2)
     
     return stats
+
+@router.get("/cache-stats")
+async def get_cache_stats():
+    """Get hit rates of the analyzer and AI response caches"""
+    return {
+        'analysis_cache': analysis_cache.get_statistics(),
+        'ai_response_cache': ai_response_cache.get_statistics()
+    }
+
+@router.get("/model-usage")
+async def get_model_usage():
+    """Get per-model call counts, latency, tokens and estimated cost, and how requests were routed"""
+    return model_router.get_statistics()
+
+@router.get("/ai-usage")
+async def get_ai_usage(
+    limit: int = 50,
+    db: AsyncSession = Depends(get_session)
+):
+    """
+    AI tokens, latency percentiles (p50/p95/p99), throttles, retries and estimated cost
+    over the most recent jobs, in total, per generation step and per model
+    """
+    usage_query = await db.execute(
+        select(DocumentationJob.ai_usage)
+        .where(DocumentationJob.ai_usage.isnot(None))
+        .order_by(DocumentationJob.created_at.desc())
+        .limit(limit)
+    )
+    return merge_usage(usage_query.scalars().all())
+
+@router.get("/ai-usage/{job_id}")
+async def get_job_ai_usage(job_id: str, db: AsyncSession = Depends(get_session)):
+    """AI usage of one job, per generation step and per model"""
+    usage_query = await db.execute(
+        select(DocumentationJob).where(DocumentationJob.job_id == job_id)
+    )
+    job = usage_query.scalar_one_or_none()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return {'job_id': job.job_id, 'status': job.status, **(job.ai_usage or {})}
@@ -122,7 +122,9 @@ async def get_job_status(
             files_processed=job.files_processed or 0,
             output_path=job.output_path,
             error_message=job.error_message,
-            processing_time_seconds=job.processing_time_seconds or 0
+            processing_time_seconds=job.processing_time_seconds or 0,
+            job_report=job.job_report,
+            ai_usage=job.ai_usage
         )
     except HTTPException:
         raise
@@ -56,6 +56,11 @@ async def detailed_health_check(db: AsyncSession = Depends(get_session)):
         ai_service = ai_service_instance
         # Just check if service initializes properly
         health_status["checks"]["ai_service"] = "healthy" if ai_service else "degraded"
+        circuit = ai_service.circuit_breaker.get_statistics()
+        health_status["metrics"]["ai_circuit"] = circuit
+        health_status["metrics"]["ai_dispatch"] = ai_service.dispatcher.get_statistics()
+        if circuit["state"] != "closed":
+            health_status["checks"]["ai_service"] = f"degraded: circuit {circuit['state']} ({circuit['last_error']})"
     except Exception as e:
         logger.warning(f"AI service check failed: {e}")
         health_status["checks"]["ai_service"] = f"failed: {str(e)}"
@@ -65,10 +65,45 @@ class Settings(BaseSettings):
     AWS_SECRET_ACCESS_KEY: Optional[str] = Field(default=None, env="AWS_SECRET_ACCESS_KEY")
     AWS_SESSION_TOKEN: Optional[str] = Field(default=None, env="AWS_SESSION_TOKEN")
     AWS_PROFILE: Optional[str] = Field(default=None, env="AWS_PROFILE")
+    # Bedrock runtime endpoint override, e.g. http://127.0.0.1:8500 for the local stand-in (bedrock_standin.py)
+    BEDROCK_ENDPOINT_URL: Optional[str] = Field(default=None, env="BEDROCK_ENDPOINT_URL")
     # Bedrock Model Configuration - Choose between Claude 3.5 Sonnet v2 or Claude 3.7 Sonnet
     # us.anthropic.claude-3-5-sonnet-20241022-v2:0 (default)
     # us.anthropic.claude-3-7-sonnet-20250219-v1:0 
     BEDROCK_MODEL_ID: str = Field(default="us.anthropic.claude-3-5-sonnet-20241022-v2:0", env="BEDROCK_MODEL_ID")
+    # Small, simple rule-extraction requests go to a faster, cheaper model; empty disables routing
+    BEDROCK_FAST_MODEL_ID: str = Field(default="us.anthropic.claude-3-5-haiku-20241022-v1:0", env="BEDROCK_FAST_MODEL_ID")
+    AI_MODEL_ROUTING: bool = Field(default=True, env="AI_MODEL_ROUTING")
+    AI_ROUTING_MAX_FAST_TOKENS: int = Field(default=1500, env="AI_ROUTING_MAX_FAST_TOKENS")  # Code tokens
+    AI_ROUTING_MAX_FAST_COMPLEXITY: int = Field(default=15, env="AI_ROUTING_MAX_FAST_COMPLEXITY")  # Summed cyclomatic complexity
+    AI_MAX_CONCURRENT_REQUESTS: int = Field(default=8, env="AI_MAX_CONCURRENT_REQUESTS")  # Bedrock calls in flight
+    AI_REQUEST_TIMEOUT_SECONDS: int = Field(default=180, env="AI_REQUEST_TIMEOUT_SECONDS")  # Per model call, timed once it holds a slot
+    AI_ASYNC_TRANSPORT: bool = Field(default=True, env="AI_ASYNC_TRANSPORT")  # httpx + SigV4 instead of boto3 threads
+    AI_HTTP_MAX_CONNECTIONS: int = Field(default=100, env="AI_HTTP_MAX_CONNECTIONS")
+    AI_HTTP_KEEPALIVE_SECONDS: float = Field(default=60.0, env="AI_HTTP_KEEPALIVE_SECONDS")
+    AI_STREAMING: bool = Field(default=True, env="AI_STREAMING")  # Stream Claude 3+ responses over the async transport
+    AI_MAX_RULES_PER_FILE: int = Field(default=0, env="AI_MAX_RULES_PER_FILE")  # Stop generating after this many; 0 = no cap
+    AI_MAX_RETRIES: int = Field(default=5, env="AI_MAX_RETRIES")  # Retries of throttled calls
+    AI_RETRY_BASE_SECONDS: float = Field(default=1.0, env="AI_RETRY_BASE_SECONDS")
+    AI_RETRY_MAX_SECONDS: float = Field(default=30.0, env="AI_RETRY_MAX_SECONDS")
+    AI_TOKENS_PER_MINUTE: int = Field(default=0, env="AI_TOKENS_PER_MINUTE")  # 0 = no budget
+    AI_PACK_TOKEN_BUDGET: int = Field(default=6000, env="AI_PACK_TOKEN_BUDGET")  # Code tokens per packed prompt
+    AI_PACK_SMALL_FILE_TOKENS: int = Field(default=800, env="AI_PACK_SMALL_FILE_TOKENS")  # Larger files go alone
+    AI_CHUNK_TOKENS: int = Field(default=3000, env="AI_CHUNK_TOKENS")  # Prompt code budget per chunk of a large file
+    AI_CHUNK_OVERLAP_LINES: int = Field(default=5, env="AI_CHUNK_OVERLAP_LINES")
+    AI_CHUNK_MAX_PER_FILE: int = Field(default=40, env="AI_CHUNK_MAX_PER_FILE")  # Cap on requests for one file
+    AI_PRESCREEN_MODE: str = Field(default="skip", env="AI_PRESCREEN_MODE")  # skip, deprioritize or off
+    AI_PRESCREEN_MIN_SCORE: float = Field(default=2.0, env="AI_PRESCREEN_MIN_SCORE")  # Static business-logic score
+    AI_EXPLAIN_TOKEN_BUDGET: int = Field(default=4000, env="AI_EXPLAIN_TOKEN_BUDGET")  # Rule context tokens per explanation prompt
+    AI_EXPLAIN_MAX_RULES: int = Field(default=20, env="AI_EXPLAIN_MAX_RULES")  # Rules explained per prompt
+    AI_PROMPT_MINIMIZE: bool = Field(default=True, env="AI_PROMPT_MINIMIZE")  # Strip license headers, dead comments, blank lines
+    AI_SUMMARY_MIN_ENTITIES: int = Field(default=150, env="AI_SUMMARY_MIN_ENTITIES")  # Map-reduce overview summaries from this size
+    AI_SUMMARY_MIN_MODULE_ENTITIES: int = Field(default=5, env="AI_SUMMARY_MIN_MODULE_ENTITIES")  # Smaller directories fold into their parent
+    AI_SUMMARY_REDUCE_TOKEN_BUDGET: int = Field(default=6000, env="AI_SUMMARY_REDUCE_TOKEN_BUDGET")  # Child summary tokens per reduce prompt
+    AI_CIRCUIT_FAILURE_THRESHOLD: int = Field(default=5, env="AI_CIRCUIT_FAILURE_THRESHOLD")  # Consecutive failures that open the circuit; 0 = off
+    AI_CIRCUIT_RESET_SECONDS: float = Field(default=60.0, env="AI_CIRCUIT_RESET_SECONDS")  # Open time before a probe call
+    AI_FAIR_SHARE: bool = Field(default=True, env="AI_FAIR_SHARE")  # Share AI capacity between concurrent jobs by priority
+    AI_FAIR_QUANTUM_TOKENS: int = Field(default=1000, env="AI_FAIR_QUANTUM_TOKENS")  # Estimated tokens a priority-1 job may start per turn
     
     # Feature flags
     
@@ -78,10 +113,22 @@ class Settings(BaseSettings):
     CONFIGS_DIR: str = "./configs"
     MAX_FILE_SIZE_MB: int = 100
     
+    # Caching
+    CACHE_DIR: str = Field(default="./cache", env="CACHE_DIR")
+    ANALYSIS_CACHE_DIR: str = Field(default="./cache/analysis", env="ANALYSIS_CACHE_DIR")
+    ENABLE_ANALYSIS_CACHE: bool = Field(default=True, env="ENABLE_ANALYSIS_CACHE")
+    AI_CACHE_PATH: str = Field(default="./cache/ai_responses.db", env="AI_CACHE_PATH")
+    AI_CACHE_MAX_SIZE_MB: int = Field(default=512, env="AI_CACHE_MAX_SIZE_MB")
+    AI_CACHE_MAX_AGE_DAYS: int = Field(default=30, env="AI_CACHE_MAX_AGE_DAYS")  # 0 = no age limit
+    ENABLE_AI_CACHE: bool = Field(default=True, env="ENABLE_AI_CACHE")
+    
     # Processing
     MAX_WORKERS: int = 4
     CHUNK_SIZE: int = 1000  # Lines per chunk for large files
     PROCESSING_TIMEOUT: int = 600  # 10 minutes
+    PARSE_TIMEOUT_SECONDS: int = Field(default=60, env="PARSE_TIMEOUT_SECONDS")  # Per-file parse budget
+    PARSE_MAX_FILE_SIZE_KB: int = Field(default=2048, env="PARSE_MAX_FILE_SIZE_KB")
+    PARSE_OVERSIZE_POLICY: str = Field(default="structural", env="PARSE_OVERSIZE_POLICY")  # skip, truncate, structural
     
     # Documentation Generation
     DEFAULT_DOC_DEPTH: str = "standard"
@@ -107,3 +154,4 @@ settings = Settings()
 Path(settings.OUTPUT_DIR).mkdir(parents=True, exist_ok=True)
 Path(settings.TEMP_DIR).mkdir(parents=True, exist_ok=True)
 Path(settings.CONFIGS_DIR).mkdir(parents=True, exist_ok=True)
+Path(settings.ANALYSIS_CACHE_DIR).mkdir(parents=True, exist_ok=True)
@@ -54,6 +54,8 @@ class DocumentationJob(Base):
     business_rules_count = Column(Integer, default=0)
     files_processed = Column(Integer, default=0)
     output_path = Column(String, nullable=True)
+    job_report = Column(JSON, nullable=True)  # Parse outliers, skipped work and other per-job diagnostics
+    ai_usage = Column(JSON, nullable=True)  # AI tokens, latency, retries and cost per stage and model
     
     # Metrics
     processing_time_seconds = Column(Float, nullable=True)
@@ -269,10 +271,26 @@ class SearchIndex(Base):
     updated_at = Column(DateTime, default=datetime.utcnow)
 
 # Database initialization
+def _add_missing_columns(sync_conn):
+    """Add nullable columns introduced after a table was first created (create_all never alters tables)"""
+    from sqlalchemy import inspect
+    
+    inspector = inspect(sync_conn)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing or not column.nullable:
+                continue
+            column_type = column.type.compile(dialect=sync_conn.dialect)
+            sync_conn.exec_driver_sql(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}')
+
 async def init_db():
     """Initialize database"""
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(_add_missing_columns)
 
 async def get_session() -> AsyncSession:
     """Get database session"""
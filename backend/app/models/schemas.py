@@ -25,6 +25,12 @@ class DocumentationRequest(BaseModel):
     include_business_rules: bool = Field(default=True)
     include_api_docs: bool = Field(default=True)
     incremental_update: bool = Field(default=False)
+    force_refresh: bool = Field(default=False, description="Bypass cached AI responses")
+    
+    # Anytime mode: AI stages work in priority order and stop when a budget runs out
+    time_budget_seconds: Optional[int] = Field(default=None, gt=0, description="Wall-clock budget from job start; AI stages stop when it runs out")
+    ai_token_budget: Optional[int] = Field(default=None, gt=0, description="Model tokens (input + output) the job may use")
+    ai_priority: int = Field(default=1, ge=1, le=10, description="Share of AI capacity relative to other running jobs")
     
     # Focus areas
     focus_classes: bool = Field(default=True)
@@ -67,6 +73,8 @@ class JobStatusResponse(BaseModel):
     output_path: Optional[str]
     error_message: Optional[str]
     processing_time_seconds: Optional[float]
+    job_report: Optional[Dict[str, Any]] = None
+    ai_usage: Optional[Dict[str, Any]] = None
 
 class RepositoryInfo(BaseModel):
     """Repository information model"""
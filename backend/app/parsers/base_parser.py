@@ -98,6 +98,26 @@ class BaseParser(ABC):
             logger.debug(f"XML content validation failed for {file_path}: {e}")
             return None
     
+    def validate_xml_header(self, file_path: Path, sniff_bytes: int = 1024) -> bool:
+        """Cheaply check that a file looks like XML without reading all of it"""
+        try:
+            if not self.validate_file(file_path):
+                return False
+            
+            with open(file_path, 'rb') as f:
+                head = f.read(sniff_bytes)
+            
+            head = head.lstrip(b'\xef\xbb\xbf').lstrip()
+            if not head.startswith(b'<'):
+                logger.debug(f"XML file does not start with '<': {file_path}")
+                return False
+            
+            return True
+            
+        except Exception as e:
+            logger.debug(f"XML header validation failed for {file_path}: {e}")
+            return False
+    
     def read_file_safe(self, file_path: Path, encoding: str = 'utf-8') -> Optional[str]:
         """Safely read file content with validation"""
         try:
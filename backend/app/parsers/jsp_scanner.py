@@ -0,0 +1,164 @@
+"""
+Single-pass JSP / tag-library scanner shared by the Struts parsers and the integration analyzer
+"""
+
+import re
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional
+
+# One alternation, one left-to-right pass: JSP comments and scriptlets are consumed so
+# their contents are not mistaken for markup, directives and tags are tokenized, and
+# OGNL expressions in template text are picked up between tags.
+_TOKEN_PATTERN = re.compile(
+    r'(?P<comment><%--.*?--%>)'
+    r'|<%@\s*(?P<directive>\w+)(?P<directive_attrs>.*?)%>'
+    r'|(?P<scriptlet><%.*?%>)'
+    r'|<(?P<tag>[A-Za-z][\w.-]*(?::[\w.-]+)?)(?P<attrs>(?:[^>"\']|"[^"]*"|\'[^\']*\')*)>'
+    r'|%\{(?P<ognl>[^}]+)\}',
+    re.DOTALL
+)
+_ATTR_PATTERN = re.compile(r'([\w:.-]+)\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s"\'>]+))')
+_OGNL_PATTERN = re.compile(r'%\{([^}]+)\}')
+
+# Tags (lower-cased) whose attribute is a server-side action, and the component they represent
+FORM_ACTION_TAGS = {
+    'form': ('action', 'form'),
+    's:form': ('action', 'form'),
+    'html:form': ('action', 'form'),
+    'form:form': ('action', 'form'),
+    'a': ('href', 'link'),
+    's:url': ('action', 'link'),
+    'h:commandbutton': ('action', 'button'),
+}
+
+# Tags (lower-cased) that pull in another page, and the attribute naming it
+INCLUDE_TAGS = {
+    'jsp:include': 'page',
+    'jsp:forward': 'page',
+    's:include': 'value',
+    'c:import': 'url',
+    'tiles:insert': 'page',
+}
+
+
+@dataclass
+class JSPToken:
+    """A tag, directive or OGNL expression found in a JSP"""
+    kind: str  # tag, directive, ognl
+    name: str
+    line_number: int
+    position: int
+    attributes: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def prefix(self) -> Optional[str]:
+        """Tag library prefix (e.g. 's' for <s:form>)"""
+        return self.name.split(':', 1)[0] if ':' in self.name else None
+
+    @property
+    def local_name(self) -> str:
+        return self.name.split(':', 1)[-1]
+
+
+@dataclass
+class JSPFormAction:
+    """A form, link or button that targets a server-side action"""
+    component_type: str  # form, link, button
+    tag: str
+    action_url: str
+    line_number: int
+    position: int
+
+
+@dataclass
+class JSPScanResult:
+    """Everything the parsers and analyzers need from one JSP, gathered in one pass"""
+    tags: List[JSPToken] = field(default_factory=list)
+    form_actions: List[JSPFormAction] = field(default_factory=list)
+    includes: List[str] = field(default_factory=list)
+    taglibs: Dict[str, str] = field(default_factory=dict)
+    ognl_expressions: List[str] = field(default_factory=list)
+    input_positions: List[int] = field(default_factory=list)
+    input_names: List[str] = field(default_factory=list)
+
+    def tags_with_prefix(self, prefix: str) -> List[str]:
+        """Local names of every tag using a taglib prefix, in document order"""
+        return [tag.local_name for tag in self.tags if tag.prefix == prefix]
+
+    def inputs_near(self, position: int, window: int = 1000) -> List[str]:
+        """Names of <input> fields within a window around a position"""
+        start = bisect_left(self.input_positions, position - window)
+        end = bisect_right(self.input_positions, position + window)
+        return self.input_names[start:end]
+
+
+def _parse_attributes(text: str) -> Dict[str, str]:
+    attributes = {}
+    for match in _ATTR_PATTERN.finditer(text):
+        value = next(group for group in match.groups()[1:] if group is not None)
+        attributes[match.group(1).lower()] = value
+    return attributes
+
+
+def iter_jsp_tokens(content: str) -> Iterator[JSPToken]:
+    """Yield tags, directives and OGNL expressions in document order"""
+    line_number = 1
+    last_position = 0
+
+    for match in _TOKEN_PATTERN.finditer(content):
+        if match.group('comment') or match.group('scriptlet'):
+            continue
+
+        position = match.start()
+        line_number += content.count('\n', last_position, position)
+        last_position = position
+
+        if match.group('tag'):
+            attrs_text = match.group('attrs')
+            yield JSPToken('tag', match.group('tag'), line_number, position, _parse_attributes(attrs_text))
+            # OGNL is most often found inside attribute values
+            for ognl in _OGNL_PATTERN.finditer(attrs_text):
+                yield JSPToken('ognl', ognl.group(1), line_number, position)
+        elif match.group('directive'):
+            yield JSPToken('directive', match.group('directive').lower(), line_number, position,
+                           _parse_attributes(match.group('directive_attrs')))
+        else:
+            yield JSPToken('ognl', match.group('ognl'), line_number, position)
+
+
+def scan_jsp(content: str) -> JSPScanResult:
+    """Scan JSP content once, collecting tags, form actions, includes and OGNL expressions"""
+    result = JSPScanResult()
+
+    for token in iter_jsp_tokens(content):
+        if token.kind == 'ognl':
+            result.ognl_expressions.append(token.name)
+            continue
+
+        if token.kind == 'directive':
+            if token.name == 'include' and token.attributes.get('file'):
+                result.includes.append(token.attributes['file'])
+            elif token.name == 'taglib' and token.attributes.get('prefix'):
+                result.taglibs[token.attributes['prefix']] = token.attributes.get('uri') or token.attributes.get('tagdir', '')
+            continue
+
+        result.tags.append(token)
+        tag_name = token.name.lower()
+
+        if tag_name == 'input' and token.attributes.get('name') is not None:
+            result.input_positions.append(token.position)
+            result.input_names.append(token.attributes['name'])
+
+        if tag_name in FORM_ACTION_TAGS:
+            attribute, component_type = FORM_ACTION_TAGS[tag_name]
+            action_url = token.attributes.get(attribute)
+            if action_url is not None:
+                result.form_actions.append(
+                    JSPFormAction(component_type, token.name, action_url, token.line_number, token.position)
+                )
+
+        if tag_name in INCLUDE_TAGS and token.attributes.get(INCLUDE_TAGS[tag_name]):
+            result.includes.append(token.attributes[INCLUDE_TAGS[tag_name]])
+
+    return result
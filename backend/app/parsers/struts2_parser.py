@@ -9,6 +9,8 @@ from pathlib import Path
 from typing import List, Dict, Any
 
 from app.parsers.base_parser import BaseParser
+from app.parsers.jsp_scanner import scan_jsp
+from app.parsers.xml_stream import iter_xml_elements
 
 logger = logging.getLogger(__name__)
 
@@ -60,37 +62,44 @@ class Struts2Parser(BaseParser):
         """Parse struts.xml for Struts2 specific features"""
         entities = []
         
-        # Validate XML content first
-        xml_content = self.validate_xml_content(file_path)
-        if not xml_content:
+        # Validate XML header first; the document itself is streamed below
+        if not self.validate_xml_header(file_path):
             logger.debug(f"Skipping invalid or empty XML file: {file_path}")
             return entities
         
         try:
-            tree = ET.parse(file_path)
-            root = tree.getroot()
+            package_name = 'default'
+            namespace = '/'
             
-            # Extract packages
-            for package in root.findall('.//package'):
-                package_name = package.get('name', 'default')
-                namespace = package.get('namespace', '/')
-                extends = package.get('extends', 'struts-default')
+            events = iter_xml_elements(
+                file_path,
+                end_tags=('action', 'result', 'interceptor-stack'),
+                start_tags=('package',)
+            )
+            for event, element, ancestors in events:
+                parent_tag = ancestors[-1].tag if ancestors else None
                 
-                package_entity = self.create_entity(
-                    name=package_name,
-                    entity_type='struts2_package',
-                    file_path=str(file_path),
-                    line_number=1,
-                    namespace=namespace,
-                    extends=extends
-                )
-                entities.append(package_entity)
+                if event == 'start':
+                    # Extract packages; attributes are complete on the start event
+                    package_name = element.get('name', 'default')
+                    namespace = element.get('namespace', '/')
+                    extends = element.get('extends', 'struts-default')
+                    
+                    package_entity = self.create_entity(
+                        name=package_name,
+                        entity_type='struts2_package',
+                        file_path=str(file_path),
+                        line_number=1,
+                        namespace=namespace,
+                        extends=extends
+                    )
+                    entities.append(package_entity)
                 
-                # Extract actions in package
-                for action in package.findall('action'):
-                    action_name = action.get('name', 'unnamed')
-                    action_class = action.get('class', '')
-                    method = action.get('method', 'execute')
+                elif element.tag == 'action' and parent_tag == 'package':
+                    # Extract actions in package
+                    action_name = element.get('name', 'unnamed')
+                    action_class = element.get('class', '')
+                    method = element.get('method', 'execute')
                     
                     action_entity = self.create_entity(
                         name=f"{package_name}.{action_name}",
@@ -105,7 +114,7 @@ class Struts2Parser(BaseParser):
                     entities.append(action_entity)
                     
                     # Extract interceptor refs
-                    for interceptor_ref in action.findall('interceptor-ref'):
+                    for interceptor_ref in element.findall('interceptor-ref'):
                         interceptor_name = interceptor_ref.get('name', '')
                         if interceptor_name:
                             interceptor_entity = self.create_entity(
@@ -117,33 +126,33 @@ class Struts2Parser(BaseParser):
                                 action=action_name
                             )
                             entities.append(interceptor_entity)
-            
-            # Extract global results
-            for global_result in root.findall('.//global-results/result'):
-                result_name = global_result.get('name', 'success')
-                result_type = global_result.get('type', 'dispatcher')
                 
-                global_result_entity = self.create_entity(
-                    name=f"global_{result_name}",
-                    entity_type='struts2_global_result',
-                    file_path=str(file_path),
-                    line_number=1,
-                    result_type=result_type
-                )
-                entities.append(global_result_entity)
-            
-            # Extract interceptor stacks
-            for interceptor_stack in root.findall('.//interceptor-stack'):
-                stack_name = interceptor_stack.get('name', '')
+                elif element.tag == 'result' and parent_tag == 'global-results':
+                    # Extract global results
+                    result_name = element.get('name', 'success')
+                    result_type = element.get('type', 'dispatcher')
+                    
+                    global_result_entity = self.create_entity(
+                        name=f"global_{result_name}",
+                        entity_type='struts2_global_result',
+                        file_path=str(file_path),
+                        line_number=1,
+                        result_type=result_type
+                    )
+                    entities.append(global_result_entity)
                 
-                stack_entity = self.create_entity(
-                    name=stack_name,
-                    entity_type='struts2_interceptor_stack',
-                    file_path=str(file_path),
-                    line_number=1,
-                    interceptors=[ref.get('name', '') for ref in interceptor_stack.findall('interceptor-ref')]
-                )
-                entities.append(stack_entity)
+                elif element.tag == 'interceptor-stack':
+                    # Extract interceptor stacks
+                    stack_name = element.get('name', '')
+                    
+                    stack_entity = self.create_entity(
+                        name=stack_name,
+                        entity_type='struts2_interceptor_stack',
+                        file_path=str(file_path),
+                        line_number=1,
+                        interceptors=[ref.get('name', '') for ref in element.findall('interceptor-ref')]
+                    )
+                    entities.append(stack_entity)
         
         except ET.ParseError as e:
             logger.warning(f"Error parsing XML {file_path}: {e}")
@@ -236,11 +245,10 @@ class Struts2Parser(BaseParser):
         
         try:
             
-            # Extract Struts2 tags (s: prefix)
-            s_tags = re.findall(r'<s:(\w+)[^>]*>', content)
-            
-            # Extract OGNL expressions
-            ognl_expressions = re.findall(r'%{([^}]+)}', content)
+            # Extract Struts2 tags (s: prefix) and OGNL expressions in a single scan
+            scan = scan_jsp(content)
+            s_tags = scan.tags_with_prefix('s')
+            ognl_expressions = scan.ognl_expressions
             
             if s_tags or ognl_expressions:
                 entity = self.create_entity(
@@ -251,7 +259,9 @@ class Struts2Parser(BaseParser):
                     struts2_tags=list(set(s_tags)),
                     ognl_expressions=ognl_expressions[:10],  # Limit to first 10
                     tag_count=len(s_tags),
-                    ognl_count=len(ognl_expressions)
+                    ognl_count=len(ognl_expressions),
+                    form_actions=[action.action_url for action in scan.form_actions],
+                    includes=scan.includes
                 )
                 entities.append(entity)
         
@@ -6,15 +6,22 @@ import logging
 import re
 import xml.etree.ElementTree as ET
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 
 from app.parsers.base_parser import BaseParser
+from app.parsers.jsp_scanner import scan_jsp
+from app.parsers.xml_stream import iter_xml_elements
 
 logger = logging.getLogger(__name__)
 
 class StrutsParser(BaseParser):
     """Parser for Apache Struts/Struts2 framework files"""
     
+    def __init__(self):
+        # Classes referenced by the last config parse() streamed, so extract_dependencies()
+        # on the same file does not stream it a second time
+        self._last_xml_dependencies: Tuple[Optional[str], List[str]] = (None, [])
+    
     def parse(self, file_path: Path) -> List[Dict[str, Any]]:
         """Parse Struts files and extract entities"""
         entities = []
@@ -52,59 +59,70 @@ class StrutsParser(BaseParser):
         return list(set(dependencies))
     
     def _parse_struts_xml(self, file_path: Path) -> List[Dict]:
-        """Parse struts.xml configuration file"""
+        """Parse struts.xml configuration file, collecting its class dependencies in the same pass"""
         entities = []
+        dependencies = []
+        self._last_xml_dependencies = (str(file_path), dependencies)
+        
+        if not self.validate_xml_header(file_path):
+            logger.debug(f"Skipping invalid or empty XML file: {file_path}")
+            return entities
         
         try:
-            tree = ET.parse(file_path)
-            root = tree.getroot()
-            
-            # Extract actions (Struts 2)
-            for action in root.findall('.//action'):
-                action_name = action.get('name', 'unnamed')
-                action_class = action.get('class', '')
-                method = action.get('method', 'execute')
-                
-                entity = self.create_entity(
-                    name=action_name,
-                    entity_type='struts_action',
-                    file_path=str(file_path),
-                    line_number=1,
-                    action_class=action_class,
-                    method=method,
-                    framework='Struts2'
-                )
-                entities.append(entity)
-                
-                # Extract results
-                for result in action.findall('result'):
-                    result_name = result.get('name', 'success')
-                    result_type = result.get('type', 'dispatcher')
+            # Stream the document so large merged configs stay flat in memory
+            for event, element, _ in iter_xml_elements(
+                file_path, end_tags=('action', 'action-mapping'), start_tags=('action', 'interceptor')
+            ):
+                if event == 'start':
+                    # Action and interceptor classes; attributes are complete on 'start'
+                    element_class = element.get('class', '')
+                    if element_class:
+                        dependencies.append(element_class)
+                elif element.tag == 'action':
+                    # Extract actions (Struts 2)
+                    action_name = element.get('name', 'unnamed')
+                    action_class = element.get('class', '')
+                    method = element.get('method', 'execute')
                     
-                    result_entity = self.create_entity(
-                        name=f"{action_name}_{result_name}",
-                        entity_type='struts_result',
+                    entity = self.create_entity(
+                        name=action_name,
+                        entity_type='struts_action',
                         file_path=str(file_path),
                         line_number=1,
-                        result_type=result_type,
-                        parent_action=action_name
+                        action_class=action_class,
+                        method=method,
+                        framework='Struts2'
                     )
-                    entities.append(result_entity)
-            
-            # Extract action mappings (Struts 1)
-            for action_mapping in root.findall('.//action-mapping'):
-                path = action_mapping.get('path', '')
-                type_class = action_mapping.get('type', '')
-                
-                entity = self.create_entity(
-                    name=path,
-                    entity_type='struts_mapping',
-                    file_path=str(file_path),
-                    line_number=1,
-                    action_class=type_class,
-                    framework='Struts1'
-                )
-                entities.append(entity)
+                    entities.append(entity)
+                    
+                    # Extract results
+                    for result in element.findall('result'):
+                        result_name = result.get('name', 'success')
+                        result_type = result.get('type', 'dispatcher')
+                        
+                        result_entity = self.create_entity(
+                            name=f"{action_name}_{result_name}",
+                            entity_type='struts_result',
+                            file_path=str(file_path),
+                            line_number=1,
+                            result_type=result_type,
+                            parent_action=action_name
+                        )
+                        entities.append(result_entity)
+                else:
+                    # Extract action mappings (Struts 1)
+                    path = element.get('path', '')
+                    type_class = element.get('type', '')
+                    
+                    entity = self.create_entity(
+                        name=path,
+                        entity_type='struts_mapping',
+                        file_path=str(file_path),
+                        line_number=1,
+                        action_class=type_class,
+                        framework='Struts1'
+                    )
+                    entities.append(entity)
             
         except ET.ParseError as e:
             logger.warning(f"Error parsing XML {file_path}: {e}")
@@ -169,8 +187,9 @@ class StrutsParser(BaseParser):
             with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
                 content = f.read()
             
-            # Extract Struts tags
-            struts_tags = re.findall(r'<s:(\w+)[^>]*>', content)
+            # Extract Struts tags in a single scan of the page
+            scan = scan_jsp(content)
+            struts_tags = scan.tags_with_prefix('s')
             unique_tags = set(struts_tags)
             
             if unique_tags:
@@ -180,7 +199,9 @@ class StrutsParser(BaseParser):
                     file_path=str(file_path),
                     line_number=1,
                     struts_tags=list(unique_tags),
-                    tag_count=len(struts_tags)
+                    tag_count=len(struts_tags),
+                    form_actions=[action.action_url for action in scan.form_actions],
+                    includes=scan.includes
                 )
                 entities.append(entity)
         
@@ -191,27 +212,10 @@ class StrutsParser(BaseParser):
     
     def _extract_xml_dependencies(self, file_path: Path) -> List[str]:
         """Extract dependencies from XML configuration"""
-        dependencies = []
-        
-        try:
-            tree = ET.parse(file_path)
-            root = tree.getroot()
-            
-            # Extract action classes
-            for action in root.findall('.//action'):
-                action_class = action.get('class', '')
-                if action_class:
-                    dependencies.append(action_class)
-            
-            # Extract interceptor classes
-            for interceptor in root.findall('.//interceptor'):
-                interceptor_class = interceptor.get('class', '')
-                if interceptor_class:
-                    dependencies.append(interceptor_class)
-        
-        except Exception as e:
-            logger.warning(f"Error extracting XML dependencies: {e}")
-        
+        if self._last_xml_dependencies[0] != str(file_path):
+            self._parse_struts_xml(file_path)
+        dependencies = self._last_xml_dependencies[1]
+        self._last_xml_dependencies = (None, [])
         return dependencies
     
     def _extract_java_dependencies(self, file_path: Path) -> List[str]:
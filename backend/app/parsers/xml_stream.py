@@ -0,0 +1,51 @@
+"""
+Streaming XML helpers for large framework configuration files
+"""
+
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import BinaryIO, Iterable, Iterator, List, Tuple, Union
+
+
+def iter_xml_elements(
+    source: Union[str, Path, BinaryIO],
+    end_tags: Iterable[str],
+    start_tags: Iterable[str] = ()
+) -> Iterator[Tuple[str, ET.Element, List[ET.Element]]]:
+    """
+    Stream an XML document, yielding (event, element, ancestors) tuples.
+    
+    ``source`` is a path or an already open binary file, which is read but not closed.
+
+    Elements named in ``start_tags`` are yielded on their 'start' event, when only
+    their attributes are available. Elements named in ``end_tags`` are yielded on
+    their 'end' event with all children attached. ``ancestors`` is the list of
+    currently open elements, outermost first, and must not be kept by the caller.
+
+    Elements are detached and cleared as soon as no enclosing ``end_tags``
+    element still needs them, so memory stays bounded by the largest target
+    element rather than the document size.
+    """
+    end_tags = set(end_tags)
+    start_tags = set(start_tags)
+    ancestors: List[ET.Element] = []
+    open_targets = 0
+
+    for event, elem in ET.iterparse(source if hasattr(source, 'read') else str(source), events=('start', 'end')):
+        if event == 'start':
+            if elem.tag in start_tags:
+                yield event, elem, ancestors
+            if elem.tag in end_tags:
+                open_targets += 1
+            ancestors.append(elem)
+            continue
+
+        ancestors.pop()
+        if elem.tag in end_tags:
+            open_targets -= 1
+            yield event, elem, ancestors
+
+        if open_targets == 0:
+            elem.clear()
+            if ancestors:
+                ancestors[-1].remove(elem)
@@ -0,0 +1,87 @@
+"""
+Time and token budgets for the AI stages of a documentation job ("anytime" mode)
+
+A job with DocumentationRequest.time_budget_seconds or ai_token_budget installs an
+AIBudget for its duration. AI stages hand out work in priority order; once the budget
+is spent the scheduler stops dispatching, in-flight calls are cancelled at the deadline
+(a call shared with another caller waiting on the same prompt keeps running for it),
+and further model calls raise AIBudgetExhausted so callers can fall back to partial
+output. Cached responses cost nothing and are still served.
+"""
+
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+
+from app.core.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+class AIBudgetExhausted(RuntimeError):
+    """Raised instead of making a model call once the job's budget is spent"""
+
+
+class AIBudget:
+    """Wall-clock deadline and token allowance shared by all AI calls of one job"""
+
+    def __init__(self, time_budget_seconds: Optional[float] = None, token_budget: Optional[int] = None):
+        self.time_budget_seconds = time_budget_seconds
+        self.token_budget = token_budget
+        self.started_at = time.monotonic()
+        self.tokens_used = 0
+        self.exhausted_reason: Optional[str] = None
+        self.exhausted_at_stage: Optional[str] = None
+        self.stage: Optional[str] = None
+
+    @property
+    def limited(self) -> bool:
+        return bool(self.time_budget_seconds or self.token_budget)
+
+    def elapsed_seconds(self) -> float:
+        return time.monotonic() - self.started_at
+
+    def remaining_seconds(self) -> Optional[float]:
+        """Seconds until the deadline, or None without a time budget"""
+        if not self.time_budget_seconds:
+            return None
+        return max(0.0, self.time_budget_seconds - self.elapsed_seconds())
+
+    def record_tokens(self, tokens: int):
+        self.tokens_used += tokens
+
+    def check(self) -> Optional[str]:
+        """Why the budget is spent, or None while there is budget left"""
+        if self.exhausted_reason:
+            return self.exhausted_reason
+        reason = None
+        if self.time_budget_seconds and self.elapsed_seconds() >= self.time_budget_seconds:
+            reason = f"time budget of {self.time_budget_seconds}s exhausted"
+        elif self.token_budget and self.tokens_used >= self.token_budget:
+            reason = f"token budget of {self.token_budget} exhausted"
+        if reason:
+            self.exhausted_reason = reason
+            self.exhausted_at_stage = self.stage
+            logger.warning(f"AI budget exhausted during {self.stage or 'job'}: {reason}; finishing with partial results")
+        return reason
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'time_budget_seconds': self.time_budget_seconds,
+            'elapsed_seconds': round(self.elapsed_seconds(), 1),
+            'token_budget': self.token_budget,
+            'tokens_used': self.tokens_used,
+            'exhausted': self.exhausted_reason is not None,
+            'exhausted_reason': self.exhausted_reason,
+            'exhausted_at_stage': self.exhausted_at_stage,
+        }
+
+
+# Budget of the job running in the current context, if it set one
+current_budget: ContextVar[Optional[AIBudget]] = ContextVar('ai_budget', default=None)
+
+
+def check_budget() -> Optional[str]:
+    """Why the current job's budget is spent, or None (also when no budget is set)"""
+    budget = current_budget.get()
+    return budget.check() if budget else None
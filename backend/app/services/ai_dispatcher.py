@@ -0,0 +1,216 @@
+"""
+Fair-share dispatch of AI calls across concurrent jobs
+
+The AI service is a process-wide singleton, so every running job draws on the same
+adaptive concurrency limit and tokens-per-minute budget. First come, first served lets a
+job with thousands of queued rule extractions hold every slot while a small job waits
+behind it. The dispatcher keeps one queue per job and hands out capacity with deficit
+round robin: each turn a job earns AI_FAIR_QUANTUM_TOKENS times its priority in estimated
+tokens and may start calls until that credit is spent. Every job with pending calls gets
+capacity within one round, so a small job finishes promptly next to a giant one, and a
+job with priority 3 gets three times the share of a job with priority 1.
+
+A call is started once it is selected and both a concurrency slot and its estimated
+tokens are available. Calls made outside a job share one queue.
+"""
+
+import time
+import asyncio
+from collections import deque
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, Optional
+
+from app.core.config import settings
+from app.services.ai_throttle import AdaptiveConcurrencyLimiter, TokenBudget
+
+NO_JOB = '(no job)'
+
+
+@dataclass
+class JobShare:
+    """Identity and priority of the job whose AI calls run in the current context"""
+    job_id: str
+    priority: int = 1
+
+
+# Share of the job running in the current context, if any
+current_job_share: ContextVar[Optional[JobShare]] = ContextVar('ai_job_share', default=None)
+
+
+@dataclass
+class _Waiter:
+    cost: int
+    future: asyncio.Future
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+@dataclass
+class _Flow:
+    """Pending calls and round-robin credit of one job"""
+    weight: int
+    queue: Deque[_Waiter] = field(default_factory=deque)
+    deficit: float = 0.0
+
+
+@dataclass
+class _JobStats:
+    priority: int = 1
+    calls: int = 0
+    tokens: int = 0
+    wait_seconds: float = 0.0
+    max_wait_seconds: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'priority': self.priority,
+            'calls': self.calls,
+            'estimated_tokens': self.tokens,
+            'avg_wait_seconds': round(self.wait_seconds / self.calls, 3) if self.calls else None,
+            'max_wait_seconds': round(self.max_wait_seconds, 3),
+        }
+
+
+class FairShareDispatcher:
+    """Deficit round robin over per-job queues in front of a shared limiter and token budget"""
+
+    def __init__(
+        self,
+        limiter: AdaptiveConcurrencyLimiter,
+        token_budget: TokenBudget,
+        quantum_tokens: Optional[int] = None,
+        enabled: Optional[bool] = None
+    ):
+        self.limiter = limiter
+        self.token_budget = token_budget
+        self.quantum_tokens = quantum_tokens or settings.AI_FAIR_QUANTUM_TOKENS
+        self.enabled = settings.AI_FAIR_SHARE if enabled is None else enabled
+        self._flows: Dict[str, _Flow] = {}
+        self._ring: Deque[str] = deque()  # Jobs with pending calls, in round-robin order
+        self._turn_started = False  # Whether the job at the head of the ring has had its quantum
+        self._job_stats: Dict[str, _JobStats] = {}
+        self._retry_handle: Optional[asyncio.TimerHandle] = None
+
+    def _share(self) -> JobShare:
+        share = current_job_share.get()
+        if share is None or not self.enabled:
+            return JobShare(NO_JOB)
+        return share
+
+    async def acquire(self, estimated_tokens: int):
+        """Wait for this job's turn, a concurrency slot and the estimated tokens"""
+        share = self._share()
+        weight = max(1, share.priority)
+        flow = self._flows.get(share.job_id)
+        if flow is None:
+            flow = self._flows[share.job_id] = _Flow(weight)
+        flow.weight = weight
+        if not flow.queue:
+            self._ring.append(share.job_id)
+        self._job_stats.setdefault(share.job_id, _JobStats()).priority = weight
+
+        waiter = _Waiter(estimated_tokens, asyncio.get_running_loop().create_future())
+        flow.queue.append(waiter)
+        self._dispatch()
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Granted just as the caller gave up: hand the capacity back
+                self.token_budget.adjust(-estimated_tokens)
+                await self.release()
+            else:
+                self._discard(share.job_id, waiter)
+            raise
+
+    async def release(self, latency: Optional[float] = None, throttled: bool = False):
+        """Return a concurrency slot (see AdaptiveConcurrencyLimiter.release) and start waiting calls"""
+        self.limiter.release(latency=latency, throttled=throttled)
+        self._dispatch()
+
+    def _discard(self, job_id: str, waiter: _Waiter):
+        flow = self._flows.get(job_id)
+        if flow is None or waiter not in flow.queue:
+            return
+        flow.queue.remove(waiter)
+        if not flow.queue:
+            self._retire(job_id)
+        self._dispatch()
+
+    def _retire(self, job_id: str):
+        """Take a job without pending calls out of the rotation; unused credit is not banked"""
+        if self._ring and self._ring[0] == job_id:
+            self._turn_started = False
+        self._ring.remove(job_id)
+        del self._flows[job_id]
+
+    def _select(self) -> Optional[str]:
+        """Job whose next call goes next under deficit round robin"""
+        while self._ring:
+            job_id = self._ring[0]
+            flow = self._flows[job_id]
+            while flow.queue and flow.queue[0].future.done():
+                flow.queue.popleft()  # Cancelled while waiting
+            if not flow.queue:
+                self._retire(job_id)
+                continue
+            if not self._turn_started:
+                flow.deficit += self.quantum_tokens * flow.weight
+                self._turn_started = True
+            if flow.queue[0].cost <= flow.deficit:
+                return job_id
+            self._ring.rotate(-1)
+            self._turn_started = False
+        return None
+
+    def _dispatch(self):
+        """Start as many waiting calls as capacity allows, in fair order"""
+        while True:
+            job_id = self._select()
+            if job_id is None or self.limiter.in_flight >= int(self.limiter.limit):
+                return
+            flow = self._flows[job_id]
+            waiter = flow.queue[0]
+            wait_seconds = self.token_budget.try_consume(waiter.cost)
+            if wait_seconds > 0:
+                self._retry_later(wait_seconds)
+                return
+            self.limiter.try_acquire()
+
+            flow.queue.popleft()
+            flow.deficit -= waiter.cost
+            waited = time.monotonic() - waiter.enqueued_at
+            stats = self._job_stats.setdefault(job_id, _JobStats(flow.weight))
+            stats.calls += 1
+            stats.tokens += waiter.cost
+            stats.wait_seconds += waited
+            stats.max_wait_seconds = max(stats.max_wait_seconds, waited)
+            waiter.future.set_result(None)
+            if not flow.queue:
+                self._retire(job_id)
+
+    def _retry_later(self, delay: float):
+        """Dispatch again once the token budget has refilled enough"""
+        if self._retry_handle is not None:
+            return
+
+        def retry():
+            self._retry_handle = None
+            self._dispatch()
+
+        self._retry_handle = asyncio.get_running_loop().call_later(delay, retry)
+
+    def job_statistics(self, job_id: str) -> Dict[str, Any]:
+        """Calls dispatched for a job and how long they waited for their turn"""
+        return self._job_stats.get(job_id, _JobStats()).to_dict()
+
+    def forget_job(self, job_id: str):
+        self._job_stats.pop(job_id, None)
+
+    def get_statistics(self) -> Dict[str, Any]:
+        return {
+            'fair_share': self.enabled,
+            'concurrency_limit': int(self.limiter.limit),
+            'in_flight': self.limiter.in_flight,
+            'queued_by_job': {job_id: len(self._flows[job_id].queue) for job_id in self._ring},
+        }
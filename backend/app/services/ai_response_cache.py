@@ -0,0 +1,163 @@
+"""
+Persistent cache of raw AI model responses
+
+Re-running documentation for an unchanged repository re-sends the same prompts. Responses
+are stored in a SQLite file keyed by a fingerprint of the model id, prompt template
+version, prompt text and sampling parameters, and evicted least-recently-used once the
+cache exceeds its size limit or an entry exceeds its maximum age.
+"""
+
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+from app.core.config import settings
+from app.core.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Set for the duration of a job that asked for fresh responses (DocumentationRequest.force_refresh)
+force_refresh: ContextVar[bool] = ContextVar('ai_cache_force_refresh', default=False)
+
+
+def prompt_fingerprint(model_id: str, template_version: str, body_dict: Dict[str, Any]) -> str:
+    """Fingerprint of everything that determines a model response"""
+    payload = json.dumps(
+        {'model_id': model_id, 'template_version': template_version, 'body': body_dict},
+        sort_keys=True
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class AIResponseCache:
+    """SQLite-backed LRU cache of model responses with size and age limits"""
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        max_size_mb: Optional[int] = None,
+        max_age_days: Optional[int] = None,
+        enabled: Optional[bool] = None
+    ):
+        self.db_path = Path(db_path or settings.AI_CACHE_PATH)
+        self.max_size_bytes = (max_size_mb if max_size_mb is not None else settings.AI_CACHE_MAX_SIZE_MB) * 1024 * 1024
+        self.max_age_seconds = (max_age_days if max_age_days is not None else settings.AI_CACHE_MAX_AGE_DAYS) * 86400
+        self.enabled = settings.ENABLE_AI_CACHE if enabled is None else enabled
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY, model_id TEXT, response TEXT,"
+                " size INTEGER, created_at REAL, last_access REAL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses(last_access)")
+            self._conn.commit()
+        return self._conn
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached response body, or None on a miss or when bypassed"""
+        if not self.enabled or force_refresh.get():
+            return None
+
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._connect()
+                row = conn.execute("SELECT response, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+                if row and self.max_age_seconds and now - row[1] > self.max_age_seconds:
+                    conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    conn.commit()
+                    self.evictions += 1
+                    row = None
+                if row is None:
+                    self.misses += 1
+                    return None
+                conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+                conn.commit()
+                self.hits += 1
+            return json.loads(row[0])
+        except (sqlite3.Error, ValueError) as e:
+            logger.debug(f"AI response cache lookup failed: {e}")
+            return None
+
+    def put(self, key: str, model_id: str, response: Dict[str, Any]):
+        """Store a response body and evict least-recently-used entries beyond the size limit"""
+        if not self.enabled:
+            return
+
+        now = time.time()
+        try:
+            payload = json.dumps(response)
+            with self._lock:
+                conn = self._connect()
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, model_id, response, size, created_at, last_access)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, model_id, payload, len(payload), now, now)
+                )
+                self._evict(conn, now)
+                conn.commit()
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            logger.debug(f"AI response cache write failed: {e}")
+
+    def _evict(self, conn: sqlite3.Connection, now: float):
+        if self.max_age_seconds:
+            self.evictions += conn.execute(
+                "DELETE FROM responses WHERE created_at < ?", (now - self.max_age_seconds,)
+            ).rowcount
+
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_size_bytes:
+            return
+
+        # Drop least recently used entries until back under the limit
+        excess = total - self.max_size_bytes
+        evicted_keys = []
+        for key, size in conn.execute("SELECT key, size FROM responses ORDER BY last_access"):
+            if excess <= 0:
+                break
+            evicted_keys.append((key,))
+            excess -= size
+        conn.executemany("DELETE FROM responses WHERE key = ?", evicted_keys)
+        self.evictions += len(evicted_keys)
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Get hit/miss counters and current cache size"""
+        entries, size_bytes = 0, 0
+        if self.enabled:
+            try:
+                with self._lock:
+                    entries, size_bytes = self._connect().execute(
+                        "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+                    ).fetchone()
+            except sqlite3.Error as e:
+                logger.debug(f"AI response cache statistics unavailable: {e}")
+
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'enabled': self.enabled,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'entries': entries,
+                'size_bytes': size_bytes
+            }
+
+
+# Singleton instance
+ai_response_cache = AIResponseCache()
@@ -0,0 +1,113 @@
+"""
+Bounded-concurrency scheduler for AI requests
+
+Model calls are dominated by network latency, so issuing them one file at a time leaves
+the account's Bedrock concurrency almost entirely idle. The scheduler keeps up to
+AI_MAX_CONCURRENT_REQUESTS calls in flight, stops work at the job's AI deadline, and hands
+results back in submission order regardless of the order in which they complete. The
+per-request timeout (AI_REQUEST_TIMEOUT_SECONDS) is applied by AIService around each model
+call once it holds a dispatcher slot, so time spent queueing or backing off is not charged to it.
+"""
+
+import time
+import asyncio
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.logging_config import get_logger
+from app.services.ai_budget import AIBudgetExhausted, current_budget
+from app.services.circuit_breaker import CircuitOpenError
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class AITaskResult:
+    """Outcome of one scheduled AI request"""
+    index: int
+    key: str
+    result: Any = None
+    status: str = 'completed'  # completed, timeout, failed, skipped (AI budget spent), circuit_open
+    error: Optional[str] = None
+    elapsed_seconds: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.status == 'completed'
+
+
+class AIScheduler:
+    """Runs AI requests with a cap on in-flight calls, reporting timed-out calls per request"""
+
+    def __init__(self, max_in_flight: Optional[int] = None):
+        self.max_in_flight = max_in_flight or settings.AI_MAX_CONCURRENT_REQUESTS
+
+    async def run(
+        self,
+        requests: List[Tuple[str, Callable[[], Awaitable[Any]]]],
+        on_complete: Optional[Callable[[int, int, AITaskResult], Awaitable[None]]] = None
+    ) -> List[AITaskResult]:
+        """
+        Run (key, coroutine factory) pairs and return their results in submission order.
+
+        on_complete is awaited after each request finishes with (completed, total, result),
+        so progress reflects finished work rather than work handed out.
+        """
+        total = len(requests)
+        results: List[Optional[AITaskResult]] = [None] * total
+        slots = asyncio.Semaphore(self.max_in_flight)
+
+        budget = current_budget.get()
+        
+        async def run_one(index: int, key: str, factory: Callable[[], Awaitable[Any]]) -> AITaskResult:
+            async with slots:
+                start = time.monotonic()
+                # With a job budget, nothing new starts once it is spent and nothing runs past the deadline
+                reason = budget.check() if budget else None
+                if reason:
+                    results[index] = AITaskResult(index, key, status='skipped', error=reason)
+                    return results[index]
+                deadline = budget.remaining_seconds() if budget else None
+                try:
+                    value = await asyncio.wait_for(factory(), deadline)
+                    task_result = AITaskResult(index, key, value, elapsed_seconds=time.monotonic() - start)
+                except asyncio.TimeoutError:
+                    # Either the job deadline passed or a model call ran past AI_REQUEST_TIMEOUT_SECONDS
+                    reason = budget.check() if budget else None
+                    task_result = AITaskResult(index, key, status='skipped' if reason else 'timeout',
+                                               error=reason or f"model call exceeded {settings.AI_REQUEST_TIMEOUT_SECONDS}s",
+                                               elapsed_seconds=time.monotonic() - start)
+                except AIBudgetExhausted as e:
+                    task_result = AITaskResult(index, key, status='skipped', error=str(e),
+                                               elapsed_seconds=time.monotonic() - start)
+                except CircuitOpenError as e:
+                    task_result = AITaskResult(index, key, status='circuit_open', error=str(e),
+                                               elapsed_seconds=time.monotonic() - start)
+                except Exception as e:
+                    task_result = AITaskResult(index, key, status='failed', error=str(e),
+                                               elapsed_seconds=time.monotonic() - start)
+            results[index] = task_result
+            return task_result
+
+        tasks = [
+            asyncio.create_task(run_one(index, key, factory))
+            for index, (key, factory) in enumerate(requests)
+        ]
+        completed = 0
+        try:
+            for finished in asyncio.as_completed(tasks):
+                task_result = await finished
+                completed += 1
+                if task_result.status in ('skipped', 'circuit_open'):
+                    # Expected while the budget is spent or the backend is down; reported once by the caller
+                    logger.debug(f"AI request for {task_result.key} {task_result.status}: {task_result.error}")
+                elif not task_result.ok:
+                    logger.warning(f"AI request for {task_result.key} {task_result.status}: {task_result.error}")
+                if on_complete:
+                    await on_complete(completed, total, task_result)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        return results
@@ -10,15 +10,46 @@ import threading
 import hashlib
 import asyncio
 from concurrent.futures import ThreadPoolExecutor
-from typing import List, Dict, Any, Optional
+from pathlib import Path
+from typing import Awaitable, Callable, List, Dict, Any, Optional, Tuple
 import boto3
+from botocore.config import Config as BotoConfig
 from botocore.exceptions import ClientError, NoCredentialsError
 
 from app.core.config import settings
+from app.services.prompt_packing import UNATTRIBUTED, SourceFile
+from app.services.prompt_minimizer import minimize_for_prompt, summarize_entities
+from app.services.streaming_json import IncrementalJSONArrayParser
+from app.services.code_chunker import CodeChunk
+from app.services.ai_response_cache import ai_response_cache, prompt_fingerprint
+from app.services.bedrock_transport import BedrockAsyncTransport, HTTPX_AVAILABLE
+from app.services.model_router import ModelRoute, model_router
+from app.services.ai_budget import AIBudgetExhausted, check_budget, current_budget
+from app.services.circuit_breaker import CircuitBreaker, CircuitOpenError
+from app.services.ai_dispatcher import FairShareDispatcher
+from app.services.ai_usage import current_usage
+from app.services.ai_throttle import AdaptiveConcurrencyLimiter, TokenBudget, THROTTLE_ERROR_CODES, backoff_delay
 from app.models.schemas import BusinessRule, DocumentationDepth
 
 logger = logging.getLogger(__name__)
 
+# Bump when prompt templates or response parsing change, to invalidate cached responses
+PROMPT_TEMPLATE_VERSION = "1"
+
+
+class _SharedCall:
+    """A model call shared by every caller waiting on the same prompt"""
+    
+    def __init__(self, on_text: Optional[Callable[[str], Awaitable[bool]]] = None):
+        self.task: Optional[asyncio.Future] = None
+        self.waiters = 0
+        self.on_text = on_text  # The starting caller's stream callback, dropped when it stops waiting
+    
+    async def relay_text(self, fragment: str) -> bool:
+        if self.on_text is None:
+            return False
+        return await self.on_text(fragment)
+
 class AIService:
     """Thread-safe singleton service for AI-powered analysis using AWS Bedrock"""
     
@@ -40,6 +71,18 @@ class AIService:
     def __init__(self):
         if not self._initialized:
             self.client = None
+            # Dedicated threads for blocking boto3 calls, sized to the allowed concurrency
+            self._executor = ThreadPoolExecutor(
+                max_workers=settings.AI_MAX_CONCURRENT_REQUESTS,
+                thread_name_prefix="bedrock"
+            )
+            self._limiter = AdaptiveConcurrencyLimiter()
+            self.circuit_breaker = CircuitBreaker()
+            self._token_budget = TokenBudget()
+            self.dispatcher = FairShareDispatcher(self._limiter, self._token_budget)
+            self._transport: Optional[BedrockAsyncTransport] = None
+            self._in_flight: Dict[str, _SharedCall] = {}  # Prompt fingerprint -> shared call
+            self.coalesced_requests = 0
             self._initialize_client()
             self._initialized = True
     
@@ -69,13 +112,206 @@ class AIService:
         if not self.client:
             raise RuntimeError("AWS Bedrock client not initialized")
     
-    def _invoke_model_sync(self, model_id: str, body_dict: Dict) -> Any:
-        """Synchronous model invocation for use in thread pool"""
+    def _invoke_model_sync(self, model_id: str, body_dict: Dict) -> Dict:
+        """Synchronous model invocation for use in thread pool; returns the decoded response body"""
         self._ensure_client_ready()
-        return self.client.invoke_model(
+        response = self.client.invoke_model(
             modelId=model_id,
             body=json.dumps(body_dict)
         )
+        return json.loads(response['body'].read())
+    
+    async def _call_model(
+        self,
+        model_id: str,
+        body_dict: Dict,
+        on_text: Optional[Callable[[str], Awaitable[bool]]] = None
+    ) -> Dict:
+        """One model call over the async transport, or boto3 on the thread pool without it"""
+        if on_text and self._transport and settings.AI_STREAMING and self._is_claude_3_plus_model(model_id):
+            return await self._transport.invoke_model_stream(model_id, body_dict, on_text)
+        
+        if self._transport:
+            result = await self._transport.invoke_model(model_id, body_dict)
+        else:
+            # Run the blocking boto3 call in a thread pool
+            loop = asyncio.get_event_loop()
+            result = await loop.run_in_executor(self._executor, self._invoke_model_sync, model_id, body_dict)
+        
+        if on_text:
+            await on_text(self._parse_model_response(result, model_id))
+        return result
+    
+    def _estimate_tokens(self, body_dict: Dict) -> int:
+        """Rough token cost of a request: ~4 characters per prompt token plus the output allowance"""
+        max_output = body_dict.get('max_tokens', body_dict.get('max_tokens_to_sample', 0))
+        return len(json.dumps(body_dict)) // 4 + max_output
+    
+    async def _invoke_model_async(
+        self,
+        model_id: str,
+        body_dict: Dict,
+        on_text: Optional[Callable[[str], Awaitable[bool]]] = None
+    ) -> Dict:
+        """
+        Invoke a model, serving the response from the persistent cache when possible.
+        Concurrent callers with the same prompt fingerprint share one underlying call.
+        
+        With on_text the response is streamed: on_text is awaited with each text fragment
+        (or once with the whole text for cached/non-streaming responses) and may return
+        True to stop generation early.
+        """
+        cache_key = prompt_fingerprint(model_id, PROMPT_TEMPLATE_VERSION, body_dict)
+        cached = ai_response_cache.get(cache_key)
+        job_usage = current_usage.get()
+        if cached is not None:
+            if job_usage:
+                job_usage.record_cache_hit(model_id)
+            if on_text:
+                await on_text(self._parse_model_response(cached, model_id))
+            return cached
+        if job_usage:
+            job_usage.record_cache_miss(model_id)
+        
+        reason = check_budget()
+        if reason:
+            raise AIBudgetExhausted(reason)
+        
+        # Singleflight: the call runs as its own task shared by every caller with the same
+        # prompt; it is cancelled only once all of them have timed out or been cancelled
+        shared = self._in_flight.get(cache_key)
+        if shared is not None:
+            self.coalesced_requests += 1
+            logger.debug(f"Coalescing duplicate in-flight AI request {cache_key[:12]}")
+            result = await self._await_shared(shared)
+            # A leader that stopped streaming early has only part of the answer
+            if not result.get('stopped_early'):
+                if on_text:
+                    await on_text(self._parse_model_response(result, model_id))
+                return result
+
+        shared = _SharedCall(on_text)
+        shared.task = asyncio.ensure_future(self._invoke_model_uncached(
+            model_id, body_dict, cache_key, shared.relay_text if on_text else None
+        ))
+        if cache_key not in self._in_flight:
+            self._in_flight[cache_key] = shared
+            shared.task.add_done_callback(lambda done: self._finish_in_flight(cache_key, shared))
+
+        return await self._await_shared(shared, starter=True)
+    
+    async def _await_shared(self, shared: _SharedCall, starter: bool = False) -> Dict:
+        """Wait for a shared call; the last caller to give up cancels it"""
+        shared.waiters += 1
+        try:
+            return await asyncio.shield(shared.task)
+        except asyncio.CancelledError:
+            if starter:
+                shared.on_text = None  # Nobody is listening to the stream any more
+            raise
+        finally:
+            shared.waiters -= 1
+            if shared.waiters == 0 and not shared.task.done():
+                shared.task.cancel()
+    
+    def _finish_in_flight(self, cache_key: str, shared: _SharedCall):
+        if self._in_flight.get(cache_key) is shared:
+            del self._in_flight[cache_key]
+        if not shared.task.cancelled():
+            shared.task.exception()  # Mark retrieved even if every caller gave up waiting
+    
+    async def _invoke_model_uncached(
+        self,
+        model_id: str,
+        body_dict: Dict,
+        cache_key: str,
+        on_text: Optional[Callable[[str], Awaitable[bool]]] = None
+    ) -> Dict:
+        """
+        Invoke a model under the adaptive concurrency limit and tokens-per-minute budget,
+        shared between concurrent jobs by the fair-share dispatcher, retrying throttled
+        calls with jittered exponential backoff. Fails fast with CircuitOpenError while
+        the backend circuit is open.
+        """
+        estimated_tokens = self._estimate_tokens(body_dict)
+        streamed = False
+        callback_error: Optional[Exception] = None
+        throttles = 0
+        job_usage = current_usage.get()
+        
+        async def forward_text(fragment: str) -> bool:
+            # A failing callback says nothing about the backend: stop the stream, re-raise after accounting
+            nonlocal streamed, callback_error
+            streamed = True
+            try:
+                return await on_text(fragment)
+            except Exception as e:
+                callback_error = e
+                return True
+        for attempt in range(settings.AI_MAX_RETRIES + 1):
+            # Slot and tokens are granted in fair-share order across concurrent jobs
+            await self.dispatcher.acquire(estimated_tokens)
+            # Checked once a slot is free, so calls queued behind a failing backend fail fast too
+            try:
+                self.circuit_breaker.before_call()
+            except CircuitOpenError:
+                await self.dispatcher.release()
+                self._token_budget.adjust(-estimated_tokens)
+                raise
+            start = time.monotonic()
+            try:
+                # Timed from here, so queueing for a slot and throttle backoff do not count against it
+                result = await asyncio.wait_for(
+                    self._call_model(model_id, body_dict, forward_text if on_text else None),
+                    settings.AI_REQUEST_TIMEOUT_SECONDS
+                )
+            except ClientError as e:
+                # Text already handed to the caller cannot be taken back, so a stream cut off mid-way is not retried
+                if e.response.get('Error', {}).get('Code') not in THROTTLE_ERROR_CODES or streamed:
+                    await self.dispatcher.release()
+                    self.circuit_breaker.record_failure(e)
+                    if job_usage:
+                        job_usage.record_failure(model_id, throttles)
+                    raise
+                await self.dispatcher.release(throttled=True)
+                self._token_budget.adjust(-estimated_tokens)  # Nothing was processed
+                throttles += 1
+                if attempt == settings.AI_MAX_RETRIES:
+                    self.circuit_breaker.record_failure(e)
+                    if job_usage:
+                        job_usage.record_failure(model_id, throttles)
+                    raise
+                self.circuit_breaker.release_probe()
+                delay = backoff_delay(attempt)
+                logger.warning(f"Bedrock throttled ({e.response['Error']['Code']}), retry {attempt + 1} in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                continue
+            except BaseException as e:
+                await self.dispatcher.release()
+                self.circuit_breaker.record_failure(e)
+                if job_usage and isinstance(e, Exception):
+                    job_usage.record_failure(model_id, throttles)
+                raise
+            
+            latency = time.monotonic() - start
+            await self.dispatcher.release(latency=latency)
+            self.circuit_breaker.record_success()
+            usage = result.get('usage') or {}
+            model_router.record(model_id, latency, usage.get('input_tokens', 0), usage.get('output_tokens', 0))
+            if job_usage:
+                job_usage.record_call(model_id, latency, usage.get('input_tokens', 0), usage.get('output_tokens', 0), throttles)
+            budget = current_budget.get()
+            if budget:
+                budget.record_tokens(usage.get('input_tokens', 0) + usage.get('output_tokens', 0) or estimated_tokens)
+            if usage:
+                self._token_budget.adjust(
+                    usage.get('input_tokens', 0) + usage.get('output_tokens', 0) - estimated_tokens
+                )
+            if callback_error is not None:
+                raise callback_error
+            if not result.get('stopped_early') and self._parse_model_response(result, model_id):
+                ai_response_cache.put(cache_key, model_id, result)
+            return result
     
     def _is_claude_3_plus_model(self, model_id: str) -> bool:
         """Check if the model is Claude 3+ and requires Messages API format"""
@@ -146,7 +382,15 @@ class AIService:
             if settings.AWS_SESSION_TOKEN:
                 session_kwargs['aws_session_token'] = settings.AWS_SESSION_TOKEN
         
-        return boto3.Session(**session_kwargs)
+        session = boto3.Session(**session_kwargs)
+        if settings.BEDROCK_ENDPOINT_URL and session.get_credentials() is None:
+            # A local stand-in ignores signatures, but requests are still signed, so any key will do
+            session = boto3.Session(
+                region_name=settings.AWS_REGION,
+                aws_access_key_id='standin',
+                aws_secret_access_key='standin'
+            )
+        return session
     
     def _initialize_client(self):
         """Initialize AWS Bedrock client with multiple auth methods"""
@@ -167,7 +411,25 @@ class AIService:
                 logger.debug("Using default AWS credential chain")
             
             # Create bedrock-runtime client
-            self.client = session.client('bedrock-runtime')
+            # The HTTP pool must be at least as large as the number of concurrent requests
+            self.client = session.client(
+                'bedrock-runtime',
+                endpoint_url=settings.BEDROCK_ENDPOINT_URL or None,
+                config=BotoConfig(
+                    max_pool_connections=max(10, settings.AI_MAX_CONCURRENT_REQUESTS),
+                    # Throttles are retried by _invoke_model_async so the backoff also adapts concurrency
+                    retries={'max_attempts': 1, 'mode': 'standard'}
+                )
+            )
+            
+            # Async transport shares the session's credentials; boto3 stays as the fallback
+            if settings.AI_ASYNC_TRANSPORT and HTTPX_AVAILABLE:
+                if self._transport is None:
+                    self._transport = BedrockAsyncTransport(session.get_credentials())
+                else:
+                    self._transport.set_credentials(session.get_credentials())
+            elif settings.AI_ASYNC_TRANSPORT:
+                logger.warning("httpx not installed - Bedrock calls will use boto3 worker threads")
             
             # Test the connection
             self._test_connection()
@@ -190,6 +452,10 @@ class AIService:
     
     def _test_connection(self):
         """Test AWS Bedrock connection"""
+        if settings.BEDROCK_ENDPOINT_URL:
+            # The control-plane API is not served by a custom runtime endpoint
+            logger.info(f"Using Bedrock runtime endpoint {settings.BEDROCK_ENDPOINT_URL}; skipping connection test")
+            return []
         try:
             # Create a separate bedrock client for listing models (not bedrock-runtime)
             session = self._create_session()
@@ -304,36 +570,174 @@ class AIService:
         self,
         code: str,
         entities: List[Dict],
-        keywords: Optional[List[str]] = None
+        keywords: Optional[List[str]] = None,
+        on_rule: Optional[Callable[[BusinessRule], Awaitable[None]]] = None,
+        max_rules: Optional[int] = None
     ) -> List[BusinessRule]:
-        """Extract business rules from code using AI"""
+        """
+        Extract business rules from code using AI. With on_rule or max_rules the response
+        is streamed and each rule is emitted as soon as it is complete.
+        """
         
         self._ensure_client_ready()
         
         prompt = self._create_business_rule_prompt(code, entities, keywords)
+        route = model_router.route(code, entities)
         
         try:
-            # Format request body based on model type
-            body = self._format_request_body(
-                prompt, 
-                settings.BEDROCK_MODEL_ID,
-                max_tokens_to_sample=2000,
-                temperature=0.2,
-                top_p=0.9
-            )
+            return await self._request_business_rules(prompt, route, 2000, on_rule, max_rules)
             
-            # Run the blocking boto3 call in a thread pool
-            loop = asyncio.get_event_loop()
-            response = await loop.run_in_executor(
-                None,
-                self._invoke_model_sync,
-                settings.BEDROCK_MODEL_ID,
-                body
-            )
+        except (AIBudgetExhausted, CircuitOpenError):
+            raise
+        except ClientError as e:
+            logger.error(f"AWS Bedrock error: {e}")
+            raise RuntimeError(f"Failed to extract business rules: {e}")
+        except Exception as e:
+            logger.error(f"Error extracting business rules: {e}")
+            raise RuntimeError(f"AI service error: {e}")
+    
+    async def extract_business_rules_from_chunk(
+        self,
+        chunk: CodeChunk,
+        file_path: str,
+        total_lines: int,
+        keywords: Optional[List[str]] = None,
+        on_rule: Optional[Callable[[BusinessRule], Awaitable[None]]] = None,
+        max_rules: Optional[int] = None
+    ) -> List[BusinessRule]:
+        """Extract business rules from one chunk of a large file"""
+        
+        self._ensure_client_ready()
+        
+        prompt = self._create_chunk_business_rule_prompt(chunk, file_path, total_lines, keywords)
+        route = model_router.route(chunk.body, chunk.entities)
+        
+        try:
+            return await self._request_business_rules(prompt, route, 2000, on_rule, max_rules)
             
-            result = json.loads(response['body'].read())
-            return self._parse_business_rules(result)
+        except (AIBudgetExhausted, CircuitOpenError):
+            raise
+        except ClientError as e:
+            logger.error(f"AWS Bedrock error: {e}")
+            raise RuntimeError(f"Failed to extract business rules: {e}")
+        except Exception as e:
+            logger.error(f"Error extracting business rules: {e}")
+            raise RuntimeError(f"AI service error: {e}")
+    
+    async def extract_business_rules_from_prompt(
+        self,
+        prompt: str,
+        code: str,
+        entities: List[Dict],
+        max_tokens: int = 4000
+    ) -> List[BusinessRule]:
+        """
+        Extract business rules with a complete, caller-built prompt that already asks for
+        the JSON rule array; code and entities only drive model routing
+        """
+        
+        self._ensure_client_ready()
+        
+        route = model_router.route(code, entities)
+        
+        try:
+            return await self._request_business_rules(prompt, route, max_tokens)
+            
+        except (AIBudgetExhausted, CircuitOpenError):
+            raise
+        except ClientError as e:
+            logger.error(f"AWS Bedrock error: {e}")
+            raise RuntimeError(f"Failed to extract business rules: {e}")
+        except Exception as e:
+            logger.error(f"Error extracting business rules: {e}")
+            raise RuntimeError(f"AI service error: {e}")
+    
+    async def _invoke_routed(
+        self,
+        prompt: str,
+        route: ModelRoute,
+        max_tokens: int,
+        on_text: Optional[Callable[[str], Awaitable[bool]]] = None
+    ) -> Tuple[Dict, str]:
+        """
+        Invoke the routed model for a rule-extraction prompt, falling back to the default
+        model when the fast one is not available to this account. Returns (result, model_id).
+        """
+        job_usage = current_usage.get()
+        if job_usage:
+            job_usage.record_route(route.tier)
+        model_id = route.model_id
+        body = self._format_request_body(prompt, model_id, max_tokens_to_sample=max_tokens, temperature=0.2, top_p=0.9)
+        try:
+            return await self._invoke_model_async(model_id, body, on_text=on_text), model_id
+        except ClientError as e:
+            error_code = e.response.get('Error', {}).get('Code', '')
+            error_message = e.response.get('Error', {}).get('Message', '')
+            if model_id == settings.BEDROCK_MODEL_ID or not model_router.is_unavailable_error(error_code, error_message):
+                raise
+            model_router.disable_fast_model(f"{error_code}: {e}")
+        
+        model_id = settings.BEDROCK_MODEL_ID
+        body = self._format_request_body(prompt, model_id, max_tokens_to_sample=max_tokens, temperature=0.2, top_p=0.9)
+        return await self._invoke_model_async(model_id, body, on_text=on_text), model_id
+    
+    async def _request_business_rules(
+        self,
+        prompt: str,
+        route: ModelRoute,
+        max_tokens: int,
+        on_rule: Optional[Callable[[BusinessRule], Awaitable[None]]] = None,
+        max_rules: Optional[int] = None
+    ) -> List[BusinessRule]:
+        """Run a rule extraction request, streaming rules out as they complete when asked to"""
+        if not on_rule and not max_rules:
+            result, model_id = await self._invoke_routed(prompt, route, max_tokens)
+            return self._parse_business_rules(result, model_id)
+        
+        parser = IncrementalJSONArrayParser()
+        streamed_rules: List[BusinessRule] = []
+        
+        async def on_text(fragment: str) -> bool:
+            for rule_data in parser.feed(fragment):
+                rule = self._rule_from_data(rule_data, len(streamed_rules))
+                if rule is None:
+                    continue
+                streamed_rules.append(rule)
+                if on_rule:
+                    await on_rule(rule)
+                if max_rules and len(streamed_rules) >= max_rules:
+                    return True  # Enough rules; stop generating
+            return False
+        
+        result, model_id = await self._invoke_routed(prompt, route, max_tokens, on_text=on_text)
+        if streamed_rules:
+            return streamed_rules[:max_rules] if max_rules else streamed_rules
+        
+        # The array did not parse incrementally (unusual formatting); fall back to the full scan
+        rules = self._parse_business_rules(result, model_id)
+        if on_rule:
+            for rule in rules:
+                await on_rule(rule)
+        return rules[:max_rules] if max_rules else rules
+    
+    async def extract_business_rules_batch(
+        self,
+        files: List[SourceFile],
+        keywords: Optional[List[str]] = None
+    ) -> Dict[str, List[BusinessRule]]:
+        """Extract business rules from several small files in one call, attributed per file"""
+        
+        self._ensure_client_ready()
+        
+        prompt = self._create_multi_file_business_rule_prompt(files, keywords)
+        route = model_router.route_files([(source_file.content, source_file.entities) for source_file in files])
+        
+        try:
+            result, model_id = await self._invoke_routed(prompt, route, 4000)
+            return self._attribute_rules_to_files(self._parse_business_rules(result, model_id), files)
             
+        except (AIBudgetExhausted, CircuitOpenError):
+            raise
         except ClientError as e:
             logger.error(f"AWS Bedrock error: {e}")
             raise RuntimeError(f"Failed to extract business rules: {e}")
@@ -341,17 +745,45 @@ class AIService:
             logger.error(f"Error extracting business rules: {e}")
             raise RuntimeError(f"AI service error: {e}")
     
+    def _attribute_rules_to_files(
+        self,
+        rules: List[BusinessRule],
+        files: List[SourceFile]
+    ) -> Dict[str, List[BusinessRule]]:
+        """
+        Map each rule back to its file using the path prefix of its code_reference. Rules
+        that name none of the files are returned under UNATTRIBUTED rather than credited
+        to the wrong one.
+        """
+        rules_by_file: Dict[str, List[BusinessRule]] = {source_file.file_path: [] for source_file in files}
+        # Longest paths first so a/b/Foo.java is not claimed by b/Foo.java
+        paths = sorted(rules_by_file, key=len, reverse=True)
+        
+        for rule in rules:
+            reference = rule.code_reference or ''
+            owner = next((path for path in paths if reference.startswith(path)), None)
+            if owner is None:
+                # Models sometimes shorten the path; fall back to the file name
+                owner = next((path for path in paths if Path(path).name in reference), None)
+            if owner is None:
+                logger.debug(f"Could not attribute rule {rule.id} ('{reference}') to a file in the batch")
+                owner = UNATTRIBUTED
+            rules_by_file.setdefault(owner, []).append(rule)
+        
+        return rules_by_file
+    
     async def generate_overview(
         self,
         entities: List[Dict],
         business_rules: List[BusinessRule],
-        depth: DocumentationDepth
+        depth: DocumentationDepth,
+        system_summary: Optional[str] = None
     ) -> str:
         """Generate documentation overview using AI"""
         
         self._ensure_client_ready()
         
-        prompt = self._create_overview_prompt(entities, business_rules, depth)
+        prompt = self._create_overview_prompt(entities, business_rules, depth, system_summary)
         
         try:
             # Format request body based on model type
@@ -362,21 +794,14 @@ class AIService:
                 temperature=0.3
             )
             
-            # Run the blocking boto3 call in a thread pool
-            loop = asyncio.get_event_loop()
-            response = await loop.run_in_executor(
-                None,
-                self._invoke_model_sync,
-                settings.BEDROCK_MODEL_ID,
-                body
-            )
-            
-            result = json.loads(response['body'].read())
+            result = await self._invoke_model_async(settings.BEDROCK_MODEL_ID, body)
             completion = self._parse_model_response(result, settings.BEDROCK_MODEL_ID)
             if not completion:
                 raise RuntimeError("No completion received from AI model")
             return completion
             
+        except (AIBudgetExhausted, CircuitOpenError):
+            raise
         except Exception as e:
             logger.error(f"Error generating overview: {e}")
             raise RuntimeError(f"Failed to generate overview: {e}")
@@ -384,13 +809,14 @@ class AIService:
     async def generate_architecture_doc(
         self,
         entities: List[Dict],
-        depth: DocumentationDepth
+        depth: DocumentationDepth,
+        system_summary: Optional[str] = None
     ) -> str:
         """Generate architecture documentation using AI"""
         
         self._ensure_client_ready()
         
-        prompt = self._create_architecture_prompt(entities, depth)
+        prompt = self._create_architecture_prompt(entities, depth, system_summary)
         
         try:
             # Format request body based on model type
@@ -401,21 +827,14 @@ class AIService:
                 temperature=0.3
             )
             
-            # Run the blocking boto3 call in a thread pool
-            loop = asyncio.get_event_loop()
-            response = await loop.run_in_executor(
-                None,
-                self._invoke_model_sync,
-                settings.BEDROCK_MODEL_ID,
-                body
-            )
-            
-            result = json.loads(response['body'].read())
+            result = await self._invoke_model_async(settings.BEDROCK_MODEL_ID, body)
             completion = self._parse_model_response(result, settings.BEDROCK_MODEL_ID)
             if not completion:
                 raise RuntimeError("No completion received from AI model")
             return completion
             
+        except (AIBudgetExhausted, CircuitOpenError):
+            raise
         except Exception as e:
             logger.error(f"Error generating architecture doc: {e}")
             raise RuntimeError(f"Failed to generate architecture documentation: {e}")
@@ -439,21 +858,14 @@ class AIService:
                 temperature=temperature
             )
             
-            # Run the blocking boto3 call in a thread pool
-            loop = asyncio.get_event_loop()
-            response = await loop.run_in_executor(
-                None,
-                self._invoke_model_sync,
-                settings.BEDROCK_MODEL_ID,
-                body
-            )
-            
-            result = json.loads(response['body'].read())
+            result = await self._invoke_model_async(settings.BEDROCK_MODEL_ID, body)
             completion = self._parse_model_response(result, settings.BEDROCK_MODEL_ID)
             if not completion:
                 raise RuntimeError("No completion received from AI model")
             return completion
             
+        except (AIBudgetExhausted, CircuitOpenError):
+            raise
         except Exception as e:
             logger.error(f"Error generating content: {e}")
             raise RuntimeError(f"Failed to generate content: {e}")
@@ -466,18 +878,87 @@ class AIService:
     ) -> str:
         """Create enhanced prompt for business rule extraction using expert prompt engineering"""
         
-        entities_summary = "\n".join([
-            f"- {e.get('type')}: {e.get('name')} (File: {e.get('file_path', 'unknown')})"
-            for e in entities[:25]  # Increased from 20 to provide more context
-        ])
+        entities_summary = summarize_entities(entities, limit=25)
         
         keywords_text = ""
         if keywords:
             keywords_text = f"\n## 🎯 FOCUS KEYWORDS\nPay special attention to business logic involving: {', '.join(keywords)}"
         
-        # Use more code context - increase from 2000 to 4000 chars
-        code_sample = code[:4000] if len(code) > 4000 else code
-        code_length_note = f" (showing first 4,000 of {len(code)} characters)" if len(code) > 4000 else " (complete code)"
+        # Callers keep the code within one prompt's budget (larger files go through chunking)
+        code = minimize_for_prompt(code, entities[0].get('file_path', '') if entities else '')
+        
+        code_section = f"""## 💻 CODE TO ANALYZE (complete code)
+```
+{code}
+```"""
+        
+        return self._business_rule_prompt(entities_summary, keywords_text, code_section)
+    
+    def _create_chunk_business_rule_prompt(
+        self,
+        chunk: CodeChunk,
+        file_path: str,
+        total_lines: int,
+        keywords: Optional[List[str]]
+    ) -> str:
+        """Create a business rule extraction prompt for one chunk of a large file"""
+        
+        entities_summary = summarize_entities(chunk.entities, limit=25)
+        
+        keywords_text = ""
+        if keywords:
+            keywords_text = f"\n## 🎯 FOCUS KEYWORDS\nPay special attention to business logic involving: {', '.join(keywords)}"
+        
+        code_section = f"""## 💻 CODE TO ANALYZE (part {chunk.index + 1} of a large file: {file_path}, lines {chunk.start_line}-{chunk.end_line} of {total_lines})
+File header (imports, declarations and fields) for context:
+```
+{minimize_for_prompt(chunk.header, file_path)}
+```
+
+Code section - extract rules from this part only:
+```
+{minimize_for_prompt(chunk.body, file_path)}
+```"""
+        
+        return self._business_rule_prompt(entities_summary, keywords_text, code_section)
+    
+    def _create_multi_file_business_rule_prompt(
+        self,
+        files: List[SourceFile],
+        keywords: Optional[List[str]]
+    ) -> str:
+        """Create a business rule extraction prompt covering several small files"""
+        
+        entities_summary = summarize_entities(
+            [e for source_file in files for e in source_file.entities[:10]], limit=50
+        )
+        
+        keywords_text = ""
+        if keywords:
+            keywords_text = f"\n## 🎯 FOCUS KEYWORDS\nPay special attention to business logic involving: {', '.join(keywords)}"
+        
+        file_sections = "\n\n".join(
+            f"### FILE: {source_file.file_path}\n```\n{minimize_for_prompt(source_file.content, source_file.file_path)}\n```"
+            for source_file in files
+        )
+        code_section = f"""## 💻 CODE TO ANALYZE ({len(files)} files, complete code)
+{file_sections}"""
+        
+        reference_note = (
+            "\nEvery `code_reference` MUST start with the exact file path from the `### FILE:` header "
+            "the rule was found in, followed by a colon (e.g. `path/to/File.java:validatePayment(), Line 45`)."
+        )
+        
+        return self._business_rule_prompt(entities_summary, keywords_text, code_section, reference_note)
+    
+    def _business_rule_prompt(
+        self,
+        entities_summary: str,
+        keywords_text: str,
+        code_section: str,
+        reference_note: str = ""
+    ) -> str:
+        """Shared business rule extraction instructions around a code section"""
         
         return f"""# 🔍 EXPERT BUSINESS RULES ANALYST
 
@@ -495,10 +976,7 @@ A **business rule** is any logic that represents:
 {entities_summary}
 {keywords_text}
 
-## 💻 CODE TO ANALYZE{code_length_note}
-```
-{code_sample}
-```
+{code_section}
 
 ## 🎯 EXTRACTION METHODOLOGY
 
@@ -528,7 +1006,7 @@ Look for these indicators:
 - **0.1-0.2**: Weak indication, might be technical implementation
 
 ### Step 4: Provide Precise References
-Include line numbers, method names, or specific code snippets that contain the rule.
+Include line numbers, method names, or specific code snippets that contain the rule.{reference_note}
 
 ## 📝 REQUIRED OUTPUT FORMAT
 
@@ -569,9 +1047,13 @@ Now analyze the provided code and extract business rules following this methodol
         self,
         entities: List[Dict],
         business_rules: List[BusinessRule],
-        depth: DocumentationDepth
+        depth: DocumentationDepth,
+        system_summary: Optional[str] = None
     ) -> str:
-        """Create enhanced prompt for overview generation using expert prompt engineering"""
+        """
+        Create enhanced prompt for overview generation using expert prompt engineering.
+        A hierarchical system summary, when given, replaces the short component list.
+        """
         
         # Enhanced depth instructions with specific guidance
         depth_specs = {
@@ -626,8 +1108,7 @@ You are a senior technical writer and software architect specializing in creatin
 ### Business Logic Analysis  
 {business_rule_insights}
 
-### Key Components (Top 15)
-{self._summarize_entities(entities[:15])}
+{self._components_section(entities, 15, system_summary)}
 
 ## 📋 REQUIRED STRUCTURE
 
@@ -706,7 +1187,8 @@ Now generate a comprehensive system overview following these specifications.
     def _create_architecture_prompt(
         self,
         entities: List[Dict],
-        depth: DocumentationDepth
+        depth: DocumentationDepth,
+        system_summary: Optional[str] = None
     ) -> str:
         """Create enhanced prompt for architecture documentation using expert prompt engineering"""
         
@@ -764,8 +1246,7 @@ You are a principal software architect with deep expertise in system design, arc
 ### Component Analysis
 {entity_analysis}
 
-### Key Components (Top 20)
-{self._summarize_entities(entities[:20])}
+{self._components_section(entities, 20, system_summary)}
 
 ## 🏛️ REQUIRED ARCHITECTURE SECTIONS
 
@@ -864,6 +1345,12 @@ Structure your response using this hierarchy:
 Now generate comprehensive architecture documentation following these expert specifications and analyzing the provided component data.
 """
     
+    def _components_section(self, entities: List[Dict], top: int, system_summary: Optional[str]) -> str:
+        """Prompt section describing the codebase's components"""
+        if system_summary:
+            return f"### System Structure (summarized per module and subsystem)\n{system_summary}"
+        return f"### Key Components (Top {top})\n{self._summarize_entities(entities[:top])}"
+    
     def _summarize_entities(self, entities: List[Dict]) -> str:
         """Summarize entities for prompt"""
         summary = []
@@ -1201,12 +1688,12 @@ Now generate comprehensive architecture documentation following these expert spe
         
         return sections.get(depth, "")
     
-    def _parse_business_rules(self, ai_response: Dict) -> List[BusinessRule]:
+    def _parse_business_rules(self, ai_response: Dict, model_id: Optional[str] = None) -> List[BusinessRule]:
         """Parse AI response into BusinessRule objects with robust JSON extraction"""
         rules = []
         
         try:
-            completion = self._parse_model_response(ai_response, settings.BEDROCK_MODEL_ID)
+            completion = self._parse_model_response(ai_response, model_id or settings.BEDROCK_MODEL_ID)
             if not completion:
                 logger.warning("No completion text in AI response")
                 return rules
@@ -1219,27 +1706,32 @@ Now generate comprehensive architecture documentation following these expert spe
                 return rules
             
             # Parse each rule
-            for i, rule_data in enumerate(rules_data):
-                try:
-                    rule = BusinessRule(
-                        id=rule_data.get('id', f"RULE-{len(rules)+1:03d}"),
-                        description=rule_data.get('description', ''),
-                        confidence_score=float(rule_data.get('confidence_score', 0.7)),
-                        category=rule_data.get('category', 'General'),
-                        code_reference=rule_data.get('code_reference', ''),
-                        validation_logic=rule_data.get('validation_logic'),
-                        related_entities=rule_data.get('related_entities', [])
-                    )
+            for rule_data in rules_data:
+                rule = self._rule_from_data(rule_data, len(rules))
+                if rule:
                     rules.append(rule)
-                except Exception as rule_error:
-                    logger.warning(f"Failed to parse rule {i}: {rule_error}")
-                    continue
                     
         except Exception as e:
             logger.warning(f"Failed to parse business rules: {e}")
         
         return rules
     
+    def _rule_from_data(self, rule_data: Dict, index: int) -> Optional[BusinessRule]:
+        """Build a BusinessRule from one element of the model's JSON array"""
+        try:
+            return BusinessRule(
+                id=rule_data.get('id', f"RULE-{index+1:03d}"),
+                description=rule_data.get('description', ''),
+                confidence_score=float(rule_data.get('confidence_score', 0.7)),
+                category=rule_data.get('category', 'General'),
+                code_reference=rule_data.get('code_reference', ''),
+                validation_logic=rule_data.get('validation_logic'),
+                related_entities=rule_data.get('related_entities', [])
+            )
+        except Exception as rule_error:
+            logger.warning(f"Failed to parse rule {index}: {rule_error}")
+            return None
+    
     def _extract_json_array(self, text: str) -> List[Dict]:
         """Extract JSON array from text using multiple strategies"""
         import re
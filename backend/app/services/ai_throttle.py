@@ -0,0 +1,122 @@
+"""
+Throttling-aware rate control for Bedrock calls
+
+AdaptiveConcurrencyLimiter adjusts the number of model calls allowed in flight with
+additive-increase/multiplicative-decrease: every successful call at normal latency
+grows the limit by roughly one per window, a throttle halves it. TokenBudget spreads
+token usage over the minute so a configured tokens-per-minute quota is never exceeded.
+Retries of throttled calls use exponential backoff with full jitter.
+"""
+
+import time
+import random
+from typing import Optional
+
+from app.core.config import settings
+from app.core.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Bedrock error codes that mean "slow down", as opposed to a bad request
+THROTTLE_ERROR_CODES = {
+    'ThrottlingException',
+    'TooManyRequestsException',
+    'ServiceQuotaExceededException',
+    'ServiceUnavailableException',
+    'ModelNotReadyException',
+}
+
+
+def backoff_delay(attempt: int, base_seconds: Optional[float] = None, max_seconds: Optional[float] = None) -> float:
+    """Exponential backoff with full jitter for the given (zero-based) retry attempt"""
+    base_seconds = base_seconds if base_seconds is not None else settings.AI_RETRY_BASE_SECONDS
+    max_seconds = max_seconds if max_seconds is not None else settings.AI_RETRY_MAX_SECONDS
+    return random.uniform(0, min(max_seconds, base_seconds * (2 ** attempt)))
+
+
+class AdaptiveConcurrencyLimiter:
+    """AIMD limit on concurrent calls, driven by throttles and latency"""
+
+    def __init__(
+        self,
+        max_limit: Optional[int] = None,
+        min_limit: int = 1,
+        initial_limit: Optional[int] = None,
+        latency_tolerance: float = 2.0
+    ):
+        self.max_limit = max_limit or settings.AI_MAX_CONCURRENT_REQUESTS
+        self.min_limit = min(min_limit, self.max_limit)
+        self.limit = float(initial_limit or max(self.min_limit, self.max_limit // 2))
+        # A call slower than latency_tolerance x the best observed latency counts as congestion
+        self.latency_tolerance = latency_tolerance
+        self.min_latency: Optional[float] = None
+        self.in_flight = 0
+        self.throttles = 0
+        self._last_decrease = 0.0
+
+    def try_acquire(self) -> bool:
+        """Take a slot if one is free; waiting for one is up to FairShareDispatcher"""
+        if self.in_flight < int(self.limit):
+            self.in_flight += 1
+            return True
+        return False
+
+    def release(self, latency: Optional[float] = None, throttled: bool = False):
+        """Return a slot and feed the outcome of the call back into the limit"""
+        self.in_flight -= 1
+        if throttled:
+            self._decrease()
+        elif latency is not None:
+            self._on_success(latency)
+
+    def _on_success(self, latency: float):
+        if self.min_latency is None or latency < self.min_latency:
+            self.min_latency = latency
+        if latency > self.min_latency * self.latency_tolerance:
+            return  # Queueing on the service side: hold the limit rather than push harder
+        # Additive increase: about +1 after a full window of successful calls
+        self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+
+    def _decrease(self):
+        self.throttles += 1
+        now = time.monotonic()
+        # Throttles from calls already in flight describe the same overload; decrease once per burst
+        if now - self._last_decrease < (self.min_latency or 1.0):
+            return
+        self._last_decrease = now
+        self.limit = max(float(self.min_limit), self.limit / 2)
+        logger.info(f"Bedrock throttled; concurrency limit reduced to {int(self.limit)}")
+
+
+class TokenBudget:
+    """Tokens-per-minute budget; a limit of 0 disables it"""
+
+    def __init__(self, tokens_per_minute: Optional[int] = None):
+        self.tokens_per_minute = settings.AI_TOKENS_PER_MINUTE if tokens_per_minute is None else tokens_per_minute
+        self.available = float(self.tokens_per_minute)
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.available = min(float(self.tokens_per_minute),
+                             self.available + (now - self._updated) * self.tokens_per_minute / 60.0)
+        self._updated = now
+
+    def try_consume(self, tokens: int) -> float:
+        """Spend tokens if the budget covers them now and return 0, else the seconds until it will"""
+        if self.tokens_per_minute <= 0:
+            return 0.0
+        # A single request larger than the whole budget still gets through once the bucket is full
+        tokens = min(tokens, self.tokens_per_minute)
+        self._refill()
+        if self.available >= tokens:
+            self.available -= tokens
+            return 0.0
+        return (tokens - self.available) * 60.0 / self.tokens_per_minute
+
+    def adjust(self, tokens: int):
+        """Correct the budget once actual usage is known (positive = used more than estimated)"""
+        if self.tokens_per_minute <= 0:
+            return
+        self._refill()
+        self.available = min(float(self.tokens_per_minute), self.available - tokens)
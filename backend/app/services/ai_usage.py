@@ -0,0 +1,219 @@
+"""
+Per-job accounting of AI token use, latency, retries and cost
+
+Every Bedrock response reports its input and output tokens. AIUsageTracker adds them up,
+together with request latency, throttles, retries, failures and cache hits, for the job
+as a whole, for each generation step (DocumentationService.GENERATION_STEPS) and for each
+model. Latencies go into a log-scale histogram rather than a list: it stays small enough
+to persist with the job, and histograms from many jobs can be merged, so the analytics
+API can report p50/p95/p99 across jobs as well as within one.
+"""
+
+import math
+import threading
+from contextvars import ContextVar
+from typing import Any, Dict, Iterable, List, Optional
+
+from app.services.model_router import model_price
+
+# Bucket i holds latencies up to LATENCY_BASE_SECONDS * LATENCY_GROWTH ** i (about 12% resolution)
+LATENCY_BASE_SECONDS = 0.05
+LATENCY_GROWTH = 1.25
+LATENCY_BUCKETS = 48
+
+_COUNTERS = ('calls', 'input_tokens', 'output_tokens', 'cache_hits', 'cache_misses', 'throttles', 'retries', 'failures')
+
+
+def _bucket(latency_seconds: float) -> int:
+    if latency_seconds <= LATENCY_BASE_SECONDS:
+        return 0
+    index = math.ceil(math.log(latency_seconds / LATENCY_BASE_SECONDS, LATENCY_GROWTH))
+    return min(index, LATENCY_BUCKETS - 1)
+
+
+def _bucket_upper_bound(index: int) -> float:
+    return LATENCY_BASE_SECONDS * LATENCY_GROWTH ** index
+
+
+def histogram_percentile(histogram: Dict[str, int], percentile: float) -> Optional[float]:
+    """Latency (upper bucket bound, seconds) at the given percentile of a histogram"""
+    total = sum(histogram.values())
+    if not total:
+        return None
+    threshold = total * percentile / 100.0
+    seen = 0
+    for index in sorted(histogram, key=int):
+        seen += histogram[index]
+        if seen >= threshold:
+            return round(_bucket_upper_bound(int(index)), 3)
+    return round(_bucket_upper_bound(max(int(index) for index in histogram)), 3)
+
+
+def _new_bucket() -> Dict[str, Any]:
+    bucket: Dict[str, Any] = {counter: 0 for counter in _COUNTERS}
+    bucket['latency_seconds'] = 0.0
+    bucket['latency_histogram'] = {}
+    return bucket
+
+
+def _add(bucket: Dict[str, Any], other: Dict[str, Any]):
+    for counter in _COUNTERS:
+        bucket[counter] += other.get(counter, 0)
+    bucket['latency_seconds'] += other.get('latency_seconds', 0.0)
+    for index, count in (other.get('latency_histogram') or {}).items():
+        bucket['latency_histogram'][str(index)] = bucket['latency_histogram'].get(str(index), 0) + count
+
+
+def summarize_bucket(bucket: Dict[str, Any], model_id: Optional[str] = None, files: Optional[int] = None) -> Dict[str, Any]:
+    """Counters plus percentiles, averages and (for a single model) estimated cost"""
+    histogram = bucket['latency_histogram']
+    summary = {counter: bucket[counter] for counter in _COUNTERS}
+    summary.update({
+        'total_tokens': bucket['input_tokens'] + bucket['output_tokens'],
+        'latency_seconds': round(bucket['latency_seconds'], 2),
+        'avg_latency_seconds': round(bucket['latency_seconds'] / bucket['calls'], 3) if bucket['calls'] else None,
+        'p50_latency_seconds': histogram_percentile(histogram, 50),
+        'p95_latency_seconds': histogram_percentile(histogram, 95),
+        'p99_latency_seconds': histogram_percentile(histogram, 99),
+        'latency_histogram': dict(histogram),
+    })
+    if model_id is not None:
+        price = model_price(model_id)
+        summary['estimated_cost_usd'] = round(
+            (bucket['input_tokens'] * price[0] + bucket['output_tokens'] * price[1]) / 1_000_000, 4
+        ) if price else None
+    if files:
+        summary['files'] = files
+        summary['tokens_per_file'] = round(summary['total_tokens'] / files, 1)
+    return summary
+
+
+class AIUsageTracker:
+    """Token, latency and cost totals for one job, by stage and by model"""
+
+    def __init__(self):
+        self.stage: Optional[str] = None
+        self._total = _new_bucket()
+        self._stages: Dict[str, Dict[str, Any]] = {}
+        self._models: Dict[str, Dict[str, Any]] = {}
+        self._stage_models: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._routes: Dict[str, int] = {'fast': 0, 'default': 0}
+        self._lock = threading.Lock()
+
+    def _buckets(self, model_id: str) -> List[Dict[str, Any]]:
+        stage = self.stage or 'other'
+        return [
+            self._total,
+            self._stages.setdefault(stage, _new_bucket()),
+            self._models.setdefault(model_id, _new_bucket()),
+            self._stage_models.setdefault(stage, {}).setdefault(model_id, _new_bucket()),
+        ]
+
+    def record_call(self, model_id: str, latency_seconds: float, input_tokens: int, output_tokens: int,
+                    throttles: int = 0):
+        """Account one completed model call and the throttled attempts before it"""
+        with self._lock:
+            for bucket in self._buckets(model_id):
+                bucket['calls'] += 1
+                bucket['input_tokens'] += input_tokens
+                bucket['output_tokens'] += output_tokens
+                bucket['throttles'] += throttles
+                bucket['retries'] += throttles
+                bucket['latency_seconds'] += latency_seconds
+                index = str(_bucket(latency_seconds))
+                bucket['latency_histogram'][index] = bucket['latency_histogram'].get(index, 0) + 1
+
+    def record_failure(self, model_id: str, throttles: int = 0):
+        """Account a call that failed for good (after any retries)"""
+        with self._lock:
+            for bucket in self._buckets(model_id):
+                bucket['failures'] += 1
+                bucket['throttles'] += throttles
+                bucket['retries'] += throttles
+
+    def record_cache_hit(self, model_id: str):
+        with self._lock:
+            for bucket in self._buckets(model_id):
+                bucket['cache_hits'] += 1
+
+    def record_cache_miss(self, model_id: str):
+        with self._lock:
+            for bucket in self._buckets(model_id):
+                bucket['cache_misses'] += 1
+
+    def record_route(self, tier: str):
+        """Count a rule-extraction request routed to the 'fast' or 'default' model"""
+        with self._lock:
+            self._routes[tier] = self._routes.get(tier, 0) + 1
+
+    def cache_statistics(self) -> Dict[str, Any]:
+        """This job's response cache hits and misses"""
+        with self._lock:
+            hits, misses = self._total['cache_hits'], self._total['cache_misses']
+            lookups = hits + misses
+        return {'hits': hits, 'misses': misses, 'hit_rate': hits / lookups if lookups else 0.0}
+
+    def route_counts(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._routes)
+
+    def to_dict(self, files: Optional[int] = None, files_by_stage: Optional[Dict[str, int]] = None) -> Dict[str, Any]:
+        """Persistable summary; files gives tokens per file for the job and, by stage, for each stage"""
+        files_by_stage = files_by_stage or {}
+        with self._lock:
+            models = {model_id: summarize_bucket(bucket, model_id) for model_id, bucket in self._models.items()}
+            stages = {}
+            for stage, bucket in self._stages.items():
+                stage_summary = summarize_bucket(bucket, files=files_by_stage.get(stage))
+                stage_models = self._stage_models.get(stage, {})
+                stage_summary['estimated_cost_usd'] = _sum_costs(
+                    summarize_bucket(model_bucket, model_id) for model_id, model_bucket in stage_models.items()
+                )
+                stages[stage] = stage_summary
+            total = summarize_bucket(self._total, files=files)
+        total['estimated_cost_usd'] = _sum_costs(models.values())
+        return {'total': total, 'stages': stages, 'models': models}
+
+
+def _sum_costs(summaries: Iterable[Dict[str, Any]]) -> Optional[float]:
+    costs = [summary.get('estimated_cost_usd') for summary in summaries]
+    known = [cost for cost in costs if cost is not None]
+    return round(sum(known), 4) if known else None
+
+
+def merge_usage(usages: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """Combine persisted per-job usage summaries into one, recomputing percentiles and costs"""
+    total = _new_bucket()
+    stages: Dict[str, Dict[str, Any]] = {}
+    models: Dict[str, Dict[str, Any]] = {}
+    stage_costs: Dict[str, List[Optional[float]]] = {}
+    files = 0
+    files_by_stage: Dict[str, int] = {}
+    jobs = 0
+    for usage in usages:
+        if not usage:
+            continue
+        jobs += 1
+        _add(total, usage['total'])
+        files += usage['total'].get('files') or 0
+        for stage, stage_usage in usage.get('stages', {}).items():
+            _add(stages.setdefault(stage, _new_bucket()), stage_usage)
+            stage_costs.setdefault(stage, []).append(stage_usage.get('estimated_cost_usd'))
+            files_by_stage[stage] = files_by_stage.get(stage, 0) + (stage_usage.get('files') or 0)
+        for model_id, model_usage in usage.get('models', {}).items():
+            _add(models.setdefault(model_id, _new_bucket()), model_usage)
+
+    model_summaries = {model_id: summarize_bucket(bucket, model_id) for model_id, bucket in models.items()}
+    stage_summaries = {}
+    for stage, bucket in stages.items():
+        stage_summaries[stage] = summarize_bucket(bucket, files=files_by_stage.get(stage))
+        stage_summaries[stage]['estimated_cost_usd'] = _sum_costs(
+            {'estimated_cost_usd': cost} for cost in stage_costs[stage]
+        )
+    total_summary = summarize_bucket(total, files=files)
+    total_summary['estimated_cost_usd'] = _sum_costs(model_summaries.values())
+    return {'jobs': jobs, 'total': total_summary, 'stages': stage_summaries, 'models': model_summaries}
+
+
+# Usage tracker of the job running in the current context, if any
+current_usage: ContextVar[Optional[AIUsageTracker]] = ContextVar('ai_usage', default=None)
@@ -0,0 +1,172 @@
+"""
+Per-file analyzer result cache
+
+Stores the per-file facts produced by the static analyzers (SQL queries, HTTP calls,
+REST endpoints, Struts actions, JSP components) in a content-addressed directory so that
+unchanged files are not re-scanned on every job. Entries are keyed by the file path and
+content hash and namespaced by analyzer version, so bumping an analyzer's version
+invalidates everything it previously produced. Streaming analyzers hash the file while
+they parse it and find their entry again through a small path/size/mtime alias.
+"""
+
+import os
+import json
+import hashlib
+import threading
+from pathlib import Path
+from typing import BinaryIO, Dict, List, Any, Optional, Tuple
+
+from app.core.config import settings
+from app.core.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+def read_source_file(file_path: Path) -> Tuple[bytes, str]:
+    """Read a file once, returning raw bytes and text decoded like open(..., errors='ignore')"""
+    with open(file_path, 'rb') as f:
+        raw = f.read()
+    text = raw.decode('utf-8', errors='ignore').replace('\r\n', '\n').replace('\r', '\n')
+    return raw, text
+
+
+class HashingReader:
+    """Binary file wrapper that feeds every byte read into the same digest as AnalysisCache.file_key"""
+
+    def __init__(self, f: BinaryIO, file_path: Path):
+        self._file = f
+        self._digest = hashlib.sha256()
+        self._digest.update(str(file_path).encode('utf-8'))
+        self._digest.update(b'\0')
+
+    def read(self, size: int = -1) -> bytes:
+        block = self._file.read(size)
+        self._digest.update(block)
+        return block
+
+    def hexdigest(self) -> str:
+        """Content key of the whole file, hashing whatever the reader's consumer left unread"""
+        for block in iter(lambda: self.read(1024 * 1024), b''):
+            pass
+        return self._digest.hexdigest()
+
+
+class AnalysisCache:
+    """Content-addressed on-disk cache of per-file analyzer facts"""
+
+    def __init__(self, cache_dir: Optional[str] = None, enabled: Optional[bool] = None):
+        self.cache_dir = Path(cache_dir or settings.ANALYSIS_CACHE_DIR)
+        self.enabled = settings.ENABLE_ANALYSIS_CACHE if enabled is None else enabled
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def file_key(self, file_path: Path, raw: Optional[bytes] = None) -> str:
+        """Build a cache key from the file path and its content; streams the file when raw is None"""
+        digest = hashlib.sha256()
+        digest.update(str(file_path).encode('utf-8'))
+        digest.update(b'\0')
+        if raw is not None:
+            digest.update(raw)
+        else:
+            with open(file_path, 'rb') as f:
+                for block in iter(lambda: f.read(1024 * 1024), b''):
+                    digest.update(block)
+        return digest.hexdigest()
+
+    def stat_key(self, file_path: Path) -> str:
+        """Cheap key from the file path, size and modification time; never reads the file"""
+        stat = os.stat(file_path)
+        return hashlib.sha256(f"{file_path}\0{stat.st_size}\0{stat.st_mtime_ns}".encode('utf-8')).hexdigest()
+
+    def _entry_path(self, namespace: str, version: str, key: str) -> Path:
+        return self.cache_dir / namespace / f"v{version}" / key[:2] / f"{key}.json"
+
+    def _alias_path(self, namespace: str, version: str, stat_key: str) -> Path:
+        return self.cache_dir / namespace / f"v{version}" / 'stat' / stat_key[:2] / stat_key
+
+    def get_content_key(self, namespace: str, version: str, stat_key: str) -> Optional[str]:
+        """Content key last stored for a file with this stat key, or None"""
+        if not self.enabled:
+            return None
+        try:
+            return self._alias_path(namespace, version, stat_key).read_text(encoding='utf-8').strip() or None
+        except OSError:
+            return None
+
+    def put_content_key(self, namespace: str, version: str, stat_key: str, key: str):
+        """Remember which content key a file with this stat key hashed to"""
+        if self.enabled:
+            self._write_entry(self._alias_path(namespace, version, stat_key), key)
+
+    def get(self, namespace: str, version: str, key: str) -> Optional[List[Dict[str, Any]]]:
+        """Return cached records for a file, or None on a miss"""
+        if not self.enabled:
+            return None
+
+        entry_path = self._entry_path(namespace, version, key)
+        try:
+            with open(entry_path, 'r', encoding='utf-8') as f:
+                records = json.load(f)
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        except (OSError, ValueError) as e:
+            logger.debug(f"Discarding unreadable analysis cache entry {entry_path}: {e}")
+            with self._lock:
+                self.misses += 1
+                self.errors += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        return records
+
+    def put(self, namespace: str, version: str, key: str, records: List[Dict[str, Any]]):
+        """Store records for a file; failures are logged and otherwise ignored"""
+        if not self.enabled:
+            return
+
+        try:
+            payload = json.dumps(records)
+        except (TypeError, ValueError) as e:
+            logger.debug(f"Could not serialise analysis cache entry {key}: {e}")
+            with self._lock:
+                self.errors += 1
+            return
+        self._write_entry(self._entry_path(namespace, version, key), payload)
+
+    def _write_entry(self, entry_path: Path, payload: str):
+        """Write an entry atomically; failures are logged and otherwise ignored"""
+        tmp_path = entry_path.with_name(f"{entry_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            entry_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(payload)
+            os.replace(tmp_path, entry_path)
+        except OSError as e:
+            logger.debug(f"Could not write analysis cache entry {entry_path}: {e}")
+            with self._lock:
+                self.errors += 1
+            try:
+                tmp_path.unlink()
+            except OSError:
+                pass
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Get cache hit/miss counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'enabled': self.enabled,
+                'hits': self.hits,
+                'misses': self.misses,
+                'errors': self.errors,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
+
+
+# Singleton instance
+analysis_cache = AnalysisCache()
@@ -0,0 +1,182 @@
+"""
+Native async transport for Bedrock runtime calls
+
+boto3 is synchronous, so every in-flight invoke_model call pins an executor thread. This
+transport signs requests with botocore's SigV4 signer and sends them over a pooled,
+keep-alive httpx.AsyncClient, so hundreds of concurrent requests cost sockets rather than
+threads. Request and response bodies are the same JSON documents boto3 sends and returns,
+so _format_request_body/_parse_model_response work unchanged. Errors are raised as
+botocore ClientError with the service error code, matching the boto3 path.
+"""
+
+import json
+import base64
+import asyncio
+from typing import Awaitable, Callable, Dict, Any, Optional
+from urllib.parse import quote
+
+from botocore.auth import SigV4Auth
+from botocore.awsrequest import AWSRequest
+from botocore.eventstream import EventStreamBuffer
+from botocore.exceptions import ClientError
+
+from app.core.config import settings
+from app.core.logging_config import get_logger
+
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    httpx = None
+    HTTPX_AVAILABLE = False
+
+logger = get_logger(__name__)
+
+
+class BedrockAsyncTransport:
+    """SigV4-signed Bedrock runtime calls over a shared async HTTP connection pool"""
+
+    def __init__(
+        self,
+        credentials,
+        region: Optional[str] = None,
+        max_connections: Optional[int] = None,
+        keepalive_seconds: Optional[float] = None,
+        timeout_seconds: Optional[float] = None
+    ):
+        if not HTTPX_AVAILABLE:
+            raise RuntimeError("httpx is required for the async Bedrock transport")
+        self.credentials = credentials
+        self.region = region or settings.AWS_REGION
+        self.endpoint = (settings.BEDROCK_ENDPOINT_URL or f"https://bedrock-runtime.{self.region}.amazonaws.com").rstrip('/')
+        self.max_connections = max_connections or settings.AI_HTTP_MAX_CONNECTIONS
+        self.keepalive_seconds = keepalive_seconds or settings.AI_HTTP_KEEPALIVE_SECONDS
+        self.timeout_seconds = timeout_seconds or settings.AI_REQUEST_TIMEOUT_SECONDS
+        self._client = None
+        self._client_loop = None
+
+    def set_credentials(self, credentials):
+        """Swap in refreshed credentials without dropping pooled connections"""
+        self.credentials = credentials
+
+    def _get_client(self):
+        # An AsyncClient is bound to the loop it first ran on
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client_loop is not loop:
+            self._client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                    keepalive_expiry=self.keepalive_seconds
+                ),
+                timeout=self.timeout_seconds
+            )
+            self._client_loop = loop
+        return self._client
+
+    def _signed_headers(self, method: str, url: str, payload: bytes, accept: str) -> Dict[str, str]:
+        request = AWSRequest(
+            method=method,
+            url=url,
+            data=payload,
+            headers={'Content-Type': 'application/json', 'Accept': accept}
+        )
+        # get_frozen_credentials refreshes SSO/assumed-role credentials when they near expiry
+        SigV4Auth(self.credentials.get_frozen_credentials(), 'bedrock', self.region).add_auth(request)
+        return dict(request.headers.items())
+
+    def _model_url(self, model_id: str, action: str) -> str:
+        return f"{self.endpoint}/model/{quote(model_id, safe='')}/{action}"
+
+    def _raise_for_error(self, status_code: int, headers, text: str, operation: str):
+        error_type = headers.get('x-amzn-ErrorType', '').split(':', 1)[0]
+        try:
+            message = json.loads(text).get('message', text)
+        except ValueError:
+            message = text
+        code = error_type or ('ThrottlingException' if status_code == 429 else f"HTTP{status_code}")
+        raise ClientError(
+            {'Error': {'Code': code, 'Message': message}, 'ResponseMetadata': {'HTTPStatusCode': status_code}},
+            operation
+        )
+
+    async def invoke_model(self, model_id: str, body_dict: Dict[str, Any]) -> Dict[str, Any]:
+        """Invoke a model and return the decoded response body"""
+        url = self._model_url(model_id, 'invoke')
+        payload = json.dumps(body_dict).encode('utf-8')
+        headers = self._signed_headers('POST', url, payload, 'application/json')
+
+        response = await self._get_client().post(url, content=payload, headers=headers)
+        if response.status_code >= 400:
+            self._raise_for_error(response.status_code, response.headers, response.text, 'InvokeModel')
+        return response.json()
+
+    async def invoke_model_stream(
+        self,
+        model_id: str,
+        body_dict: Dict[str, Any],
+        on_text: Callable[[str], Awaitable[bool]]
+    ) -> Dict[str, Any]:
+        """
+        Invoke a Claude 3+ model with a streamed response, awaiting on_text for every text
+        delta; on_text returning True stops reading early. Returns a body in the same shape
+        as invoke_model (content text and usage), with stopped_early set when cut short.
+        """
+        url = self._model_url(model_id, 'invoke-with-response-stream')
+        payload = json.dumps(body_dict).encode('utf-8')
+        headers = self._signed_headers('POST', url, payload, 'application/vnd.amazon.eventstream')
+
+        text_parts = []
+        usage: Dict[str, Any] = {}
+        stop_reason = None
+        stopped_early = False
+
+        async with self._get_client().stream('POST', url, content=payload, headers=headers) as response:
+            if response.status_code >= 400:
+                text = (await response.aread()).decode('utf-8', errors='replace')
+                self._raise_for_error(response.status_code, response.headers, text, 'InvokeModelWithResponseStream')
+
+            events = EventStreamBuffer()
+            async for data in response.aiter_bytes():
+                events.add_data(data)
+                for message in events:
+                    if message.headers.get(':message-type') == 'exception':
+                        error = json.loads(message.payload or b'{}')
+                        raise ClientError(
+                            {'Error': {'Code': message.headers.get(':exception-type', 'StreamException'),
+                                       'Message': error.get('message', '')}},
+                            'InvokeModelWithResponseStream'
+                        )
+
+                    chunk = json.loads(message.payload).get('bytes')
+                    if not chunk:
+                        continue
+                    event = json.loads(base64.b64decode(chunk))
+                    event_type = event.get('type')
+
+                    if event_type == 'content_block_delta' and event.get('delta', {}).get('type') == 'text_delta':
+                        fragment = event['delta'].get('text', '')
+                        text_parts.append(fragment)
+                        if await on_text(fragment):
+                            stopped_early = True
+                            break
+                    elif event_type == 'message_start':
+                        usage.update(event.get('message', {}).get('usage', {}))
+                    elif event_type == 'message_delta':
+                        usage.update(event.get('usage', {}))
+                        stop_reason = event.get('delta', {}).get('stop_reason')
+
+                if stopped_early:
+                    break  # Leaving the context closes the connection and ends generation
+
+        return {
+            'content': [{'type': 'text', 'text': ''.join(text_parts)}],
+            'usage': usage,
+            'stop_reason': stop_reason,
+            'stopped_early': stopped_early
+        }
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
@@ -0,0 +1,158 @@
+"""
+Static pre-screening of files for likely business-rule density
+
+DTOs, accessor-only beans, constant holders and generated stubs make up a large share
+of a typical legacy codebase and never yield business rules, yet each costs a model
+call. The scorer combines the business-logic signals the parsers already report
+(Python's business_logic_patterns, conditional_logic and complexity) with language-
+independent text signals (decision points, thrown exceptions, domain terms) and
+penalties for accessors and generated code, so rule extraction can skip or defer
+files that score below AI_PRESCREEN_MIN_SCORE. file_priorities adds how central a file
+is (how many other files use its types) and request keyword hits, giving the order in
+which budget-limited jobs hand out work.
+"""
+
+import re
+import math
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from app.services.prompt_packing import SourceFile
+
+# Markers left by code generators (JAXB, Axis, protoc, IDL compilers, ORMs, ...)
+_GENERATED_PATTERN = re.compile(
+    r'^\s*@(?:javax\.annotation\.)?Generated\b|^\s*(?://|/?\*|#).*(?:auto-?generated|generated by|do not edit)',
+    re.IGNORECASE | re.MULTILINE
+)
+_COMMENT_PATTERN = re.compile(r'/\*.*?\*/|//[^\n]*|^\s*#[^\n]*|<!--.*?-->', re.DOTALL | re.MULTILINE)
+_STRING_PATTERN = re.compile(r'"(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\'')
+_DECISION_PATTERN = re.compile(r'\b(?:if|elif|switch|case|while|for|catch|except)\b|&&|\|\||\?(?=[^?.:>]*:)')
+_THROW_PATTERN = re.compile(r'\b(?:throw\s+new|raise)\s+\w+')
+_METHOD_DECLARATION = r'\b(?:public|protected|private)\s+(?:static\s+|final\s+|synchronized\s+)*[\w<>\[\],.? ]+?\s+'
+_ACCESSOR_PATTERN = re.compile(_METHOD_DECLARATION + r'(?:get|set|is|has)[A-Z]\w*\s*\(|\bdef\s+(?:get|set|is|has)_\w+\s*\(')
+_METHOD_PATTERN = re.compile(_METHOD_DECLARATION + r'\w+\s*\([^;{)]*\)[^;{]*\{|\bdef\s+\w+\s*\(')
+_IDENTIFIER_PATTERN = re.compile(r'\b[A-Za-z_]\w{2,}\b')
+_TYPE_ENTITY_TYPES = {'class', 'interface', 'enum'}
+_DOMAIN_TERMS = re.compile(
+    r'\b\w*(?:amount|price|cost|fee|rate|discount|tax|balance|limit|threshold|quota|'
+    r'eligib|approv|reject|valid|status|premium|interest|credit|debit|penalty|policy|'
+    r'expir|overdue|priority|tier|commission|refund|invoice|order|payment)\w*\b',
+    re.IGNORECASE
+)
+
+
+@dataclass
+class FileScore:
+    """Estimated business-rule density of one file and what it was based on"""
+    file_path: str
+    score: float
+    signals: Dict[str, float] = field(default_factory=dict)
+    reason: str = ''
+
+
+def _code_only(content: str) -> str:
+    """Source with comments and string literals removed, so they do not count as logic"""
+    return _STRING_PATTERN.sub('""', _COMMENT_PATTERN.sub('', content))
+
+
+def score_file(source_file: SourceFile) -> FileScore:
+    """Score a file by how likely it is to contain business rules; higher means denser"""
+    content = source_file.content
+    if _GENERATED_PATTERN.search(content[:2000]):
+        return FileScore(source_file.file_path, 0.0, {'generated': 1}, 'generated code')
+
+    code = _code_only(content)
+    lines = max(1, sum(1 for line in code.split('\n') if line.strip()))
+
+    # Signals the parsers already computed (Python today; other parsers may add them)
+    parser_patterns = 0
+    business_conditions = 0
+    extra_complexity = 0
+    methods = 0
+    for entity in source_file.entities:
+        parser_patterns += len(entity.get('business_logic_patterns') or [])
+        business_conditions += sum(
+            1 for condition in entity.get('conditional_logic') or []
+            if isinstance(condition, dict) and condition.get('is_business_logic')
+        )
+        if isinstance(entity.get('complexity'), int):
+            extra_complexity += max(0, entity['complexity'] - 1)
+        if entity.get('type') in ('method', 'function') or str(entity.get('type', '')).endswith('_method'):
+            methods += 1
+
+    decisions = len(_DECISION_PATTERN.findall(code))
+    throws = len(_THROW_PATTERN.findall(code))
+    domain_terms = len(_DOMAIN_TERMS.findall(code))
+    accessors = len(_ACCESSOR_PATTERN.findall(code))
+    methods = max(methods, len(_METHOD_PATTERN.findall(code)))
+
+    signals = {
+        'parser_patterns': parser_patterns,
+        'business_conditions': business_conditions,
+        'decisions': decisions,
+        'throws': throws,
+        'domain_terms': domain_terms,
+        'accessors': accessors,
+        'lines': lines,
+    }
+
+    # Parser complexity and counted decision points measure the same thing; take the larger
+    logic = 2.0 * parser_patterns + 1.5 * business_conditions + max(decisions, extra_complexity) + 1.5 * throws
+    # Domain vocabulary only counts alongside logic; field names alone make a DTO, not a rule
+    score = logic + min(0.25 * domain_terms, logic)
+    # Accessor-heavy classes (beans, DTOs) are mostly getter/setter noise
+    if accessors and accessors >= max(methods, 1) * 0.8 and decisions <= accessors // 4:
+        score *= 0.25
+        reason = 'accessors only'
+    elif not decisions and not throws and not parser_patterns:
+        reason = 'no decision logic'
+    else:
+        reason = ''
+
+    # Sub-linear in size: dense files rank first, but a long file with scattered logic still counts
+    density = score / math.sqrt(lines / 100.0 + 0.25)
+    return FileScore(source_file.file_path, round(density, 2), signals, reason)
+
+
+def file_centrality(source_files: List[SourceFile]) -> Dict[str, int]:
+    """For each file, how many other files mention the types it declares (a cheap call-graph in-degree)"""
+    declared: Dict[str, set] = {}
+    for source_file in source_files:
+        names = {Path(source_file.file_path).stem}
+        names.update(
+            entity['name'] for entity in source_file.entities
+            if entity.get('type') in _TYPE_ENTITY_TYPES and entity.get('name')
+        )
+        declared[source_file.file_path] = names
+    all_names = set().union(*declared.values()) if declared else set()
+
+    files_mentioning: Dict[str, int] = {}
+    for source_file in source_files:
+        for identifier in set(_IDENTIFIER_PATTERN.findall(source_file.content)) & all_names:
+            files_mentioning[identifier] = files_mentioning.get(identifier, 0) + 1
+
+    # The declaring file mentions its own names; only the other files count
+    return {
+        file_path: sum(max(0, files_mentioning.get(name, 0) - 1) for name in names)
+        for file_path, names in declared.items()
+    }
+
+
+def file_priorities(
+    source_files: List[SourceFile],
+    file_scores: Dict[str, FileScore],
+    keywords: Optional[List[str]] = None
+) -> Dict[str, float]:
+    """Order of analysis under a budget: rule density, scaled up by centrality, plus keyword hits"""
+    centrality = file_centrality(source_files)
+    lowered_keywords = [keyword.lower() for keyword in keywords or [] if keyword]
+    priorities = {}
+    for source_file in source_files:
+        content = source_file.content.lower()
+        keyword_hits = sum(content.count(keyword) for keyword in lowered_keywords)
+        priorities[source_file.file_path] = (
+            file_scores[source_file.file_path].score * (1 + math.log1p(centrality[source_file.file_path]))
+            + 10.0 * min(keyword_hits, 3)
+        )
+    return priorities
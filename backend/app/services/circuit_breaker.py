@@ -0,0 +1,128 @@
+"""
+Circuit breaker for the AI backend
+
+When Bedrock is unreachable or the credentials have expired, every queued model call
+would otherwise wait out its own network timeout and fail separately, and a job could
+spend an hour doing that. The breaker opens after AI_CIRCUIT_FAILURE_THRESHOLD
+consecutive backend failures; while it is open, calls fail immediately with
+CircuitOpenError and the pipeline falls back to static-only output. After
+AI_CIRCUIT_RESET_SECONDS a single probe call is let through (half-open): if it succeeds
+the circuit closes and AI use resumes, otherwise it opens again.
+
+Throttled attempts are retried with backoff and only count once retries run out; request
+errors (a prompt the model rejects) say nothing about backend health and never count.
+"""
+
+import time
+import threading
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+from app.core.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Errors caused by the request itself rather than by the backend being unavailable
+REQUEST_ERROR_CODES = {
+    'ValidationException',
+    'ModelErrorException',
+    'ModelTimeoutException',
+    'ResourceNotFoundException',
+}
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling the AI backend while the circuit is open"""
+
+
+def is_backend_failure(error: BaseException) -> bool:
+    """Whether an exception from a model call says the backend itself is unavailable"""
+    response = getattr(error, 'response', None)
+    if isinstance(response, dict):
+        code = response.get('Error', {}).get('Code', '')
+        return code not in REQUEST_ERROR_CODES
+    return isinstance(error, Exception) and not isinstance(error, (ValueError, CircuitOpenError))
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker with a single half-open probe"""
+
+    def __init__(self, failure_threshold: Optional[int] = None, reset_seconds: Optional[float] = None):
+        self.failure_threshold = failure_threshold if failure_threshold is not None else settings.AI_CIRCUIT_FAILURE_THRESHOLD
+        self.reset_seconds = reset_seconds if reset_seconds is not None else settings.AI_CIRCUIT_RESET_SECONDS
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self.times_opened = 0
+        self.fast_failures = 0
+        self.last_error: Optional[str] = None
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.failure_threshold > 0
+
+    def before_call(self):
+        """Raise CircuitOpenError unless a call may go to the backend now"""
+        if not self.enabled:
+            return
+        with self._lock:
+            if self.state == CLOSED:
+                return
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_seconds:
+                self.state = HALF_OPEN
+                self._probe_in_flight = False
+            if self.state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                logger.info("AI circuit half-open: sending a probe request")
+                return
+            self.fast_failures += 1
+            retry_in = max(0.0, self.reset_seconds - (time.monotonic() - self.opened_at))
+        raise CircuitOpenError(f"AI backend unavailable (circuit open, retry in {retry_in:.0f}s): {self.last_error}")
+
+    def record_success(self):
+        with self._lock:
+            if self.state != CLOSED:
+                logger.info("AI circuit closed: backend calls succeed again")
+            self.state = CLOSED
+            self.consecutive_failures = 0
+            self._probe_in_flight = False
+
+    def release_probe(self):
+        """Let the next call probe again; for a probe that ended without a verdict (e.g. throttled)"""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_failure(self, error: BaseException):
+        """Count a failed call; failures unrelated to backend health are ignored"""
+        if not self.enabled or not is_backend_failure(error):
+            # A probe that failed for its own reasons still frees the probe slot
+            self.release_probe()
+            return
+        with self._lock:
+            self.consecutive_failures += 1
+            self.last_error = f"{type(error).__name__}: {error}"[:300]
+            if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    self.times_opened += 1
+                    logger.error(f"AI circuit opened after {self.consecutive_failures} consecutive failures "
+                                 f"({self.last_error}); pending AI work fails fast, retry in {self.reset_seconds:.0f}s")
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+                self._probe_in_flight = False
+
+    def get_statistics(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'state': self.state,
+                'consecutive_failures': self.consecutive_failures,
+                'times_opened': self.times_opened,
+                'fast_failures': self.fast_failures,
+                'last_error': self.last_error,
+            }
@@ -0,0 +1,131 @@
+"""
+Structure-aware chunking of large source files for AI analysis
+
+Large legacy classes are split along the declaration boundaries reported by the parsers
+(classes, methods, functions) so each prompt stays within a token budget without cutting
+a method in half. Every chunk repeats the file's header - package, imports and the class
+declaration with its fields - and overlaps the previous chunk by a few lines. The header
+is capped; code before the first method that does not fit in it is chunked like the rest
+of the file, so every line of the file is in some chunk's body or header.
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from app.core.config import settings
+from app.services.prompt_packing import estimate_tokens
+
+# Entity types whose start line is a safe place to cut a file
+BOUNDARY_TYPES = {'class', 'interface', 'enum', 'method', 'function'}
+
+
+@dataclass
+class CodeChunk:
+    """A contiguous slice of a file plus the header context it needs"""
+    index: int
+    start_line: int  # 1-based, inclusive
+    end_line: int  # 1-based, inclusive
+    header: str
+    body: str
+    entities: List[Dict] = field(default_factory=list)
+
+
+def _is_boundary(entity: Dict) -> bool:
+    entity_type = entity.get('type', '')
+    return entity_type in BOUNDARY_TYPES or entity_type.endswith('_method') or entity_type.endswith('_class')
+
+
+def _header_lines(lines: List[str], first_member_line: int, max_tokens: int) -> List[str]:
+    """Lines before the first method (imports, class declaration, fields), capped at max_tokens"""
+    header: List[str] = []
+    tokens = 0
+    for line in lines[:first_member_line - 1]:
+        line_tokens = estimate_tokens(line) + 1
+        if tokens + line_tokens > max_tokens:
+            break
+        header.append(line)
+        tokens += line_tokens
+    return header
+
+
+def chunk_source(
+    content: str,
+    entities: List[Dict],
+    max_tokens: Optional[int] = None,
+    overlap_lines: Optional[int] = None,
+    header_max_tokens: Optional[int] = None
+) -> List[CodeChunk]:
+    """Split a file into chunks of about max_tokens along parser-reported declaration boundaries"""
+    max_tokens = max_tokens or settings.AI_CHUNK_TOKENS
+    overlap_lines = settings.AI_CHUNK_OVERLAP_LINES if overlap_lines is None else overlap_lines
+    header_max_tokens = header_max_tokens or max(1, max_tokens // 5)
+
+    lines = content.split('\n')
+    total_lines = len(lines)
+
+    boundaries = sorted({
+        entity['line_number'] for entity in entities
+        if _is_boundary(entity) and isinstance(entity.get('line_number'), int) and 1 < entity['line_number'] <= total_lines
+    })
+    # Members (not the enclosing class) end the header; without spans every line is a boundary
+    member_lines = [
+        entity['line_number'] for entity in entities
+        if _is_boundary(entity) and entity.get('type') not in ('class', 'interface', 'enum')
+        and isinstance(entity.get('line_number'), int) and entity['line_number'] <= total_lines
+    ]
+    first_member_line = min(member_lines) if member_lines else (boundaries[0] if boundaries else 1)
+
+    header_lines = _header_lines(lines, first_member_line, header_max_tokens)
+    # Whatever the capped header leaves out (long top-level code, big field tables) is body
+    body_first_line = min(first_member_line, len(header_lines) + 1)
+    if body_first_line < first_member_line:
+        header_lines.append("# ... header continues in the code sections ...")
+    header = '\n'.join(header_lines)
+    body_budget = max(1, max_tokens - estimate_tokens(header))
+
+    # Segments run from one boundary to the next; oversized segments are split by line
+    starts = [body_first_line] + [line for line in boundaries if line > body_first_line]
+    segments = []
+    for position, start in enumerate(starts):
+        end = starts[position + 1] - 1 if position + 1 < len(starts) else total_lines
+        segment_start = start
+        tokens = 0
+        for line_number in range(start, end + 1):
+            line_tokens = estimate_tokens(lines[line_number - 1]) + 1
+            if tokens and tokens + line_tokens > body_budget:
+                segments.append((segment_start, line_number - 1, tokens))
+                segment_start, tokens = line_number, 0
+            tokens += line_tokens
+        segments.append((segment_start, end, tokens))
+
+    # Greedily merge consecutive segments up to the budget
+    spans = []
+    current_start, current_end, current_tokens = None, None, 0
+    for start, end, tokens in segments:
+        if current_start is not None and current_tokens + tokens > body_budget:
+            spans.append((current_start, current_end))
+            current_start, current_tokens = None, 0
+        if current_start is None:
+            current_start = start
+        current_end = end
+        current_tokens += tokens
+    if current_start is not None:
+        spans.append((current_start, current_end))
+
+    chunks = []
+    for index, (start, end) in enumerate(spans):
+        body_start = max(body_first_line, start - overlap_lines) if index else start
+        chunk_entities = [
+            entity for entity in entities
+            if isinstance(entity.get('line_number'), int) and start <= entity['line_number'] <= end
+        ]
+        chunks.append(CodeChunk(
+            index=index,
+            start_line=body_start,
+            end_line=end,
+            header=header,
+            body='\n'.join(lines[body_start - 1:end]),
+            entities=chunk_entities
+        ))
+
+    return chunks
@@ -82,6 +82,12 @@ class CodeIntelligenceGraph:
         self.module_index: Dict[str, List[str]] = defaultdict(list)
         self.cross_references: Dict[str, Set[str]] = defaultdict(set)
         
+        # Secondary indexes for name resolution while building the graph
+        self.name_index: Dict[Tuple[str, str], List[str]] = defaultdict(list)  # (type, name) -> ids
+        self.file_index: Dict[str, List[str]] = defaultdict(list)  # file path -> ids
+        self.file_name_index: Dict[str, List[str]] = defaultdict(list)  # file basename -> file paths
+        self.qualified_name_index: Dict[Tuple[str, str], str] = {}  # (file path, qualified name) -> id
+        
         logger.info("Initialized CodeIntelligenceGraph")
     
     def add_entity(self, entity: CodeEntityData) -> None:
@@ -101,8 +107,52 @@ class CodeIntelligenceGraph:
         # Build hierarchy index by type
         self.hierarchy[module_path][entity.type].append(entity.id)
         
+        # Build name indexes
+        self.name_index[(entity.type, entity.name)].append(entity.id)
+        if entity.file_path not in self.file_index:
+            self.file_name_index[Path(entity.file_path).name].append(entity.file_path)
+        self.file_index[entity.file_path].append(entity.id)
+        self.qualified_name_index.setdefault((entity.file_path, self._qualified_name(entity)), entity.id)
+        
         logger.debug(f"Added entity: {entity.id} ({entity.type}) in {module_path}")
     
+    def _qualified_name(self, entity: CodeEntityData) -> str:
+        """Name qualified by its enclosing class, e.g. OrderService.submit"""
+        parent = self.entities.get(entity.parent_id) if entity.parent_id else None
+        if parent and parent.type in ['class', 'interface'] and not entity.name.startswith(f"{parent.name}."):
+            return f"{parent.name}.{entity.name}"
+        return entity.name
+    
+    def find_by_name(self, name: str, entity_types: List[str], source_file: Optional[str] = None) -> Optional[str]:
+        """
+        Find an entity by type and name, preferring one in the same file,
+        then the same module package, then the first one added
+        """
+        candidates = [entity_id for entity_type in entity_types
+                      for entity_id in self.name_index.get((entity_type, name), [])]
+        if not candidates:
+            return None
+        
+        if source_file:
+            source_package = Path(source_file).parent
+            same_package = None
+            for entity_id in candidates:
+                candidate_file = self.entities[entity_id].file_path
+                if candidate_file == source_file:
+                    return entity_id
+                if same_package is None and Path(candidate_file).parent == source_package:
+                    same_package = entity_id
+            if same_package:
+                return same_package
+        
+        return candidates[0]
+    
+    def find_files(self, file_reference: str) -> List[str]:
+        """Indexed file paths matching a (possibly relative) file reference"""
+        file_reference = file_reference.strip().replace('\\', '/')
+        return [file_path for file_path in self.file_name_index.get(Path(file_reference).name, [])
+                if file_path.replace('\\', '/').endswith(file_reference)]
+    
     def add_relationship(self, relationship: CodeRelationship) -> None:
         """Add a relationship between code entities"""
         self.relationships.append(relationship)
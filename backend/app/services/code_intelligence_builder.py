@@ -18,6 +18,63 @@ from app.core.logging_config import get_logger
 
 logger = get_logger(__name__)
 
+# Directory names dropped from module paths (and from imports, so both sides compare alike)
+SKIP_MODULE_DIRS = {'src', 'app', 'backend', 'main', 'java', 'python', 'frontend', 'ui'}
+
+class ModulePathTrie:
+    """
+    Trie over reversed module path segments for longest-prefix import resolution.
+    
+    Module paths are derived from absolute file paths, so an import such as
+    ``com.acme.billing.Invoice`` matches a module whose path *ends* with those
+    segments. Walking the reversed segments finds every such module in O(len(import)).
+    """
+    
+    def __init__(self):
+        self.root: Dict[str, Any] = {}
+    
+    def insert(self, segments: List[str], module_id: str) -> None:
+        """Register a module under its path segments"""
+        node = self.root
+        for segment in reversed(segments):
+            node = node.setdefault(segment, {})
+            node.setdefault('__modules__', []).append((segments, module_id))
+    
+    def _modules_ending_with(self, segments: List[str]) -> List[Tuple[List[str], str]]:
+        node = self.root
+        for segment in reversed(segments):
+            node = node.get(segment)
+            if node is None:
+                return []
+        return node.get('__modules__', [])
+    
+    def resolve(self, import_segments: List[str], source_segments: List[str]) -> Optional[Tuple[str, List[str]]]:
+        """
+        Resolve an import to (module_id, remaining_segments) using the longest
+        prefix of the import that names a module. Ambiguous matches prefer the
+        module sharing the longest leading path with the importing file.
+        """
+        for split in range(len(import_segments), 0, -1):
+            candidates = self._modules_ending_with(import_segments[:split])
+            if not candidates:
+                continue
+            
+            if len(candidates) == 1:
+                return candidates[0][1], import_segments[split:]
+            
+            def shared_prefix(candidate: Tuple[List[str], str]) -> int:
+                count = 0
+                for left, right in zip(candidate[0], source_segments):
+                    if left != right:
+                        break
+                    count += 1
+                return count
+            
+            best = max(candidates, key=shared_prefix)
+            return best[1], import_segments[split:]
+        
+        return None
+
 class CodeIntelligenceBuilder:
     """
     Builds the CodeIntelligenceGraph from existing parsed entities
@@ -28,6 +85,7 @@ class CodeIntelligenceBuilder:
         self.graph = intelligence_graph or code_intelligence
         self.entity_id_map: Dict[str, str] = {}  # Maps original entity keys to new IDs
         self.file_modules: Dict[str, str] = {}  # Maps file paths to module IDs
+        self.module_trie = ModulePathTrie()  # Resolves imports to module IDs
         
     def build_from_entities(self, entities: List[Dict[str, Any]]) -> CodeIntelligenceGraph:
         """
@@ -39,6 +97,7 @@ class CodeIntelligenceBuilder:
         self.graph = CodeIntelligenceGraph()
         self.entity_id_map.clear()
         self.file_modules.clear()
+        self.module_trie = ModulePathTrie()
         
         # Phase 1: Create all entities and establish basic hierarchy
         self._create_entities_and_modules(entities)
@@ -124,6 +183,7 @@ class CodeIntelligenceBuilder:
             module_entity = self._create_module_entity(file_path)
             self.graph.add_entity(module_entity)
             self.file_modules[file_path] = module_entity.id
+            self.module_trie.insert(self._module_segments(file_path), module_entity.id)
         
         # Second pass: Create all other entities with proper hierarchy
         for entity in entities:
@@ -246,7 +306,7 @@ class CodeIntelligenceBuilder:
                             relationship_type='inherits',
                             file_path=entity.get('file_path', ''),
                             line_number=entity.get('line_number'),
-                            context=f"extends {base_class}"
+                            context=f"extends {base_class.get('name') if isinstance(base_class, dict) else base_class}"
                         )
                         self.graph.add_relationship(relationship)
     
@@ -346,15 +406,17 @@ class CodeIntelligenceBuilder:
     
     def _extract_module_path(self, file_path: str) -> str:
         """Extract module path from file path"""
+        return '.'.join(self._module_segments(file_path))
+    
+    def _module_segments(self, file_path: str) -> List[str]:
+        """Module path segments for a file path, skipping common source directories"""
         path = Path(file_path)
-        # Remove file extension and convert path separators to dots
+        # Remove file extension; each remaining path part is one segment
         module_parts = path.with_suffix('').parts
         
-        # Skip common source directories
-        skip_dirs = {'src', 'app', 'backend', 'main', 'java', 'python', 'frontend', 'ui'}
-        filtered_parts = [part for part in module_parts if part not in skip_dirs]
+        filtered_parts = [part for part in module_parts if part not in SKIP_MODULE_DIRS]
         
-        return '.'.join(filtered_parts) if filtered_parts else path.stem
+        return filtered_parts if filtered_parts else [path.stem]
     
     def _detect_language(self, file_path: str) -> str:
         """Detect programming language from file path"""
@@ -391,45 +453,72 @@ class CodeIntelligenceBuilder:
         # Parse code reference (format: file_path:function_name or file_path:class.method)
         if ':' in code_ref:
             file_part, code_part = code_ref.split(':', 1)
+            code_part = code_part.strip()
             
-            # Look for exact matches in entities
-            for entity_id, entity in self.graph.entities.items():
-                if entity.file_path.endswith(file_part) or file_part in entity.file_path:
-                    if code_part in entity.name or entity.name in code_part:
+            for file_path in self.graph.find_files(file_part):
+                # Exact qualified name, then the last name segment, then a loose match within the file
+                entity_id = (self.graph.qualified_name_index.get((file_path, code_part)) or
+                             self.graph.qualified_name_index.get((file_path, code_part.split('.')[-1])))
+                if entity_id:
+                    return entity_id
+                
+                for entity_id in self.graph.file_index.get(file_path, []):
+                    name = self.graph.entities[entity_id].name
+                    if code_part in name or name in code_part:
                         return entity_id
         
-        # Fallback: match by file path only
-        for entity_id, entity in self.graph.entities.items():
-            if code_ref in entity.file_path:
-                return entity_id
+        # Fallback: match by file path only (the first entity indexed for a file is its module)
+        for file_path in self.graph.find_files(code_ref):
+            return self.graph.file_index[file_path][0]
         
         return None
     
     def _find_dependency_target(self, dependency: str, source_file: str) -> Optional[str]:
-        """Find the target entity for a dependency"""
-        # This is simplified - in a real implementation, you'd need
-        # sophisticated import resolution logic
-        for entity_id, entity in self.graph.entities.items():
-            if dependency in entity.name or entity.name in dependency:
-                return entity_id
-        return None
+        """Resolve a Python dotted or Java package import to a module (or a symbol inside it)"""
+        source_segments = self._module_segments(source_file)
+        dependency = dependency.strip().rstrip(';')
+        
+        # Python relative imports are anchored at the importing module's package
+        level = len(dependency) - len(dependency.lstrip('.'))
+        segments = [part for part in dependency.lstrip('.').split('.') if part and part != '*']
+        if level:
+            segments = source_segments[:-level] + segments
+        segments = [part for part in segments if part not in SKIP_MODULE_DIRS]
+        if not segments:
+            return None
+        
+        resolved = self.module_trie.resolve(segments, source_segments)
+        if not resolved:
+            return None  # External or unresolvable import
+        
+        module_id, remainder = resolved
+        if remainder:
+            # "from pkg.module import Symbol" / "import com.acme.Outer.Inner" - prefer the symbol itself
+            module = self.graph.entities.get(module_id)
+            for child_id in (module.children if module else []):
+                child = self.graph.entities.get(child_id)
+                if child and child.name == remainder[0]:
+                    return child_id
+        
+        return module_id
     
-    def _find_class_target(self, class_name: str, source_file: str) -> Optional[str]:
+    def _find_class_target(self, class_name: Any, source_file: str) -> Optional[str]:
         """Find the target entity for a class reference"""
-        for entity_id, entity in self.graph.entities.items():
-            if entity.type in ['class', 'interface'] and entity.name == class_name:
-                return entity_id
-        return None
+        # Python parser reports base classes as {'name': ..., 'type': 'class'}
+        if isinstance(class_name, dict):
+            class_name = class_name.get('name', '')
+        if not class_name:
+            return None
+        
+        # models.Base -> Base
+        return self.graph.find_by_name(class_name.split('.')[-1], ['class', 'interface'], source_file)
     
     def _find_method_target(self, method_call: str, source_file: str) -> Optional[str]:
         """Find the target entity for a method call"""
         # Extract method name from call (remove parentheses, parameters)
         method_name = re.sub(r'\(.*\)', '', method_call).strip()
         
-        for entity_id, entity in self.graph.entities.items():
-            if entity.type in ['method', 'function'] and entity.name == method_name:
-                return entity_id
-        return None
+        return self.graph.find_by_name(method_name, ['method', 'function'], source_file)
     
     def _extract_method_calls(self, method_body: str) -> List[str]:
         """Extract method calls from method body (simplified)"""
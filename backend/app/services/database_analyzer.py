@@ -15,6 +15,7 @@ from contextlib import asynccontextmanager
 
 from app.core.config import settings
 from app.core.logging_config import get_logger
+from app.services.analysis_cache import analysis_cache, read_source_file
 
 logger = get_logger(__name__)
 
@@ -54,6 +55,9 @@ class DatabaseConnection:
 class DatabaseAnalyzer:
     """Analyzes database usage with graceful degradation"""
     
+    # Bump whenever per-file query extraction changes so cached facts are invalidated
+    ANALYZER_VERSION = "1"
+    
     def __init__(self):
         self.sql_patterns = self._compile_sql_patterns()
         self.connections: Dict[str, DatabaseConnection] = {}
@@ -157,7 +161,9 @@ class DatabaseAnalyzer:
             'unique_tables': len(static_results['tables']),
         }
         
-        logger.info(f"Database analysis completed: {results['analysis_mode']} mode, {results['total_queries_found']} queries found")
+        cache_stats = analysis_cache.get_statistics()
+        logger.info(f"Database analysis completed: {results['analysis_mode']} mode, {results['total_queries_found']} queries found "
+                    f"(analysis cache hit rate {cache_stats['hit_rate']:.0%})")
         return results
     
     async def _static_analysis(self, file_paths: List[Path]) -> Dict[str, Any]:
@@ -191,16 +197,25 @@ class DatabaseAnalyzer:
         }
     
     async def _extract_queries_from_file(self, file_path: Path) -> List[SQLQuery]:
-        """Extract SQL queries from a single file"""
-        queries: List[SQLQuery] = []
-        
+        """Extract SQL queries from a single file, reusing cached results when unchanged"""
         try:
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
-                lines = content.split('\n')
+            raw, content = read_source_file(file_path)
         except Exception as e:
             logger.debug(f"Could not read {file_path}: {e}")
-            return queries
+            return []
+        
+        key = analysis_cache.file_key(file_path, raw)
+        cached = analysis_cache.get('sql_queries', self.ANALYZER_VERSION, key)
+        if cached is not None:
+            return [SQLQuery(**query) for query in cached]
+        
+        queries = self._scan_queries(file_path, content)
+        analysis_cache.put('sql_queries', self.ANALYZER_VERSION, key, [self._query_to_dict(q) for q in queries])
+        return queries
+    
+    def _scan_queries(self, file_path: Path, content: str) -> List[SQLQuery]:
+        """Scan file content for SQL queries"""
+        queries: List[SQLQuery] = []
         
         # Extract different types of SQL queries
         for pattern_name, pattern in self.sql_patterns.items():
@@ -7,22 +7,35 @@ import asyncio
 import logging
 from datetime import datetime
 from pathlib import Path
-from typing import List, Dict, Any, Optional, Callable
+from typing import List, Dict, Any, Optional, Callable, Tuple
 import json
 import hashlib
-from concurrent.futures import ThreadPoolExecutor
 from contextlib import asynccontextmanager
 
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, update
 
+from app.core.config import settings
 from app.core.database import DocumentationJob, Repository
 from app.models.schemas import DocumentationRequest, BusinessRule
 from app.parsers.parser_factory import ParserFactory
 from app.services.ai_service import ai_service_instance
+from app.services.ai_scheduler import AIScheduler, AITaskResult
+from app.services.prompt_packing import UNATTRIBUTED, SourceFile, FileBatch, pack_files
+from app.services.code_chunker import CodeChunk, chunk_source
+from app.services.business_logic_scorer import FileScore, file_priorities, score_file
+from app.services.ai_budget import AIBudget, AIBudgetExhausted, current_budget
+from app.services.circuit_breaker import CircuitOpenError
+from app.services.ai_usage import AIUsageTracker, current_usage
+from app.services.ai_dispatcher import JobShare, current_job_share
+from app.services.prompt_minimizer import MinimizerStats, current_minimizer_stats
+from app.services.ai_response_cache import force_refresh
+from app.services.model_router import model_router
+from app.services.hierarchical_summarizer import HierarchicalSummarizer, SystemSummary
 from app.services.diagram_service import DiagramService
 from app.services.database_analyzer import database_analyzer, DatabaseTable, SQLQuery
 from app.services.integration_analyzer import integration_analyzer
+from app.services.parse_watchdog import ParseWatchdog
 from app.services.migration_dashboard import migration_dashboard
 from app.services.enhanced_documentation_integration import get_enhanced_documentation_integration
 
@@ -58,7 +71,13 @@ class DocumentationService:
         self.ai_service = ai_service_instance
         self.diagram_service = DiagramService()
         self.enhanced_integration = get_enhanced_documentation_integration()
-        self.executor = ThreadPoolExecutor(max_workers=4)
+        self.summarizer = HierarchicalSummarizer(self.ai_service)
+        
+        # Per-job report (parse outliers, skipped work, ...) persisted with the job
+        self.job_report: Dict[str, Any] = {}
+        self.ai_usage = AIUsageTracker()
+        self.system_summary: Optional[SystemSummary] = None
+        self._system_summary_ready = False
         
         # Progress tracking
         self.current_job_id = None
@@ -137,6 +156,10 @@ class DocumentationService:
     @asynccontextmanager
     async def _progress_step(self, step_key: str, **kwargs):
         """Context manager for tracking progress through a step"""
+        budget = current_budget.get()
+        if budget:
+            budget.stage = step_key
+        self.ai_usage.stage = step_key
         await self._update_progress(step_key, 0, kwargs)
         
         try:
@@ -189,6 +212,17 @@ class DocumentationService:
         start_time = datetime.utcnow()
         self.current_job_id = job_id
         self.completed_weight = 0
+        self.job_report = {}
+        self.system_summary = None
+        self._system_summary_ready = False
+        refresh_token = force_refresh.set(request.force_refresh)
+        budget = AIBudget(request.time_budget_seconds, request.ai_token_budget)
+        budget_token = current_budget.set(budget if budget.limited else None)
+        minimizer_stats = MinimizerStats()
+        minimizer_token = current_minimizer_stats.set(minimizer_stats)
+        self.ai_usage = AIUsageTracker()
+        usage_token = current_usage.set(self.ai_usage)
+        share_token = current_job_share.set(JobShare(job_id, request.ai_priority))
         
         try:
             # Update job status to processing
@@ -265,7 +299,8 @@ class DocumentationService:
                 # Generate enhanced documentation with full intelligence
                 async with self._progress_step('generating_enhanced_docs') as update_progress:
                     enhanced_docs = await self.enhanced_integration.generate_enhanced_documentation(
-                        job_id, entities, request, update_progress
+                        job_id, entities, request, update_progress,
+                        coverage=self.job_report.setdefault('coverage', {})
                     )
                     documentation.update(enhanced_docs)
             
@@ -280,6 +315,13 @@ class DocumentationService:
                         migration_analysis=migration_analysis
                     )
             
+            # Budget-limited and degraded jobs say what the AI stages covered before time or
+            # tokens ran out, or the AI backend became unavailable
+            if budget.limited:
+                self.job_report.setdefault('coverage', {})['budget'] = budget.to_dict()
+            if budget.limited or self.job_report.get('coverage', {}).get('ai_unavailable'):
+                documentation['COVERAGE.md'] = self._generate_coverage_doc(self.job_report['coverage'])
+            
             # Step 7: Save documentation
             async with self._progress_step('saving_documentation') as update_progress:
                 output_path = await self._save_documentation(documentation, diagrams, request, job_id, update_progress)
@@ -288,6 +330,17 @@ class DocumentationService:
             async with self._progress_step('finalizing') as update_progress:
                 end_time = datetime.utcnow()
                 processing_time = (end_time - start_time).total_seconds()
+                # This job's share only; process-wide counters stay on /analytics/cache-stats and /analytics/model-usage
+                self.job_report['ai_cache'] = self.ai_usage.cache_statistics()
+                self.job_report['model_routing'] = {
+                    **model_router.routing_state(),
+                    'routes': self.ai_usage.route_counts()
+                }
+                self.job_report['prompt_minimizer'] = minimizer_stats.to_dict()
+                self.job_report['ai_circuit'] = self.ai_service.circuit_breaker.get_statistics()
+                self.job_report['ai_dispatch'] = self.ai_service.dispatcher.job_statistics(job_id)
+                if budget.limited:
+                    self.job_report['coverage']['budget'] = budget.to_dict()
                 
                 await self._update_job_completion(
                     job_id=job_id,
@@ -296,7 +349,9 @@ class DocumentationService:
                     business_rules_count=len(business_rules),
                     files_processed=repo_analysis['total_files'],
                     output_path=output_path,
-                    processing_time=processing_time
+                    processing_time=processing_time,
+                    job_report=self.job_report,
+                    ai_usage=self._ai_usage_summary(repo_analysis['total_files'])
                 )
                 
                 logger.info(f"Documentation generation completed successfully for job {job_id}")
@@ -309,6 +364,13 @@ class DocumentationService:
         except Exception as e:
             logger.error(f"Error generating documentation for job {job_id}: {e}")
             await self._update_job_error(job_id, str(e))
+        finally:
+            self.ai_service.dispatcher.forget_job(job_id)
+            current_job_share.reset(share_token)
+            current_usage.reset(usage_token)
+            current_minimizer_stats.reset(minimizer_token)
+            current_budget.reset(budget_token)
+            force_refresh.reset(refresh_token)
 
     
     async def _analyze_repository(self, repo_path: str, update_progress: Callable = None) -> Dict[str, Any]:
@@ -390,56 +452,64 @@ class DocumentationService:
         
         logger.info(f"Parsing {total_files} code files")
         
-        # Parse each file with progress tracking
-        for file_path, parser in parsable_files:
-            try:
+        # Parse in isolated workers so one pathological file cannot stall the job
+        watchdog = ParseWatchdog()
+        outcomes = [None] * total_files
+        
+        async def parse_one(index: int, file_path: Path, parser):
+            outcomes[index] = await watchdog.parse_file(parser, file_path)
+            return outcomes[index]
+        
+        tasks = [
+            asyncio.create_task(parse_one(index, file_path, parser))
+            for index, (file_path, parser) in enumerate(parsable_files)
+        ]
+        try:
+            for completed in asyncio.as_completed(tasks):
+                outcome = await completed
+                processed_files += 1
+                
+                if outcome.status in ('timeout', 'failed'):
+                    logger.warning(f"Failed to parse {outcome.file_path}: {outcome.status} ({outcome.detail})")
+                
                 # Update progress
                 if update_progress:
                     progress = int((processed_files / total_files) * 100) if total_files > 0 else 0
                     await update_progress(progress, 
-                                        current_file=str(file_path),
+                                        current_file=outcome.file_path,
                                         processed_files=processed_files,
                                         total_files=total_files)
-                
-                # Parse file with enhanced analysis
-                file_entities = await asyncio.get_event_loop().run_in_executor(
-                    self.executor,
-                    self._enhanced_parse_file,
-                    parser,
-                    file_path
-                )
-                
-                if file_entities:
-                    entities.extend(file_entities)
-                    logger.debug(f"Parsed {len(file_entities)} entities from {file_path}")
-                
-                processed_files += 1
-                
-            except Exception as e:
-                logger.warning(f"Failed to parse {file_path}: {e}")
-                processed_files += 1
+        finally:
+            for task in tasks:
+                task.cancel()
+            watchdog.shutdown()
+        
+        # Collect entities in file order
+        for outcome in outcomes:
+            if outcome and outcome.entities:
+                file_path = Path(outcome.file_path)
+                entities.extend(self._enhance_entity_data(entity, file_path) for entity in outcome.entities)
+                logger.debug(f"Parsed {len(outcome.entities)} entities from {file_path}")
+        
+        self.job_report['parsing'] = self._build_parse_report([o for o in outcomes if o])
         
         logger.info(f"Code parsing complete: {len(entities)} entities extracted from {total_files} files")
         return entities
     
-    def _enhanced_parse_file(self, parser, file_path: Path) -> List[Dict]:
-        """Enhanced file parsing with additional context extraction"""
-        try:
-            # Get basic entities from parser
-            entities = parser.parse(file_path)
-            
-            # Enhance entities with additional analysis
-            enhanced_entities = []
-            for entity in entities:
-                enhanced_entity = self._enhance_entity_data(entity, file_path)
-                enhanced_entities.append(enhanced_entity)
-            
-            return enhanced_entities
-            
-        except Exception as e:
-            logger.warning(f"Enhanced parsing failed for {file_path}: {e}")
-            # Fallback to basic parsing
-            return parser.parse(file_path) if hasattr(parser, 'parse') else []
+    def _build_parse_report(self, outcomes: List, slowest_count: int = 10) -> Dict[str, Any]:
+        """Summarize parse outcomes so timed-out, skipped and slow files show up in job results"""
+        status_counts: Dict[str, int] = {}
+        for outcome in outcomes:
+            status_counts[outcome.status] = status_counts.get(outcome.status, 0) + 1
+        
+        slowest = sorted(outcomes, key=lambda o: o.elapsed_seconds, reverse=True)[:slowest_count]
+        
+        return {
+            'status_counts': status_counts,
+            'total_parse_seconds': round(sum(o.elapsed_seconds for o in outcomes), 3),
+            'outliers': [o.to_report() for o in outcomes if o.status != 'parsed'],
+            'slowest_files': [o.to_report() for o in slowest]
+        }
     
     def _enhance_entity_data(self, entity: Dict, file_path: Path) -> Dict:
         """Enhance entity data with additional context"""
@@ -480,49 +550,174 @@ class DocumentationService:
             entities_by_file[file_path].append(entity)
         
         total_files = len(entities_by_file)
-        processed_files = 0
         
         logger.info(f"Extracting business rules from {total_files} files using AI")
         
-        # Process each file with AI
+        # Read files up front so small ones can be packed into shared prompts
+        source_files = []
         for file_path, file_entities in entities_by_file.items():
             try:
-                # Update progress
-                if update_progress:
-                    progress = int((processed_files / total_files) * 100) if total_files > 0 else 0
-                    await update_progress(progress, 
-                                        current_file=file_path,
-                                        processed_files=processed_files,
-                                        total_files=total_files)
-                
-                # Read file content
                 with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
                     content = f.read()
-                
-                # Skip very large files to avoid AI context limits
-                if len(content) > 50000:  # 50KB limit
-                    logger.warning(f"Skipping large file for business rules extraction: {file_path} ({len(content)} chars)")
-                    processed_files += 1
-                    continue
-                
-                # Extract rules using AI with enhanced context
-                logger.debug(f"Processing {file_path} for business rules ({len(content)} chars, {len(file_entities)} entities)")
-                
-                file_rules = await self.ai_service.extract_business_rules(
-                    code=content,
-                    entities=file_entities,
-                    keywords=request.keywords
+            except Exception as e:
+                logger.warning(f"Failed to read {file_path} for business rules extraction: {e}")
+                continue
+            
+            source_files.append(SourceFile(file_path, content, file_entities))
+        
+        source_files, file_scores = self._prescreen_files(source_files, request)
+        
+        # Files that fit one prompt go whole (packed when small); larger files are split
+        # along class/method boundaries into chunks of about AI_CHUNK_TOKENS
+        whole_file_max_tokens = max(settings.AI_PACK_TOKEN_BUDGET, settings.AI_CHUNK_TOKENS)
+        whole_files = [sf for sf in source_files if sf.tokens <= whole_file_max_tokens]
+        chunked_files = [sf for sf in source_files if sf.tokens > whole_file_max_tokens]
+        
+        batches = pack_files(whole_files)
+        chunk_requests = []
+        for source_file in chunked_files:
+            chunks = chunk_source(source_file.content, source_file.entities)
+            if len(chunks) > settings.AI_CHUNK_MAX_PER_FILE:
+                logger.warning(f"Analyzing the first {settings.AI_CHUNK_MAX_PER_FILE} of {len(chunks)} chunks of {source_file.file_path}")
+                chunks = chunks[:settings.AI_CHUNK_MAX_PER_FILE]
+            chunk_requests.extend((source_file, chunk, len(chunks)) for chunk in chunks)
+        
+        logger.info(f"Packed {len(whole_files)} files into {len(batches)} AI requests; "
+                    f"split {len(chunked_files)} large files into {len(chunk_requests)} chunks")
+        
+        processed_files = 0
+        rules_found = 0
+        max_rules = settings.AI_MAX_RULES_PER_FILE or None
+        
+        async def on_rule(rule: BusinessRule):
+            # Rules stream in before their request finishes. This runs inside concurrent request
+            # tasks, so it only counts; progress is written from on_complete, one call at a time,
+            # because the job's database session must not be used concurrently
+            nonlocal rules_found
+            rules_found += 1
+        
+        async def extract_from_batch(batch: FileBatch) -> Dict[str, List[BusinessRule]]:
+            if len(batch.files) == 1:
+                source_file = batch.files[0]
+                logger.debug(f"Processing {source_file.file_path} for business rules ({len(source_file.content)} chars, {len(source_file.entities)} entities)")
+                rules_for_file = await self.ai_service.extract_business_rules(
+                    code=source_file.content,
+                    entities=source_file.entities,
+                    keywords=request.keywords,
+                    on_rule=on_rule,
+                    max_rules=max_rules
                 )
-                
+                return {source_file.file_path: rules_for_file}
+            
+            logger.debug(f"Processing {len(batch.files)} packed files for business rules (~{batch.tokens} tokens)")
+            return await self.ai_service.extract_business_rules_batch(batch.files, keywords=request.keywords)
+        
+        async def extract_from_chunk(source_file: SourceFile, chunk: CodeChunk) -> Dict[str, List[BusinessRule]]:
+            chunk_rules = await self.ai_service.extract_business_rules_from_chunk(
+                chunk,
+                source_file.file_path,
+                source_file.content.count('\n') + 1,
+                keywords=request.keywords,
+                on_rule=on_rule
+            )
+            return {source_file.file_path: chunk_rules}
+        
+        work = [(batch.key, [sf.file_path for sf in batch.files], lambda batch=batch: extract_from_batch(batch))
+                for batch in batches]
+        work.extend(
+            (f"{sf.file_path} [chunk {chunk.index + 1}/{chunk_count}]", [sf.file_path],
+             lambda sf=sf, chunk=chunk: extract_from_chunk(sf, chunk))
+            for sf, chunk, chunk_count in chunk_requests
+        )
+        
+        # Likely rule-dense, central and keyword-matching files first: deprioritized files
+        # are sent last, and a budget-limited job covers the most important files
+        priorities = file_priorities(source_files, file_scores, request.keywords)
+        work.sort(key=lambda item: -max(priorities[file_path] for file_path in item[1]))
+        
+        # A file counts as processed once all of its requests have finished
+        pending_requests: Dict[str, int] = {}
+        for _, file_paths, _ in work:
+            for file_path in file_paths:
+                pending_requests[file_path] = pending_requests.get(file_path, 0) + 1
+        total_files = len(pending_requests)
+        
+        async def on_complete(completed: int, total: int, result: AITaskResult):
+            nonlocal processed_files, rules_found
+            if len(work[result.index][1]) > 1:
+                rules_found += sum(len(file_rules) for file_rules in (result.result or {}).values())
+            for file_path in work[result.index][1]:
+                pending_requests[file_path] -= 1
+                if pending_requests[file_path] == 0:
+                    processed_files += 1
+            for file_path, file_rules in (result.result or {}).items():
                 if file_rules:
-                    rules.extend(file_rules)
                     logger.info(f"Extracted {len(file_rules)} business rules from {file_path}")
-                
-                processed_files += 1
-                
-            except Exception as e:
-                logger.warning(f"Failed to extract rules from {file_path}: {e}")
-                processed_files += 1
+            if update_progress:
+                await update_progress(int((processed_files / total_files) * 100),
+                                      current_file=result.key,
+                                      processed_files=processed_files,
+                                      total_files=total_files,
+                                      rules_found=rules_found)
+        
+        # Many requests in flight at once; results come back in submission order
+        scheduler = AIScheduler()
+        results = await scheduler.run(
+            [(key, factory) for key, _, factory in work],
+            on_complete=on_complete
+        )
+        
+        rules_by_file: Dict[str, List[BusinessRule]] = {}
+        for result in results:
+            if result.ok and result.result:
+                for file_path, file_rules in result.result.items():
+                    rules_by_file.setdefault(file_path, []).extend(file_rules)
+        chunked_paths = {source_file.file_path for source_file in chunked_files}
+        for source_file in source_files:
+            file_rules = rules_by_file.get(source_file.file_path, [])
+            if source_file.file_path in chunked_paths:
+                file_rules = self._deduplicate_rules(file_rules)
+            rules.extend(file_rules)
+        # Rules from packed prompts that name none of the batch's files keep their own code reference
+        unattributed_rules = rules_by_file.get(UNATTRIBUTED, [])
+        rules.extend(unattributed_rules)
+        
+        self.job_report['business_rules'] = {
+            'files': total_files,
+            'ai_requests': len(work),
+            'packed_files': sum(len(batch.files) for batch in batches if len(batch.files) > 1),
+            'chunked_files': len(chunked_files),
+            'unattributed_rules': len(unattributed_rules),
+            'failed_requests': [
+                {'request': result.key, 'status': result.status, 'detail': result.error}
+                for result in results if not result.ok and result.status not in ('skipped', 'circuit_open')
+            ]
+        }
+        
+        # Which files every request, some requests or no request completed for
+        file_outcomes: Dict[str, List[bool]] = {}
+        for result in results:
+            for file_path in work[result.index][1]:
+                file_outcomes.setdefault(file_path, []).append(result.ok)
+        not_analyzed = sorted(path for path, outcomes in file_outcomes.items() if not any(outcomes))
+        skipped_requests = sum(1 for result in results if result.status == 'skipped')
+        circuit_open_requests = [result for result in results if result.status == 'circuit_open']
+        self.job_report.setdefault('coverage', {})['business_rules'] = {
+            'files': len(file_outcomes),
+            'files_analyzed': sum(1 for outcomes in file_outcomes.values() if all(outcomes)),
+            'files_partial': sum(1 for outcomes in file_outcomes.values() if any(outcomes) and not all(outcomes)),
+            'files_not_analyzed': len(not_analyzed),
+            'requests_skipped_by_budget': skipped_requests,
+            'requests_failed_fast': len(circuit_open_requests),
+            'not_analyzed': not_analyzed
+        }
+        if circuit_open_requests:
+            self.job_report['coverage']['ai_unavailable'] = circuit_open_requests[-1].error
+            logger.warning(f"AI backend unavailable: {len(circuit_open_requests)} rule extraction requests failed fast, "
+                           f"{len(not_analyzed)} files not analyzed")
+        if skipped_requests:
+            logger.warning(f"AI budget ran out: {skipped_requests} rule extraction requests not sent, "
+                           f"{len(not_analyzed)} files not analyzed")
         
         logger.info(f"Business rule extraction complete: {len(rules)} total rules extracted from {total_files} files")
         
@@ -530,6 +725,160 @@ class DocumentationService:
         rules.sort(key=lambda r: r.confidence_score, reverse=True)
         
         return rules
+    
+    async def _get_system_summary(self, entities: List[Dict], business_rules: List[BusinessRule]) -> Optional[str]:
+        """
+        Hierarchical module/subsystem/system summary for the overview and architecture
+        prompts, computed once per job. None for small repositories, or if summarizing fails.
+        """
+        if not self._system_summary_ready:
+            try:
+                self.system_summary = await self.summarizer.summarize(entities, business_rules)
+            except AIBudgetExhausted:
+                raise
+            except Exception as e:
+                logger.warning(f"Hierarchical summarization failed, using the flat component list: {e}")
+                self.system_summary = None
+            self._system_summary_ready = True
+            if self.system_summary:
+                self.job_report['system_summary'] = self.system_summary.to_report()
+        return self.system_summary.to_prompt_section() if self.system_summary else None
+    
+    async def _run_with_fallback(
+        self,
+        label: str,
+        call: Callable,
+        fallback: Callable[[str], str]
+    ) -> str:
+        """
+        Run a single AI generation call under the job's budget. If the budget is already
+        spent or runs out mid-call, or the AI backend is unavailable (circuit open), return
+        fallback(reason) and note it in the coverage report.
+        """
+        budget = current_budget.get()
+        reason = budget.check() if budget else None
+        if not reason:
+            try:
+                if budget is None:
+                    return await call()
+                return await asyncio.wait_for(call(), budget.remaining_seconds())
+            except (asyncio.TimeoutError, AIBudgetExhausted):
+                if budget is None:
+                    raise
+                reason = budget.check() or "AI budget exhausted"
+            except CircuitOpenError as e:
+                reason = str(e)
+                self.job_report.setdefault('coverage', {})['ai_unavailable'] = reason
+        
+        logger.warning(f"Skipping AI {label} generation: {reason}")
+        self.job_report.setdefault('coverage', {}).setdefault('skipped_generation', []).append(
+            {'document': label, 'reason': reason}
+        )
+        return fallback(reason)
+    
+    def _generate_coverage_doc(self, coverage: Dict[str, Any]) -> str:
+        """Markdown summary of what a budget-limited or degraded job's AI stages covered"""
+        budget = coverage.get('budget', {})
+        lines = ["# AI Analysis Coverage", ""]
+        if coverage.get('ai_unavailable'):
+            lines.append(f"The AI backend became unavailable during this job ({coverage['ai_unavailable']}). "
+                         f"AI calls were stopped and the remaining documents contain static analysis only; "
+                         f"rerun the job once the backend is reachable to fill in the gaps.")
+        elif budget.get('exhausted'):
+            lines.append(f"The AI budget ran out during **{budget.get('exhausted_at_stage') or 'the job'}** "
+                         f"({budget.get('exhausted_reason')}). Work was done in priority order, so the "
+                         f"results below cover the most business-critical code first.")
+        elif budget:
+            lines.append("All AI stages completed within the budget.")
+        if budget:
+            lines += [
+                "",
+                "## Budget",
+                "",
+                f"- Time budget: {budget.get('time_budget_seconds') or 'none'} s (elapsed {budget.get('elapsed_seconds')} s)",
+                f"- Token budget: {budget.get('token_budget') or 'none'} (used {budget.get('tokens_used')})",
+            ]
+        
+        sections = [('business_rules', 'Business rule extraction'), ('enhanced_business_rules', 'Enhanced rule extraction')]
+        for key, title in sections:
+            stage = coverage.get(key)
+            if not stage:
+                continue
+            lines += [
+                "",
+                f"## {title}",
+                "",
+                f"- Files fully analyzed: {stage['files_analyzed']} of {stage['files']}",
+                f"- Files partially analyzed: {stage.get('files_partial', 0)}",
+                f"- Files not analyzed: {stage['files_not_analyzed']}",
+            ]
+            unit = 'Requests' if 'requests_skipped_by_budget' in stage else 'Files'
+            skipped = stage.get('requests_skipped_by_budget', stage.get('files_skipped_by_budget'))
+            if skipped:
+                lines.append(f"- {unit} skipped when the budget ran out: {skipped}")
+            failed_fast = stage.get('requests_failed_fast', stage.get('files_failed_fast'))
+            if failed_fast:
+                lines.append(f"- {unit} failed fast while the AI backend was unavailable: {failed_fast}")
+            if stage.get('not_analyzed'):
+                lines += ["", "Not analyzed:", ""]
+                lines += [f"- `{file_path}`" for file_path in stage['not_analyzed']]
+        
+        if coverage.get('skipped_generation'):
+            lines += ["", "## Generation skipped", ""]
+            lines += [f"- {item['document']}: {item['reason']}" for item in coverage['skipped_generation']]
+        
+        return "\n".join(lines) + "\n"
+    
+    def _prescreen_files(
+        self,
+        source_files: List[SourceFile],
+        request: DocumentationRequest
+    ) -> Tuple[List[SourceFile], Dict[str, FileScore]]:
+        """
+        Score files for likely business-rule density and, unless AI_PRESCREEN_MODE is
+        "deprioritize" or "off", drop those below AI_PRESCREEN_MIN_SCORE. Files that
+        mention a requested keyword are always kept. Every skip goes into the job report.
+        """
+        mode = settings.AI_PRESCREEN_MODE.lower()
+        file_scores = {source_file.file_path: score_file(source_file) for source_file in source_files}
+        keywords = [keyword.lower() for keyword in request.keywords or []]
+        
+        kept, skipped, below_threshold = [], [], 0
+        for source_file in source_files:
+            file_score = file_scores[source_file.file_path]
+            if mode == 'off' or file_score.score >= settings.AI_PRESCREEN_MIN_SCORE:
+                kept.append(source_file)
+                continue
+            below_threshold += 1
+            if mode == 'deprioritize' or any(keyword in source_file.content.lower() for keyword in keywords):
+                kept.append(source_file)
+            else:
+                skipped.append(file_score)
+        
+        self.job_report['prescreen'] = {
+            'mode': mode,
+            'min_score': settings.AI_PRESCREEN_MIN_SCORE,
+            'scored_files': len(source_files),
+            'below_threshold': below_threshold,
+            'skipped_files': len(skipped),
+            'skipped': [
+                {'file': file_score.file_path, 'score': file_score.score, 'reason': file_score.reason or 'low score'}
+                for file_score in sorted(skipped, key=lambda s: s.file_path)
+            ]
+        }
+        if skipped:
+            logger.info(f"Pre-screen skipped {len(skipped)} of {len(source_files)} files with no likely business rules")
+        
+        return kept, file_scores
+    
+    def _deduplicate_rules(self, rules: List[BusinessRule]) -> List[BusinessRule]:
+        """Merge rules found more than once (e.g. in overlapping chunks), keeping the most confident"""
+        best: Dict[tuple, BusinessRule] = {}
+        for rule in rules:
+            key = (rule.category.lower(), ' '.join(rule.description.lower().split()))
+            if key not in best or rule.confidence_score > best[key].confidence_score:
+                best[key] = rule
+        return list(best.values())
 
     
     async def _generate_documentation_content(
@@ -578,10 +927,24 @@ class DocumentationService:
         if update_progress:
             await update_progress(20, current_task="Generating AI overview")
         
-        overview = await self.ai_service.generate_overview(
-            entities=entities,
-            business_rules=business_rules,
-            depth=request.depth
+        async def generate_overview() -> str:
+            system_summary = await self._get_system_summary(entities, business_rules)
+            return await self.ai_service.generate_overview(
+                entities=entities,
+                business_rules=business_rules,
+                depth=request.depth,
+                system_summary=system_summary
+            )
+        
+        overview = await self._run_with_fallback(
+            'overview',
+            generate_overview,
+            lambda reason: (
+                f"*AI overview not generated ({reason}); see COVERAGE.md.*\n\n"
+                f"The repository contains {len(entities)} code entities in "
+                f"{len({entity.get('file_path') for entity in entities})} files, with "
+                f"{len(business_rules)} business rules extracted."
+            )
         )
         
         # Step 2: Generate repository structure
@@ -862,8 +1225,16 @@ Documentation Depth: {request.depth.value}
         if update_progress:
             await update_progress(20, current_task="Preparing architecture analysis")
         
+        async def generate_architecture_doc() -> str:
+            system_summary = await self._get_system_summary(entities, [])
+            return await self.ai_service.generate_architecture_doc(entities, request.depth, system_summary)
+        
         # Enhanced architecture documentation with AI
-        architecture_doc = await self.ai_service.generate_architecture_doc(entities, request.depth)
+        architecture_doc = await self._run_with_fallback(
+            'architecture',
+            generate_architecture_doc,
+            lambda reason: f"# Architecture\n\n*AI architecture analysis not generated ({reason}); see COVERAGE.md.*\n"
+        )
         
         if update_progress:
             await update_progress(100, current_task="Architecture documentation complete")
@@ -1643,7 +2014,9 @@ Please check the logs for more details.
         business_rules_count: int,
         files_processed: int,
         output_path: str,
-        processing_time: float
+        processing_time: float,
+        job_report: Optional[Dict[str, Any]] = None,
+        ai_usage: Optional[Dict[str, Any]] = None
     ):
         """Update job with completion details"""
         query = update(DocumentationJob).where(
@@ -1655,7 +2028,9 @@ Please check the logs for more details.
             business_rules_count=business_rules_count,
             files_processed=files_processed,
             output_path=output_path,
-            processing_time_seconds=processing_time
+            processing_time_seconds=processing_time,
+            job_report=job_report,
+            ai_usage=ai_usage
         )
         
         # Execute with robust error handling for job completion
@@ -1700,6 +2075,16 @@ Please check the logs for more details.
                     except Exception as fallback_error:
                         logger.critical(f"💥 COMPLETE FAILURE: Cannot update job {job_id} completion: {fallback_error}")
     
+    def _ai_usage_summary(self, total_files: Optional[int] = None) -> Dict[str, Any]:
+        """The job's AI usage, with tokens per file for the job and for the rule extraction stages"""
+        files_by_stage = {}
+        if self.job_report.get('business_rules', {}).get('files'):
+            files_by_stage['extracting_business_rules'] = self.job_report['business_rules']['files']
+        enhanced = self.job_report.get('coverage', {}).get('enhanced_business_rules', {})
+        if enhanced.get('files'):
+            files_by_stage['generating_enhanced_docs'] = enhanced['files']
+        return self.ai_usage.to_dict(files=total_files, files_by_stage=files_by_stage)
+    
     async def _update_job_error(self, job_id: str, error_message: str):
         """Update job with error status"""
         query = update(DocumentationJob).where(
@@ -1707,7 +2092,9 @@ Please check the logs for more details.
         ).values(
             status="failed",
             completed_at=datetime.utcnow(),
-            error_message=error_message
+            error_message=error_message,
+            job_report=self.job_report,
+            ai_usage=self._ai_usage_summary()
         )
         
         await self.db.execute(query)
@@ -3,19 +3,37 @@ Enhanced AI Service with Code Intelligence Integration
 Provides context-aware AI prompting using the CodeIntelligenceGraph
 """
 
+import re
 import json
 import logging
 import asyncio
-from typing import List, Dict, Any, Optional, Tuple
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, List, Dict, Any, Optional, Tuple
 from pathlib import Path
 
+from app.core.config import settings
 from app.services.ai_service import AIService
+from app.services.ai_scheduler import AIScheduler, AITaskResult
+from app.services.prompt_packing import estimate_tokens
+from app.services.streaming_json import IncrementalJSONArrayParser
 from app.services.code_intelligence import CodeIntelligenceGraph, CodeEntityData, BusinessRuleContext
 from app.models.schemas import BusinessRule, DocumentationDepth
 from app.core.logging_config import get_logger
 
 logger = get_logger(__name__)
 
+# Lines of an entity's declaration shown when explaining its rules
+EXPLANATION_EXCERPT_LINES = 25
+
+
+@dataclass
+class ExplanationBatch:
+    """Rules explained in one prompt, keyed by (batch-unique) rule ID, with their entities' code"""
+    rules: List[Tuple[str, BusinessRuleContext]] = field(default_factory=list)
+    excerpts: Dict[str, str] = field(default_factory=dict)  # Entity id -> code excerpt
+    tokens: int = 0
+
+
 class EnhancedAIService:
     """
     Enhanced AI service that leverages code intelligence for better context-aware analysis
@@ -59,7 +77,7 @@ class EnhancedAIService:
         
         try:
             # Use base AI service for actual LLM call
-            raw_rules = await self._call_ai_service_for_rules(prompt)
+            raw_rules = await self._call_ai_service_for_rules(prompt, full_code, [entity])
             
             # Convert to enhanced business rule contexts
             enhanced_rules = []
@@ -80,6 +98,250 @@ class EnhancedAIService:
             logger.error(f"Error extracting enhanced business rules for {entity_id}: {e}")
             return []
     
+    async def extract_business_rules_for_file(
+        self,
+        file_path: str,
+        entity_ids: List[str],
+        full_code: str,
+        keywords: Optional[List[str]] = None
+    ) -> List[BusinessRuleContext]:
+        """
+        Extract business rules for all entities of one file in a single call, with the
+        related-entity context of the whole file, and map each rule back to its entity
+        """
+        unit_entities = [self.graph.entities[entity_id] for entity_id in entity_ids if entity_id in self.graph.entities]
+        if not unit_entities:
+            logger.warning(f"No entities of {file_path} found in intelligence graph")
+            return []
+        
+        primary = self._primary_entity(unit_entities)
+        hierarchy_path = self.graph.get_entity_hierarchy(primary.id)
+        related_entities = self._related_entities_for_unit(unit_entities)
+        related_code_snippets = await self._get_related_code_snippets(primary, related_entities)
+        
+        prompt = self._create_enhanced_business_rule_prompt(
+            entity=primary,
+            full_code=full_code,
+            hierarchy_path=hierarchy_path,
+            related_entities=related_entities,
+            related_code_snippets=related_code_snippets,
+            keywords=keywords,
+            unit_entities=unit_entities
+        )
+        
+        # Failures (including AIBudgetExhausted and CircuitOpenError) propagate so the
+        # scheduler reports the file as failed, skipped or circuit_open
+        raw_rules = await self._call_ai_service_for_rules(prompt, full_code, unit_entities)
+        
+        # Plain English is filled in afterwards, many rules per call (generate_plain_english_explanations)
+        enhanced_rules = []
+        for rule in raw_rules:
+            entity = self._entity_for_rule(rule, unit_entities, primary)
+            enhanced_rules.append(
+                self._convert_to_enhanced_rule(rule, entity, self.graph.get_entity_hierarchy(entity.id))
+            )
+        
+        logger.info(f"Extracted {len(enhanced_rules)} enhanced business rules for {len(unit_entities)} entities in {file_path}")
+        return enhanced_rules
+    
+    def _primary_entity(self, unit_entities: List[CodeEntityData]) -> CodeEntityData:
+        """The entity a file is presented as: its first class or interface, else its first entity"""
+        by_line = sorted(unit_entities, key=lambda e: e.line_number or 0)
+        return next((e for e in by_line if e.type in ['class', 'interface']), by_line[0])
+    
+    def _related_entities_for_unit(self, unit_entities: List[CodeEntityData], limit: int = 10) -> List[CodeEntityData]:
+        """Entities outside the unit related to its members, most widely referenced first"""
+        unit_ids = {e.id for e in unit_entities}
+        counts: Dict[str, int] = {}
+        related_by_id: Dict[str, CodeEntityData] = {}
+        for entity in unit_entities:
+            for related in self.graph.find_related_entities(entity.id, max_depth=2):
+                if related.id in unit_ids:
+                    continue
+                counts[related.id] = counts.get(related.id, 0) + 1
+                related_by_id[related.id] = related
+        ranked = sorted(counts, key=lambda entity_id: -counts[entity_id])
+        return [related_by_id[entity_id] for entity_id in ranked[:limit]]
+    
+    def _entity_for_rule(
+        self,
+        rule: BusinessRule,
+        unit_entities: List[CodeEntityData],
+        default: CodeEntityData
+    ) -> CodeEntityData:
+        """Map a rule to the unit entity its code_reference names, or the one containing its line"""
+        reference = rule.code_reference or ''
+        for entity in unit_entities:
+            if entity.id in reference:
+                return entity
+        
+        # The file path often matches the class name, so only the part after it names an entity
+        for file_reference in ([default.file_path, Path(default.file_path).name] if default.file_path else []):
+            if file_reference in reference:
+                reference = reference.split(file_reference, 1)[1]
+                break
+        segments = [segment for segment in re.split(r'[\s:.#()/\\,]+', reference) if segment]
+        named = [e for e in unit_entities if e.name in segments]
+        if named:
+            # Prefer the most specific match: methods over classes, later declarations over earlier
+            return max(named, key=lambda e: (e.type in ['method', 'function'], e.line_number or 0))
+        
+        line_numbers = [int(segment) for segment in segments if segment.isdigit()]
+        if line_numbers:
+            enclosing = [e for e in unit_entities if e.line_number and e.line_number <= line_numbers[-1]]
+            if enclosing:
+                return max(enclosing, key=lambda e: e.line_number)
+        
+        return default
+    
+    async def generate_plain_english_explanations(
+        self,
+        rules: List[BusinessRuleContext],
+        on_complete: Optional[Callable[[int, int, AITaskResult], Awaitable[None]]] = None
+    ) -> int:
+        """
+        Fill in plain_english for many rules at once. Rules are packed into prompts under
+        AI_EXPLAIN_TOKEN_BUDGET, run through the AI scheduler, and matched back by rule ID;
+        rules left unexplained fall back to their description. Returns how many were explained.
+        """
+        batches = self._pack_explanation_batches(rules)
+        requests = [
+            (f"rule explanations {index + 1}/{len(batches)}", lambda batch=batch: self._explain_batch(batch))
+            for index, batch in enumerate(batches)
+        ]
+        
+        explained = 0
+        for task_result in await AIScheduler().run(requests, on_complete):
+            explanations = task_result.result if task_result.ok else {}
+            for rule_key, rule in batches[task_result.index].rules:
+                explanation = explanations.get(rule_key)
+                if explanation:
+                    rule.plain_english = explanation
+                    explained += 1
+                else:
+                    rule.plain_english = rule.description
+        
+        logger.info(f"Explained {explained}/{len(rules)} business rules in {len(batches)} AI calls")
+        return explained
+    
+    def _pack_explanation_batches(self, rules: List[BusinessRuleContext]) -> List[ExplanationBatch]:
+        """Group rules (in order, so rules of one file stay together) under the token and rule caps"""
+        file_lines: Dict[str, List[str]] = {}
+        batches: List[ExplanationBatch] = []
+        current = ExplanationBatch()
+        
+        for rule in rules:
+            entity = self.graph.entities.get(rule.code_entity_id)
+            excerpt = self._entity_excerpt(entity, file_lines) if entity else ""
+            excerpt_tokens = estimate_tokens(excerpt)
+            tokens = estimate_tokens(rule.description) + 20
+            needs_excerpt = entity is not None and entity.id not in current.excerpts
+            
+            if current.rules and (
+                current.tokens + tokens + (excerpt_tokens if needs_excerpt else 0) > settings.AI_EXPLAIN_TOKEN_BUDGET
+                or len(current.rules) >= settings.AI_EXPLAIN_MAX_RULES
+            ):
+                batches.append(current)
+                current = ExplanationBatch()
+                needs_excerpt = entity is not None
+            
+            # Rule IDs are the keys the model answers with, so they must be unique within a prompt
+            rule_key = rule.rule_id
+            suffix = 2
+            while any(key == rule_key for key, _ in current.rules):
+                rule_key = f"{rule.rule_id}#{suffix}"
+                suffix += 1
+            
+            current.rules.append((rule_key, rule))
+            if needs_excerpt:
+                current.excerpts[entity.id] = excerpt
+                tokens += excerpt_tokens
+            current.tokens += tokens
+        
+        if current.rules:
+            batches.append(current)
+        return batches
+    
+    def _entity_excerpt(self, entity: CodeEntityData, file_lines: Dict[str, List[str]]) -> str:
+        """The first lines of an entity's declaration, reading each file once"""
+        if entity.file_path not in file_lines:
+            try:
+                with open(entity.file_path, 'r', encoding='utf-8', errors='ignore') as f:
+                    file_lines[entity.file_path] = f.read().split('\n')
+            except Exception as e:
+                logger.warning(f"Could not read code for {entity.file_path}: {e}")
+                file_lines[entity.file_path] = []
+        
+        lines = file_lines[entity.file_path]
+        start = max(0, (entity.line_number or 1) - 1)
+        return '\n'.join(lines[start:start + EXPLANATION_EXCERPT_LINES])
+    
+    async def _explain_batch(self, batch: ExplanationBatch) -> Dict[str, str]:
+        """One AI call explaining every rule of a batch; returns explanations keyed by rule ID"""
+        prompt = self._create_batch_explanation_prompt(batch)
+        completion = await self.ai_service.generate_content(
+            prompt,
+            max_tokens=min(4000, 300 + 150 * len(batch.rules)),
+            temperature=0.2
+        )
+        
+        explanations = {}
+        for item in IncrementalJSONArrayParser().feed(completion):
+            rule_key = str(item.get('rule_id', ''))
+            explanation = str(item.get('explanation') or '').strip()
+            if rule_key and explanation:
+                explanations[rule_key] = explanation
+        return explanations
+    
+    def _create_batch_explanation_prompt(self, batch: ExplanationBatch) -> str:
+        """Prompt translating several rules at once, with each implementing entity's code shown once"""
+        code_sections = []
+        for entity_id, excerpt in batch.excerpts.items():
+            entity = self.graph.entities[entity_id]
+            code_sections.append(
+                f"### {entity.type.title()} \"{entity.name}\" ({entity.file_path}:{entity.line_number or 'N/A'})\n"
+                f"```{Path(entity.file_path).suffix.lstrip('.')}\n{excerpt}\n```"
+            )
+        
+        rule_lines = []
+        for rule_key, rule in batch.rules:
+            entity = self.graph.entities.get(rule.code_entity_id)
+            location = f"{entity.type} \"{entity.name}\" in {rule.module_path or entity.file_path}" if entity else rule.module_path
+            rule_lines.append(f"- **{rule_key}** [{rule.category}] {rule.description} (implemented in {location})")
+        
+        code_context = "\n\n".join(code_sections)
+        rules_context = "\n".join(rule_lines)
+        
+        return f"""# 🧠 ARCHITECT-FOCUSED BUSINESS RULE TRANSLATOR
+
+You are a senior software architect who translates technical business rules into clear explanations that maintain precise code traceability. Your goal is to help architects understand BOTH the business purpose AND exactly where to find the implementation.
+
+## 💻 IMPLEMENTATION CODE
+{code_context}
+
+## 🎯 RULES TO TRANSLATE
+{rules_context}
+
+## 📝 OUTPUT FORMAT
+
+For every rule, write a two-part explanation in one to three sentences:
+"Business Rule → Implementation details (boundary spans)"
+
+1. **Business purpose in plain English** - what business rule does this enforce?
+2. **Precise implementation** - specific method names, class names and file locations, using arrow notation (→) for method call chains
+3. **Boundary crossings** in parentheses (e.g. validation→business→data)
+
+Example: "Customers cannot make payments for negative amounts or exceed their approved credit limit → implemented in PaymentValidator.validateAmount() called from PaymentService.processPayment() (spanning validation→business→external services)"
+
+Return ONLY a JSON array with one object per rule, using the rule IDs exactly as given above:
+
+```json
+[
+  {{"rule_id": "BR-payment-001", "explanation": "..."}}
+]
+```
+"""
+    
     async def generate_comprehensive_overview(
         self,
         depth: DocumentationDepth,
@@ -139,7 +401,8 @@ class EnhancedAIService:
         hierarchy_path: List[CodeEntityData],
         related_entities: List[CodeEntityData],
         related_code_snippets: Dict[str, str],
-        keywords: Optional[List[str]] = None
+        keywords: Optional[List[str]] = None,
+        unit_entities: Optional[List[CodeEntityData]] = None
     ) -> str:
         """Create enhanced business rule extraction prompt with full context"""
         
@@ -167,6 +430,19 @@ class EnhancedAIService:
         if keywords:
             keywords_context = f"\\n## 🎯 FOCUS KEYWORDS\\nPay special attention to business logic involving: {', '.join(keywords)}"
         
+        # Every entity of the file when the whole file is analyzed in one call
+        unit_context = ""
+        if unit_entities and len(unit_entities) > 1:
+            entity_lines = "\n".join([
+                f"- {e.type.title()} \"{e.name}\" (line {e.line_number or 'N/A'}) [id: {e.id}]"
+                for e in sorted(unit_entities, key=lambda e: e.line_number or 0)
+            ])
+            unit_context = (
+                f"\n## 🧩 ENTITIES IN THIS FILE\n"
+                f"Extract rules for all of these entities. Set each rule's code_reference to "
+                f"\"{entity.file_path}:EntityName:line_number\" naming the entity that implements it.\n{entity_lines}"
+            )
+        
         # Get module and class context for better categorization
         module_context = next((e.name for e in hierarchy_path if e.type == 'module'), 'Unknown')
         class_context = next((e.name for e in hierarchy_path if e.type in ['class', 'interface']), None)
@@ -183,6 +459,7 @@ You are a senior business analyst with deep understanding of software architectu
 **Class Context**: {class_context or 'N/A'}
 **File**: {entity.file_path}
 **Line**: {entity.line_number or 'N/A'}
+{unit_context}
 
 ## 🔗 RELATED SYSTEM COMPONENTS
 
@@ -777,16 +1054,18 @@ Generate an architect-focused explanation that enables immediate code navigation
             logger.warning(f"Could not generate plain English for rule {rule.rule_id}: {e}")
             return rule.description  # Fallback to technical description
     
-    async def _call_ai_service_for_rules(self, prompt: str) -> List[BusinessRule]:
-        """Call base AI service for business rule extraction"""
-        # Create a dummy code and entities list for the base service
-        # The real context is in the enhanced prompt
-        dummy_entities = [{"type": "analysis", "name": "enhanced_context"}]
-        return await self.ai_service.extract_business_rules(
-            code=prompt,  # The enhanced prompt contains all context
-            entities=dummy_entities,
-            keywords=None
-        )
+    async def _call_ai_service_for_rules(
+        self,
+        prompt: str,
+        code: str,
+        entities: List[CodeEntityData]
+    ) -> List[BusinessRule]:
+        """Send the enhanced prompt as-is; wrapping it in the base rule prompt would truncate it"""
+        routing_entities = [
+            {'type': e.type, 'name': e.name, 'file_path': e.file_path, 'complexity': e.complexity}
+            for e in entities
+        ]
+        return await self.ai_service.extract_business_rules_from_prompt(prompt, code, routing_entities)
     
     async def _call_ai_service_for_content(self, prompt: str, max_tokens: int = 3000) -> str:
         """Call base AI service for content generation"""
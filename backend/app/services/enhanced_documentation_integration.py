@@ -16,6 +16,7 @@ from app.services.enhanced_diagram_service import EnhancedDiagramService, get_en
 from app.services.hierarchical_documentation_builder import HierarchicalDocumentationBuilder, get_hierarchical_documentation_builder
 from app.services.enhanced_migration_dashboard import EnhancedMigrationDashboard, get_enhanced_migration_dashboard
 from app.services.ai_service import ai_service_instance
+from app.services.ai_scheduler import AIScheduler, AITaskResult
 from app.models.schemas import DocumentationRequest, BusinessRule
 from app.core.logging_config import get_logger
 
@@ -40,14 +41,19 @@ class EnhancedDocumentationIntegration:
         job_id: str,
         entities: List[Dict[str, Any]],
         request: DocumentationRequest,
-        update_progress: Optional[Callable] = None
+        update_progress: Optional[Callable] = None,
+        coverage: Optional[Dict[str, Any]] = None
     ) -> Dict[str, str]:
         """
-        Generate comprehensive enhanced documentation with full intelligence analysis
+        Generate comprehensive enhanced documentation with full intelligence analysis.
+        What the AI stages covered is recorded in the caller's per-job coverage dict, since
+        this service is shared by concurrent jobs.
         """
         logger.info(f"Starting enhanced documentation generation for job {job_id}")
         
         documentation = {}
+        if coverage is None:
+            coverage = {}
         
         try:
             # Step 1: Build Code Intelligence Graph
@@ -62,7 +68,9 @@ class EnhancedDocumentationIntegration:
                 await update_progress(25, status="Extracting enhanced business rules", 
                                     current_task="Analyzing business logic with full code context")
             
-            enhanced_business_rules = await self._extract_enhanced_business_rules(entities, update_progress)
+            enhanced_business_rules = await self._extract_enhanced_business_rules(
+                entities, coverage, update_progress, request.keywords
+            )
             
             # Step 3: Generate Hierarchical Business Rules Documentation
             if update_progress:
@@ -139,72 +147,120 @@ class EnhancedDocumentationIntegration:
     async def _extract_enhanced_business_rules(
         self, 
         entities: List[Dict[str, Any]], 
-        update_progress: Optional[Callable] = None
+        coverage: Dict[str, Any],
+        update_progress: Optional[Callable] = None,
+        keywords: Optional[List[str]] = None
     ) -> List[Dict[str, Any]]:
-        """Extract business rules using enhanced AI service with full context"""
+        """
+        Extract business rules using enhanced AI service with full context.
+        Entities are grouped by file: one AI call per file covers all of its entities,
+        and the most connected, complex and keyword-relevant files go first.
+        Files left unanalyzed and an unavailable AI backend are recorded in coverage.
+        """
         logger.info("Extracting enhanced business rules with full code context")
         
-        enhanced_rules = []
-        total_entities = len(entities)
+        # Group graph entities by file, remembering the parsed entity behind each id
+        entity_ids_by_file: Dict[str, List[str]] = {}
+        entities_by_id: Dict[str, Dict[str, Any]] = {}
+        for entity in entities:
+            entity_key = f"{entity.get('file_path', '')}:{entity.get('type', '')}:{entity.get('name', '')}"
+            entity_id = self.intelligence_builder.entity_id_map.get(entity_key)
+            if not entity_id or entity_id in entities_by_id:
+                continue
+            entities_by_id[entity_id] = entity
+            entity_ids_by_file.setdefault(entity.get('file_path', ''), []).append(entity_id)
+        
+        async def extract_file(file_path: str, entity_ids: List[str]):
+            # Get full code content (no 4KB limit), read once per file
+            full_code = await self._get_full_code_content(file_path)
+            return await self.enhanced_ai_service.extract_business_rules_for_file(
+                file_path=file_path,
+                entity_ids=entity_ids,
+                full_code=full_code,
+                keywords=keywords
+            )
         
-        # Process entities in batches to manage memory and API calls
-        batch_size = 10
-        for i in range(0, len(entities), batch_size):
-            batch = entities[i:i + batch_size]
-            
-            # Update progress based on batch completion (25% to 40% range)
-            progress_percent = 25 + int((i / total_entities) * 15)
-            if update_progress:
+        file_order = sorted(
+            entity_ids_by_file,
+            key=lambda file_path: -self._file_priority(file_path, entity_ids_by_file[file_path], keywords)
+        )
+        requests = [
+            (file_path, lambda file_path=file_path: extract_file(file_path, entity_ids_by_file[file_path]))
+            for file_path in file_order
+        ]
+        total_files = len(requests)
+        
+        async def on_complete(completed: int, total: int, task_result: AITaskResult):
+            # Progress over the 25% to 35% range as files finish
+            if update_progress and (completed % 5 == 0 or completed == total):
                 await update_progress(
-                    progress_percent, 
-                    status="Extracting enhanced business rules", 
-                    current_task=f"Processing entities {i+1}-{min(i+batch_size, total_entities)} of {total_entities}"
+                    25 + int((completed / total) * 10),
+                    status="Extracting enhanced business rules",
+                    current_task=f"Extracted rules from {completed}/{total} files"
                 )
-            
-            for entity_idx, entity in enumerate(batch):
-                try:
-                    # Get entity from intelligence graph
-                    entity_key = f"{entity.get('file_path', '')}:{entity.get('type', '')}:{entity.get('name', '')}"
-                    entity_id = self.intelligence_builder.entity_id_map.get(entity_key)
-                    
-                    if not entity_id:
-                        continue
-                    
-                    # Get full code content (no 4KB limit)
-                    full_code = await self._get_full_code_content(entity.get('file_path', ''))
-                    
-                    # Get related entities for cross-file context
-                    related_entities = self.intelligence_graph.find_related_entities(entity_id, max_depth=2)
-                    
-                    # Extract rules with enhanced context
-                    entity_rules = await self.enhanced_ai_service.extract_business_rules_with_context(
-                        entity_id=entity_id,
-                        full_code=full_code,
-                        related_entities=related_entities,
-                        keywords=None  # Could be extracted from request
-                    )
-                    
-                    # Add rules to intelligence graph
-                    for rule in entity_rules:
-                        self.intelligence_graph.add_business_rule(rule)
-                        enhanced_rules.append({
-                            'rule_context': rule,
-                            'entity': entity
-                        })
-                    
-                    # Update progress for individual entity completion
-                    entities_processed = i + entity_idx + 1
-                    if update_progress and entities_processed % 5 == 0:  # Update every 5 entities
-                        fine_progress = 25 + int((entities_processed / total_entities) * 15)
-                        await update_progress(
-                            fine_progress,
-                            status="Extracting enhanced business rules",
-                            current_task=f"Extracted rules from {entities_processed}/{total_entities} entities"
-                        )
-                    
-                except Exception as e:
-                    logger.warning(f"Error extracting enhanced rules for entity {entity.get('name', 'unknown')}: {e}")
+        
+        if update_progress:
+            await update_progress(
+                25,
+                status="Extracting enhanced business rules",
+                current_task=f"Processing {len(entities_by_id)} entities in {total_files} files"
+            )
+        
+        enhanced_rules = []
+        not_analyzed = []
+        skipped_files = 0
+        failed_fast_files = 0
+        for task_result in await AIScheduler().run(requests, on_complete):
+            if not task_result.ok:
+                not_analyzed.append(task_result.key)
+                if task_result.status == 'skipped':
+                    skipped_files += 1
+                if task_result.status == 'circuit_open':
+                    failed_fast_files += 1
+                    coverage['ai_unavailable'] = task_result.error
+                if task_result.status in ('skipped', 'circuit_open'):
                     continue
+                logger.warning(f"Error extracting enhanced rules for {task_result.key}: {task_result.error}")
+                continue
+            
+            # Add rules to intelligence graph
+            for rule in task_result.result:
+                self.intelligence_graph.add_business_rule(rule)
+                enhanced_rules.append({
+                    'rule_context': rule,
+                    'entity': entities_by_id.get(rule.code_entity_id, {})
+                })
+        
+        coverage['enhanced_business_rules'] = {
+            'files': total_files,
+            'files_analyzed': total_files - len(not_analyzed),
+            'files_not_analyzed': len(not_analyzed),
+            'files_skipped_by_budget': skipped_files,
+            'files_failed_fast': failed_fast_files,
+            'not_analyzed': sorted(not_analyzed)
+        }
+        if failed_fast_files:
+            logger.warning(f"AI backend unavailable: enhanced rule extraction failed fast for "
+                           f"{failed_fast_files} of {total_files} files")
+        if skipped_files:
+            logger.warning(f"AI budget ran out: enhanced rule extraction skipped {skipped_files} of {total_files} files")
+        
+        # Plain-English explanations, many rules per AI call
+        async def on_explained(completed: int, total: int, task_result: AITaskResult):
+            if task_result.status == 'circuit_open':
+                coverage['ai_unavailable'] = task_result.error
+            if update_progress and (completed % 5 == 0 or completed == total):
+                await update_progress(
+                    35 + int((completed / total) * 5),
+                    status="Explaining business rules",
+                    current_task=f"Explained {completed}/{total} rule batches"
+                )
+        
+        if enhanced_rules:
+            await self.enhanced_ai_service.generate_plain_english_explanations(
+                [item['rule_context'] for item in enhanced_rules],
+                on_explained
+            )
         
         # Final progress update for business rule extraction completion
         if update_progress:
@@ -214,9 +270,24 @@ class EnhancedDocumentationIntegration:
                 current_task=f"Successfully extracted {len(enhanced_rules)} enhanced business rules"
             )
         
-        logger.info(f"Extracted {len(enhanced_rules)} enhanced business rules")
+        logger.info(f"Extracted {len(enhanced_rules)} enhanced business rules from {total_files} files "
+                   f"({len(entities_by_id)} entities)")
         return enhanced_rules
     
+    def _file_priority(self, file_path: str, entity_ids: List[str], keywords: Optional[List[str]]) -> float:
+        """How early a file is analyzed: graph connections, complexity and keyword hits in its entities"""
+        connections = sum(len(self.intelligence_graph.cross_references.get(entity_id, ())) for entity_id in entity_ids)
+        complexity = sum(
+            self.intelligence_graph.entities[entity_id].complexity or 0
+            for entity_id in entity_ids if entity_id in self.intelligence_graph.entities
+        )
+        names = ' '.join(
+            [file_path] + [self.intelligence_graph.entities[entity_id].name
+                           for entity_id in entity_ids if entity_id in self.intelligence_graph.entities]
+        ).lower()
+        keyword_hits = sum(1 for keyword in keywords or [] if keyword and keyword.lower() in names)
+        return connections + complexity + 10.0 * keyword_hits
+    
     async def _generate_hierarchical_business_rules(self) -> str:
         """Generate hierarchical business rules documentation"""
         logger.info("Generating hierarchical business rules documentation")
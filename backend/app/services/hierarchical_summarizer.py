@@ -0,0 +1,285 @@
+"""
+Hierarchical map-reduce summarization of a repository for overview and architecture prompts
+
+A single overview prompt can only list a handful of entities, so on large repositories it
+describes the first few files it happens to see. The summarizer works bottom-up instead:
+each module (directory) is summarized from its entities and business rules, in parallel;
+module summaries are reduced per subsystem (top-level area under the common root), and
+subsystem summaries into one system summary. Groups too large for one reduce prompt are
+reduced in stages.
+
+Every summary is stored in the analysis cache under a hash of its inputs - the module
+digest for modules, the child summaries for the levels above - so a later run over a
+partly changed repository only re-summarizes the changed modules and their ancestors.
+"""
+
+import re
+import hashlib
+from dataclasses import dataclass, field
+from pathlib import PurePosixPath
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.logging_config import get_logger
+from app.models.schemas import BusinessRule
+from app.services.ai_budget import AIBudgetExhausted
+from app.services.ai_response_cache import force_refresh
+from app.services.ai_scheduler import AIScheduler
+from app.services.analysis_cache import analysis_cache
+from app.services.prompt_packing import estimate_tokens
+
+logger = get_logger(__name__)
+
+CACHE_NAMESPACE = 'system_summaries'
+SUMMARIZER_VERSION = '1'
+
+MODULE_SUMMARY_TOKENS = 350
+SUBSYSTEM_SUMMARY_TOKENS = 600
+SYSTEM_SUMMARY_TOKENS = 900
+MAX_RULES_PER_MODULE = 25
+
+_REFERENCE_WORD = re.compile(r'[\w$]+(?:\.[A-Za-z]\w*)?')
+
+
+@dataclass
+class SystemSummary:
+    """Result of a map-reduce pass: the system summary and the summaries it was built from"""
+    system: str
+    subsystems: Dict[str, str] = field(default_factory=dict)
+    modules: int = 0
+    summaries_generated: int = 0
+    summaries_cached: int = 0
+
+    def to_prompt_section(self) -> str:
+        """Markdown block that stands in for the raw component list in a prompt"""
+        parts = [f"**System summary** (from {self.modules} modules in {len(self.subsystems)} subsystems):",
+                 self.system]
+        for name, summary in self.subsystems.items():
+            parts.append(f"#### Subsystem `{name}`\n{summary}")
+        return "\n\n".join(parts)
+
+    def to_report(self) -> Dict[str, Any]:
+        return {
+            'modules': self.modules,
+            'subsystems': len(self.subsystems),
+            'summaries_generated': self.summaries_generated,
+            'summaries_cached': self.summaries_cached,
+        }
+
+
+def _truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut text to roughly max_tokens estimated tokens, marking the cut"""
+    tokens = estimate_tokens(text)
+    if tokens <= max_tokens:
+        return text
+    return text[:len(text) * max_tokens // tokens].rstrip() + " ..."
+
+
+def _common_parts(paths: List[Tuple[str, ...]]) -> int:
+    """Number of leading path components shared by all paths"""
+    if not paths:
+        return 0
+    shortest = min(len(parts) for parts in paths)
+    for index in range(shortest):
+        if len({parts[index] for parts in paths}) > 1:
+            return index
+    return shortest
+
+
+def group_modules(entities: List[Dict]) -> Dict[str, Dict[str, List[Dict]]]:
+    """
+    Entities grouped as {subsystem: {module: [entities]}}. Modules are directories relative
+    to the common root; directories with few entities are folded into their parent.
+    """
+    by_directory: Dict[Tuple[str, ...], List[Dict]] = {}
+    for entity in entities:
+        directory = PurePosixPath(str(entity.get('file_path') or 'unknown').replace('\\', '/')).parent.parts
+        by_directory.setdefault(directory, []).append(entity)
+
+    common = _common_parts(list(by_directory))
+    modules: Dict[Tuple[str, ...], List[Dict]] = {}
+    for directory, directory_entities in by_directory.items():
+        modules.setdefault(directory[common:], []).extend(directory_entities)
+
+    # Fold small leaf directories upwards, deepest first, so every prompt has something to say
+    for module in sorted(modules, key=len, reverse=True):
+        if module and len(modules[module]) < settings.AI_SUMMARY_MIN_MODULE_ENTITIES:
+            modules.setdefault(module[:-1], []).extend(modules.pop(module))
+
+    # Subsystems are the first component below the common root
+    grouped: Dict[str, Dict[str, List[Dict]]] = {}
+    for module, module_entities in sorted(modules.items()):
+        subsystem = module[0] if module else '(root)'
+        grouped.setdefault(subsystem, {})['/'.join(module) or '(root)'] = module_entities
+    return grouped
+
+
+class HierarchicalSummarizer:
+    """Map-reduce summaries of modules, subsystems and the whole system"""
+
+    def __init__(self, ai_service):
+        self.ai_service = ai_service
+        self.generated = 0
+        self.cached = 0
+
+    async def summarize(self, entities: List[Dict], business_rules: List[BusinessRule]) -> Optional[SystemSummary]:
+        """Summarize the repository bottom-up; None when it is small enough for a single prompt"""
+        if len(entities) < settings.AI_SUMMARY_MIN_ENTITIES:
+            return None
+
+        self.generated = 0
+        self.cached = 0
+        grouped = group_modules(entities)
+        rules_by_module = self._rules_by_module(business_rules, grouped)
+
+        # Map: every module in parallel
+        modules = [(subsystem, module, module_entities)
+                   for subsystem, subsystem_modules in grouped.items()
+                   for module, module_entities in subsystem_modules.items()]
+        results = await AIScheduler().run([
+            (module, lambda module=module, module_entities=module_entities:
+                self._summarize_module(module, module_entities, rules_by_module.get(module, [])))
+            for _, module, module_entities in modules
+        ])
+        for result in results:
+            if result.status == 'skipped':
+                raise AIBudgetExhausted(result.error or "AI budget exhausted")
+
+        module_summaries: Dict[str, List[Tuple[str, str]]] = {}
+        for (subsystem, module, module_entities), result in zip(modules, results):
+            summary = result.result if result.ok else self._module_digest(module, module_entities, [])[:1200]
+            module_summaries.setdefault(subsystem, []).append((module, summary))
+
+        # Reduce: modules into subsystems, in parallel, then subsystems into the system
+        subsystem_names = list(module_summaries)
+        reduced = await AIScheduler().run([
+            (name, lambda name=name: self._reduce('subsystem', name, module_summaries[name], SUBSYSTEM_SUMMARY_TOKENS))
+            for name in subsystem_names
+        ])
+        subsystems = {}
+        for name, result in zip(subsystem_names, reduced):
+            if result.status == 'skipped':
+                raise AIBudgetExhausted(result.error or "AI budget exhausted")
+            subsystems[name] = result.result if result.ok else "\n".join(summary for _, summary in module_summaries[name])
+
+        system = await self._reduce('system', 'system', list(subsystems.items()), SYSTEM_SUMMARY_TOKENS)
+        logger.info(f"Summarized {len(modules)} modules in {len(subsystems)} subsystems "
+                    f"({self.generated} generated, {self.cached} from cache)")
+        return SystemSummary(system, subsystems, len(modules), self.generated, self.cached)
+
+    def _rules_by_module(
+        self,
+        business_rules: List[BusinessRule],
+        grouped: Dict[str, Dict[str, List[Dict]]]
+    ) -> Dict[str, List[BusinessRule]]:
+        """Attribute rules to modules by the file path, file name or entity names they reference"""
+        module_by_path: Dict[str, str] = {}
+        module_by_name: Dict[str, str] = {}
+        for subsystem_modules in grouped.values():
+            for module, module_entities in subsystem_modules.items():
+                for entity in module_entities:
+                    file_path = str(entity.get('file_path') or '')
+                    module_by_path[file_path] = module
+                    module_by_name.setdefault(PurePosixPath(file_path.replace('\\', '/')).name, module)
+                    if entity.get('name'):
+                        module_by_name.setdefault(str(entity['name']), module)
+        paths = sorted(module_by_path, key=len, reverse=True)
+
+        rules_by_module: Dict[str, List[BusinessRule]] = {}
+        for rule in business_rules:
+            reference = rule.code_reference or ''
+            module = next((module_by_path[path] for path in paths if path and path in reference), None)
+            if module is None:
+                # File names and entity names mentioned in the reference or related entities
+                words = _REFERENCE_WORD.findall(' '.join([reference] + list(rule.related_entities or [])))
+                module = next((module_by_name[word] for word in words if word in module_by_name), None)
+            if module is not None:
+                rules_by_module.setdefault(module, []).append(rule)
+        return rules_by_module
+
+    def _module_digest(self, module: str, entities: List[Dict], rules: List[BusinessRule]) -> str:
+        """What the model is told about one module: its files, entities and business rules"""
+        by_file: Dict[str, List[str]] = {}
+        for entity in sorted(entities, key=lambda e: (str(e.get('file_path')), e.get('line_number') or 0)):
+            description = f"{entity.get('type')} {entity.get('name')}"
+            docstring = (entity.get('docstring') or '').strip().split('\n')[0][:100]
+            if docstring:
+                description += f" - {docstring}"
+            by_file.setdefault(PurePosixPath(str(entity.get('file_path'))).name, []).append(description)
+
+        lines = [f"Module: {module}"]
+        for file_name, descriptions in by_file.items():
+            lines.append(f"- {file_name}: {'; '.join(descriptions[:30])}")
+
+        if rules:
+            lines.append("Business rules:")
+            lines.extend(f"- [{rule.category}] {rule.description[:160]}" for rule in rules[:MAX_RULES_PER_MODULE])
+            if len(rules) > MAX_RULES_PER_MODULE:
+                lines.append(f"- ... and {len(rules) - MAX_RULES_PER_MODULE} more")
+        return "\n".join(lines)
+
+    async def _summarize_module(self, module: str, entities: List[Dict], rules: List[BusinessRule]) -> str:
+        digest = self._module_digest(module, entities, rules)
+        prompt = f"""Summarize this module of a software system for an architect, in at most 120 words.
+State its responsibility, its key classes or functions, the business rules it enforces and what it depends on.
+Only use the information given.
+
+{digest}"""
+        return await self._cached_summary('module', digest, prompt, MODULE_SUMMARY_TOKENS)
+
+    async def _reduce(self, level: str, name: str, children: List[Tuple[str, str]], max_tokens: int) -> str:
+        """Combine child summaries, in stages when they do not fit one prompt"""
+        if len(children) == 1 and level == 'subsystem':
+            return children[0][1]
+
+        groups: List[List[Tuple[str, str]]] = [[]]
+        group_tokens = 0
+        for child in children:
+            child_tokens = estimate_tokens(child[1])
+            if groups[-1] and group_tokens + child_tokens > settings.AI_SUMMARY_REDUCE_TOKEN_BUDGET:
+                groups.append([])
+                group_tokens = 0
+            groups[-1].append(child)
+            group_tokens += child_tokens
+
+        if len(groups) > 1 and len(groups) == len(children):
+            # Every summary fills a prompt on its own (the budget is below about two summaries),
+            # so another stage would not shrink the list; cut each to its share of one prompt
+            share = max(1, settings.AI_SUMMARY_REDUCE_TOKEN_BUDGET // len(children))
+            children = [(child_name, _truncate_to_tokens(summary, share)) for child_name, summary in children]
+            groups = [children]
+
+        if len(groups) > 1:
+            partial = await AIScheduler().run([
+                (f"{name} part {index + 1}",
+                 lambda index=index, group=group: self._reduce(level, f"{name} part {index + 1}", group, max_tokens))
+                for index, group in enumerate(groups)
+            ])
+            for result in partial:
+                if not result.ok:
+                    raise AIBudgetExhausted(result.error) if result.status == 'skipped' else RuntimeError(result.error)
+            return await self._reduce(level, name, [(result.key, result.result) for result in partial], max_tokens)
+
+        inputs = "\n\n".join(f"### {child_name}\n{summary}" for child_name, summary in children)
+        if level == 'system':
+            instructions = ("Combine these subsystem summaries into a summary of the whole system in at most 300 words: "
+                            "its purpose, main subsystems and how they relate, core business domains and rules, "
+                            "and notable technologies.")
+        else:
+            instructions = (f"Combine these module summaries into a summary of the `{name}` subsystem in at most 200 words: "
+                            "its responsibility, main modules, business rules and dependencies.")
+        prompt = f"{instructions}\nOnly use the information given.\n\n{inputs}"
+        return await self._cached_summary(level, inputs, prompt, max_tokens)
+
+    async def _cached_summary(self, level: str, content: str, prompt: str, max_tokens: int) -> str:
+        key = hashlib.sha256(f"{level}\0{content}".encode('utf-8')).hexdigest()
+        if not force_refresh.get():
+            cached = analysis_cache.get(CACHE_NAMESPACE, SUMMARIZER_VERSION, key)
+            if cached:
+                self.cached += 1
+                return cached[0]['summary']
+
+        summary = (await self.ai_service.generate_content(prompt, max_tokens=max_tokens, temperature=0.2)).strip()
+        self.generated += 1
+        analysis_cache.put(CACHE_NAMESPACE, SUMMARIZER_VERSION, key, [{'level': level, 'summary': summary}])
+        return summary
@@ -9,12 +9,14 @@ import re
 import json
 import logging
 from pathlib import Path
-from typing import Dict, List, Any, Optional, Set, Tuple
+from typing import BinaryIO, Dict, List, Any, Optional, Set, Tuple
 from dataclasses import dataclass
 from collections import defaultdict
-import xml.etree.ElementTree as ET
 
 from app.core.logging_config import get_logger
+from app.parsers.jsp_scanner import scan_jsp
+from app.parsers.xml_stream import iter_xml_elements
+from app.services.analysis_cache import HashingReader, analysis_cache, read_source_file
 
 logger = get_logger(__name__)
 
@@ -81,11 +83,13 @@ class IntegrationFlow:
 class IntegrationAnalyzer:
     """Analyzes cross-technology integration patterns for migration insights"""
     
+    # Bump whenever per-file extraction changes so cached facts are invalidated
+    ANALYZER_VERSION = "2"
+    
     def __init__(self):
         self.http_patterns = self._compile_http_patterns()
         self.rest_patterns = self._compile_rest_patterns()
         self.struts_patterns = self._compile_struts_patterns()
-        self.jsp_patterns = self._compile_jsp_patterns()
         
     def _compile_http_patterns(self) -> Dict[str, re.Pattern]:
         """Compile regex patterns for HTTP client calls"""
@@ -129,17 +133,6 @@ class IntegrationAnalyzer:
             'struts2_result': re.compile(r'@Result\s*\(\s*location\s*=\s*[\'"`]([^\'"`]*)[\'"`]', re.IGNORECASE),
         }
     
-    def _compile_jsp_patterns(self) -> Dict[str, re.Pattern]:
-        """Compile regex patterns for JSP/JSF component patterns"""
-        return {
-            'jsp_form': re.compile(r'<form[^>]*action\s*=\s*[\'"`]([^\'"`]*)[\'"`][^>]*>', re.IGNORECASE),
-            'jsp_link': re.compile(r'<a[^>]*href\s*=\s*[\'"`]([^\'"`]*)[\'"`][^>]*>', re.IGNORECASE),
-            'struts_form': re.compile(r'<s:form[^>]*action\s*=\s*[\'"`]([^\'"`]*)[\'"`][^>]*>', re.IGNORECASE),
-            'struts_link': re.compile(r'<s:url[^>]*action\s*=\s*[\'"`]([^\'"`]*)[\'"`][^>]*>', re.IGNORECASE),
-            'jsf_form': re.compile(r'<h:form[^>]*>', re.IGNORECASE),
-            'jsf_command': re.compile(r'<h:commandButton[^>]*action\s*=\s*[\'"`]([^\'"`]*)[\'"`][^>]*>', re.IGNORECASE),
-        }
-    
     async def analyze_integration_flows(self, file_paths: List[Path]) -> Dict[str, Any]:
         """
         Main analysis method - discovers integration flows across all technologies
@@ -152,7 +145,7 @@ class IntegrationAnalyzer:
         # Extract integration points from each technology
         http_calls = await self._extract_http_calls(categorized_files['frontend'])
         rest_endpoints = await self._extract_rest_endpoints(categorized_files['backend'])
-        struts_actions = await self._extract_struts_actions(categorized_files['struts'])
+        struts_actions = await self._extract_struts_actions(categorized_files['struts'] + categorized_files['config'])
         jsp_components = await self._extract_jsp_components(categorized_files['jsp'])
         
         # Build integration flows by matching patterns
@@ -176,7 +169,9 @@ class IntegrationAnalyzer:
             'migration_insights': self._generate_migration_insights(integration_flows, flow_analysis)
         }
         
-        logger.info(f"Integration analysis completed: {len(integration_flows)} flows discovered")
+        cache_stats = analysis_cache.get_statistics()
+        logger.info(f"Integration analysis completed: {len(integration_flows)} flows discovered "
+                    f"(analysis cache hit rate {cache_stats['hit_rate']:.0%})")
         return results
     
     def _categorize_files(self, file_paths: List[Path]) -> Dict[str, List[Path]]:
@@ -208,104 +203,152 @@ class IntegrationAnalyzer:
         
         return categories
     
+    def _extract_file_facts(self, namespace: str, file_path: Path, extractor, record_cls, to_dict,
+                            streaming: bool = False) -> List[Any]:
+        """
+        Run a per-file extractor, reusing cached results when the file is unchanged.
+        
+        Streaming extractors take the path and an open binary file to parse from. The
+        file is hashed as the extractor reads it, so a changed file is read once, and
+        an unchanged one is found through its stat alias without being read at all.
+        """
+        if streaming:
+            stat_key = analysis_cache.stat_key(file_path)
+            key = analysis_cache.get_content_key(namespace, self.ANALYZER_VERSION, stat_key)
+            cached = analysis_cache.get(namespace, self.ANALYZER_VERSION, key) if key else None
+            if cached is not None:
+                return [record_cls(**record) for record in cached]
+            
+            with open(file_path, 'rb') as f:
+                reader = HashingReader(f, file_path)
+                records = extractor(file_path, reader)
+                key = reader.hexdigest()
+            analysis_cache.put(namespace, self.ANALYZER_VERSION, key, [to_dict(record) for record in records])
+            analysis_cache.put_content_key(namespace, self.ANALYZER_VERSION, stat_key, key)
+            return records
+        
+        raw, content = read_source_file(file_path)
+        key = analysis_cache.file_key(file_path, raw)
+        cached = analysis_cache.get(namespace, self.ANALYZER_VERSION, key)
+        if cached is not None:
+            return [record_cls(**record) for record in cached]
+        
+        records = extractor(file_path, content)
+        analysis_cache.put(namespace, self.ANALYZER_VERSION, key, [to_dict(record) for record in records])
+        return records
+    
     async def _extract_http_calls(self, frontend_files: List[Path]) -> List[HTTPCall]:
         """Extract HTTP client calls from frontend files"""
         http_calls = []
         
         for file_path in frontend_files:
             try:
-                with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                    content = f.read()
-                    lines = content.split('\n')
-                
-                # Search for HTTP call patterns
-                for pattern_name, pattern in self.http_patterns.items():
-                    for match in pattern.finditer(content):
-                        line_number = content[:match.start()].count('\n') + 1
-                        
-                        if pattern_name.startswith('angular'):
-                            method = match.group(1).upper()
-                            url = match.group(2)
-                        elif 'ajax' in pattern_name:
-                            url = match.group(1)
-                            method = match.group(2).upper()
-                        else:
-                            continue
-                        
-                        # Extract context (function/class containing this call)
-                        context_function = self._find_containing_function(content, match.start(), lines)
-                        context_class = self._find_containing_class(content, match.start(), lines)
-                        
-                        http_call = HTTPCall(
-                            source_file=str(file_path),
-                            line_number=line_number,
-                            method=method,
-                            url_pattern=url,
-                            parameters=self._extract_url_parameters(url),
-                            context_function=context_function,
-                            context_class=context_class,
-                            is_dynamic_url='{' in url or '${' in url or ':' in url
-                        )
-                        http_calls.append(http_call)
-                        
+                http_calls.extend(self._extract_file_facts(
+                    'http_calls', file_path, self._extract_http_calls_from_file,
+                    HTTPCall, self._http_call_to_dict
+                ))
             except Exception as e:
                 logger.warning(f"Error extracting HTTP calls from {file_path}: {e}")
         
         return http_calls
     
+    def _extract_http_calls_from_file(self, file_path: Path, content: str) -> List[HTTPCall]:
+        """Extract HTTP client calls from a single frontend file"""
+        http_calls = []
+        lines = content.split('\n')
+        
+        # Search for HTTP call patterns
+        for pattern_name, pattern in self.http_patterns.items():
+            for match in pattern.finditer(content):
+                line_number = content[:match.start()].count('\n') + 1
+                
+                if pattern_name.startswith('angular'):
+                    method = match.group(1).upper()
+                    url = match.group(2)
+                elif 'ajax' in pattern_name:
+                    url = match.group(1)
+                    method = match.group(2).upper()
+                else:
+                    continue
+                
+                # Extract context (function/class containing this call)
+                context_function = self._find_containing_function(content, match.start(), lines)
+                context_class = self._find_containing_class(content, match.start(), lines)
+                
+                http_call = HTTPCall(
+                    source_file=str(file_path),
+                    line_number=line_number,
+                    method=method,
+                    url_pattern=url,
+                    parameters=self._extract_url_parameters(url),
+                    context_function=context_function,
+                    context_class=context_class,
+                    is_dynamic_url='{' in url or '${' in url or ':' in url
+                )
+                http_calls.append(http_call)
+        
+        return http_calls
+    
     async def _extract_rest_endpoints(self, backend_files: List[Path]) -> List[RESTEndpoint]:
         """Extract REST endpoint definitions from backend files"""
         rest_endpoints = []
         
         for file_path in backend_files:
             try:
-                with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                    content = f.read()
-                
-                # Detect framework
-                framework = self._detect_rest_framework(content)
-                
-                # Search for REST endpoint patterns
-                for pattern_name, pattern in self.rest_patterns.items():
-                    for match in pattern.finditer(content):
-                        line_number = content[:match.start()].count('\n') + 1
-                        
-                        if 'spring' in pattern_name:
-                            if 'requestmapping' in pattern_name:
-                                path = match.group(1)
-                                method = match.group(2).upper()
-                                handler_function = self._find_next_function(content, match.end())
-                            else:
-                                path = match.group(1)
-                                method = pattern_name.split('_')[1].upper()  # get, post, etc.
-                                handler_function = match.group(2) if match.lastindex >= 2 else self._find_next_function(content, match.end())
-                        elif 'fastapi' in pattern_name:
-                            path = match.group(1)
-                            method = pattern_name.split('_')[1].upper()
-                            handler_function = match.group(2)
-                        else:
-                            continue
-                        
-                        # Extract class context
-                        context_class = self._find_containing_class(content, match.start(), content.split('\n'))
-                        
-                        rest_endpoint = RESTEndpoint(
-                            source_file=str(file_path),
-                            line_number=line_number,
-                            method=method,
-                            path=path,
-                            handler_function=handler_function,
-                            handler_class=context_class,
-                            parameters=self._extract_rest_parameters(content, match.start()),
-                            framework=framework
-                        )
-                        rest_endpoints.append(rest_endpoint)
-                        
+                rest_endpoints.extend(self._extract_file_facts(
+                    'rest_endpoints', file_path, self._extract_rest_endpoints_from_file,
+                    RESTEndpoint, self._rest_endpoint_to_dict
+                ))
             except Exception as e:
                 logger.warning(f"Error extracting REST endpoints from {file_path}: {e}")
         
         return rest_endpoints
     
+    def _extract_rest_endpoints_from_file(self, file_path: Path, content: str) -> List[RESTEndpoint]:
+        """Extract REST endpoint definitions from a single backend file"""
+        rest_endpoints = []
+        
+        # Detect framework
+        framework = self._detect_rest_framework(content)
+        
+        # Search for REST endpoint patterns
+        for pattern_name, pattern in self.rest_patterns.items():
+            for match in pattern.finditer(content):
+                line_number = content[:match.start()].count('\n') + 1
+                
+                if 'spring' in pattern_name:
+                    if 'requestmapping' in pattern_name:
+                        path = match.group(1)
+                        method = match.group(2).upper()
+                        handler_function = self._find_next_function(content, match.end())
+                    else:
+                        path = match.group(1)
+                        method = pattern_name.split('_')[1].upper()  # get, post, etc.
+                        handler_function = match.group(2) if match.lastindex >= 2 else self._find_next_function(content, match.end())
+                elif 'fastapi' in pattern_name:
+                    path = match.group(1)
+                    method = pattern_name.split('_')[1].upper()
+                    handler_function = match.group(2)
+                else:
+                    continue
+                
+                # Extract class context
+                context_class = self._find_containing_class(content, match.start(), content.split('\n'))
+                
+                rest_endpoint = RESTEndpoint(
+                    source_file=str(file_path),
+                    line_number=line_number,
+                    method=method,
+                    path=path,
+                    handler_function=handler_function,
+                    handler_class=context_class,
+                    parameters=self._extract_rest_parameters(content, match.start()),
+                    framework=framework
+                )
+                rest_endpoints.append(rest_endpoint)
+        
+        return rest_endpoints
+    
     async def _extract_struts_actions(self, struts_files: List[Path]) -> List[StrutsAction]:
         """Extract Struts action definitions from configuration and Java files"""
         struts_actions = []
@@ -318,89 +361,88 @@ class IntegrationAnalyzer:
         for file_path in struts_files:
             if file_path.suffix == '.java':
                 try:
-                    with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                        content = f.read()
-                    
-                    # Look for Struts action class patterns
-                    class_match = self.struts_patterns['action_class'].search(content)
-                    if class_match:
-                        class_name = class_match.group(1)
-                        
-                        # Look for @Action annotations (Struts2)
-                        for action_match in self.struts_patterns['struts2_action'].finditer(content):
-                            line_number = content[:action_match.start()].count('\n') + 1
-                            action_name = action_match.group(1)
-                            
-                            # Find associated method
-                            method_name = self._find_next_function(content, action_match.end())
-                            
-                            # Look for @Result annotations
-                            result_pages = {}
-                            result_start = action_match.end()
-                            method_end = self._find_method_end(content, result_start)
-                            method_content = content[result_start:method_end]
-                            
-                            for result_match in self.struts_patterns['struts2_result'].finditer(method_content):
-                                result_pages['success'] = result_match.group(1)
-                            
-                            struts_action = StrutsAction(
-                                name=action_name,
-                                class_name=class_name,
-                                method=method_name or 'execute',
-                                path=f"/{action_name}",
-                                result_pages=result_pages,
-                                source_file=str(file_path),
-                                line_number=line_number,
-                                parameters=[]
-                            )
-                            struts_actions.append(struts_action)
-                            
+                    struts_actions.extend(self._extract_file_facts(
+                        'struts_action_classes', file_path, self._extract_struts_action_class,
+                        StrutsAction, self._struts_action_to_dict
+                    ))
                 except Exception as e:
                     logger.warning(f"Error extracting Struts actions from {file_path}: {e}")
         
         return struts_actions
     
+    def _extract_struts_action_class(self, file_path: Path, content: str) -> List[StrutsAction]:
+        """Extract annotated Struts actions from a single Java action class"""
+        struts_actions = []
+        
+        # Look for Struts action class patterns
+        class_match = self.struts_patterns['action_class'].search(content)
+        if not class_match:
+            return struts_actions
+        
+        class_name = class_match.group(1)
+        
+        # Look for @Action annotations (Struts2)
+        for action_match in self.struts_patterns['struts2_action'].finditer(content):
+            line_number = content[:action_match.start()].count('\n') + 1
+            action_name = action_match.group(1)
+            
+            # Find associated method
+            method_name = self._find_next_function(content, action_match.end())
+            
+            # Look for @Result annotations
+            result_pages = {}
+            result_start = action_match.end()
+            method_end = self._find_method_end(content, result_start)
+            method_content = content[result_start:method_end]
+            
+            for result_match in self.struts_patterns['struts2_result'].finditer(method_content):
+                result_pages['success'] = result_match.group(1)
+            
+            struts_action = StrutsAction(
+                name=action_name,
+                class_name=class_name,
+                method=method_name or 'execute',
+                path=f"/{action_name}",
+                result_pages=result_pages,
+                source_file=str(file_path),
+                line_number=line_number,
+                parameters=[]
+            )
+            struts_actions.append(struts_action)
+        
+        return struts_actions
+    
     async def _extract_jsp_components(self, jsp_files: List[Path]) -> List[JSPComponent]:
         """Extract JSP/JSF components that make backend calls"""
         jsp_components = []
         
         for file_path in jsp_files:
             try:
-                with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                    content = f.read()
-                
-                # Search for JSP/JSF component patterns
-                for pattern_name, pattern in self.jsp_patterns.items():
-                    for match in pattern.finditer(content):
-                        line_number = content[:match.start()].count('\n') + 1
-                        
-                        if pattern_name in ['jsp_form', 'struts_form']:
-                            component_type = 'form'
-                            action_url = match.group(1)
-                        elif pattern_name in ['jsp_link', 'struts_link']:
-                            component_type = 'link'
-                            action_url = match.group(1)
-                        elif pattern_name == 'jsf_command':
-                            component_type = 'button'
-                            action_url = match.group(1)
-                        else:
-                            continue
-                        
-                        jsp_component = JSPComponent(
-                            source_file=str(file_path),
-                            line_number=line_number,
-                            component_type=component_type,
-                            action_url=action_url,
-                            parameters=self._extract_jsp_parameters(content, match.start()),
-                            target_action=self._normalize_action_url(action_url)
-                        )
-                        jsp_components.append(jsp_component)
-                        
+                jsp_components.extend(self._extract_file_facts(
+                    'jsp_components', file_path, self._extract_jsp_components_from_file,
+                    JSPComponent, self._component_to_dict
+                ))
             except Exception as e:
                 logger.warning(f"Error extracting JSP components from {file_path}: {e}")
         
         return jsp_components
     
+    def _extract_jsp_components_from_file(self, file_path: Path, content: str) -> List[JSPComponent]:
+        """Extract JSP/JSF components from a single page using the shared JSP scanner"""
+        scan = scan_jsp(content)
+        
+        return [
+            JSPComponent(
+                source_file=str(file_path),
+                line_number=form_action.line_number,
+                component_type=form_action.component_type,
+                action_url=form_action.action_url,
+                parameters=scan.inputs_near(form_action.position),
+                target_action=self._normalize_action_url(form_action.action_url)
+            )
+            for form_action in scan.form_actions
+        ]
+    
     async def _build_integration_flows(self, http_calls: List[HTTPCall], rest_endpoints: List[RESTEndpoint], 
                                      struts_actions: List[StrutsAction], jsp_components: List[JSPComponent]) -> List[IntegrationFlow]:
         """Build complete integration flows by matching components across technologies"""
@@ -553,40 +595,47 @@ class IntegrationAnalyzer:
         for file_path in struts_files:
             if file_path.name.endswith('.xml'):
                 try:
-                    tree = ET.parse(file_path)
-                    root = tree.getroot()
-                    
-                    # Parse action mappings
-                    for action in root.findall('.//action'):
-                        name = action.get('name')
-                        class_name = action.get('class')
-                        method = action.get('method', 'execute')
-                        
-                        if name and class_name:
-                            # Find result pages
-                            result_pages = {}
-                            for result in action.findall('result'):
-                                result_name = result.get('name', 'success')
-                                result_location = result.text or result.get('location', '')
-                                result_pages[result_name] = result_location
-                            
-                            struts_action = StrutsAction(
-                                name=name,
-                                class_name=class_name,
-                                method=method,
-                                path=f"/{name}",
-                                result_pages=result_pages,
-                                source_file=str(file_path),
-                                line_number=0,  # XML line numbers are harder to extract
-                                parameters=[]
-                            )
-                            struts_actions.append(struts_action)
-                            
+                    struts_actions.extend(self._extract_file_facts(
+                        'struts_config_actions', file_path, self._parse_struts_config_file,
+                        StrutsAction, self._struts_action_to_dict, streaming=True
+                    ))
                 except Exception as e:
                     logger.warning(f"Error parsing Struts config {file_path}: {e}")
         
         return struts_actions
     
+    def _parse_struts_config_file(self, file_path: Path, source: BinaryIO) -> List[StrutsAction]:
+        """Stream action mappings from a single struts.xml configuration file"""
+        struts_actions = []
+        
+        # Parse action mappings; processed elements are released as we go
+        for _, action, _ in iter_xml_elements(source, end_tags=('action',)):
+            name = action.get('name')
+            class_name = action.get('class')
+            method = action.get('method', 'execute')
+            
+            if name and class_name:
+                # Find result pages
+                result_pages = {}
+                for result in action.findall('result'):
+                    result_name = result.get('name', 'success')
+                    result_location = result.text or result.get('location', '')
+                    result_pages[result_name] = result_location
+                
+                struts_action = StrutsAction(
+                    name=name,
+                    class_name=class_name,
+                    method=method,
+                    path=f"/{name}",
+                    result_pages=result_pages,
+                    source_file=str(file_path),
+                    line_number=0,  # XML line numbers are harder to extract
+                    parameters=[]
+                )
+                struts_actions.append(struts_action)
+        
+        return struts_actions
+    
     def _find_method_end(self, content: str, start: int) -> int:
         """Find the end of a method definition"""
         # Simple brace matching to find method end
@@ -604,23 +653,6 @@ class IntegrationAnalyzer:
         
         return len(content)
     
-    def _extract_jsp_parameters(self, content: str, position: int) -> List[str]:
-        """Extract parameters from JSP forms and components"""
-        params = []
-        
-        # Look for input fields in forms
-        input_pattern = r'<input[^>]*name\s*=\s*[\'"]([^\'\"]*)[\'"][^>]*>'
-        
-        # Search in a window around the position
-        start = max(0, position - 1000)
-        end = min(len(content), position + 1000)
-        window = content[start:end]
-        
-        matches = re.findall(input_pattern, window, re.IGNORECASE)
-        params.extend(matches)
-        
-        return params
-    
     def _normalize_action_url(self, url: str) -> str:
         """Normalize action URL for matching"""
         # Remove common prefixes and suffixes
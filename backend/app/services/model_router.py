@@ -0,0 +1,199 @@
+"""
+Cost- and complexity-based model routing for rule extraction
+
+Most files sent for rule extraction are small, simple classes (DTOs, enums, thin
+services) that a fast model handles as well as the large one, at a fraction of the
+latency and price. The router sends a request to the fast model when both its code
+size and its cyclomatic complexity are under the configured thresholds, and to the
+default model otherwise. Per-model call counts, latency, tokens and estimated cost are
+kept so the thresholds can be tuned against real workloads.
+"""
+
+import re
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.logging_config import get_logger
+from app.services.prompt_packing import estimate_tokens
+
+logger = get_logger(__name__)
+
+# USD per million input/output tokens, for cost estimates only
+MODEL_PRICES_PER_MILLION = {
+    'claude-3-5-haiku': (0.80, 4.00),
+    'claude-3-haiku': (0.25, 1.25),
+    'claude-3-5-sonnet': (3.00, 15.00),
+    'claude-3-7-sonnet': (3.00, 15.00),
+    'claude-sonnet-4': (3.00, 15.00),
+    'claude-3-opus': (15.00, 75.00),
+    'claude-v2': (8.00, 24.00),
+}
+
+# Decision points for languages whose parser does not report complexity (Java, JSP, ...)
+_DECISION_PATTERN = re.compile(r'\b(?:if|for|while|case|catch|elif|except)\b|&&|\|\||\?[^?.:]')
+
+# Error codes meaning the fast model cannot be used in this account/region at all
+_UNAVAILABLE_MODEL_CODES = {'AccessDeniedException', 'ResourceNotFoundException'}
+# ValidationException also covers bad request bodies (prompt too long, wrong parameters); it
+# only means the model is unavailable when the message is about the model id or access to it
+_MODEL_VALIDATION_PATTERN = re.compile(
+    r'model identifier|model id|on-demand throughput|inference profile|access to the model', re.IGNORECASE
+)
+
+
+@dataclass
+class ModelRoute:
+    """The model chosen for a request and why"""
+    model_id: str
+    tier: str  # fast, default
+    tokens: int
+    complexity: int
+    reason: str
+
+
+def model_price(model_id: str) -> Optional[tuple]:
+    """(input, output) USD per million tokens for a model id, if known"""
+    lowered = model_id.lower()
+    for pattern, price in MODEL_PRICES_PER_MILLION.items():
+        if pattern in lowered:
+            return price
+    return None
+
+
+def estimate_complexity(code: str, entities: List[Dict]) -> int:
+    """Cyclomatic complexity from parser data, or counted from decision points in the code"""
+    reported = [
+        entity['complexity'] for entity in entities
+        if isinstance(entity.get('complexity'), int) and entity.get('type') in ('function', 'method')
+    ]
+    if reported:
+        return sum(reported)
+    return 1 + len(_DECISION_PATTERN.findall(code))
+
+
+class ModelRouter:
+    """Chooses between the fast and the default model, and tracks what each costs"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._fast_model_unavailable: Optional[str] = None
+        self._stats: Dict[str, Dict] = {}
+        self._routes = {'fast': 0, 'default': 0}
+
+    @property
+    def fast_model_id(self) -> str:
+        return settings.BEDROCK_FAST_MODEL_ID
+
+    def enabled(self) -> bool:
+        return bool(
+            settings.AI_MODEL_ROUTING
+            and self.fast_model_id
+            and self.fast_model_id != settings.BEDROCK_MODEL_ID
+            and not self._fast_model_unavailable
+        )
+
+    def route(self, code: str, entities: List[Dict]) -> ModelRoute:
+        """Pick a model for a rule-extraction request over the given code"""
+        route = self._choose(code, entities)
+        self._count(route)
+        return route
+
+    def _choose(self, code: str, entities: List[Dict]) -> ModelRoute:
+        tokens = estimate_tokens(code)
+        complexity = estimate_complexity(code, entities)
+
+        if not self.enabled():
+            route = ModelRoute(settings.BEDROCK_MODEL_ID, 'default', tokens, complexity, 'routing disabled')
+        elif tokens > settings.AI_ROUTING_MAX_FAST_TOKENS:
+            route = ModelRoute(settings.BEDROCK_MODEL_ID, 'default', tokens, complexity, 'large input')
+        elif complexity > settings.AI_ROUTING_MAX_FAST_COMPLEXITY:
+            route = ModelRoute(settings.BEDROCK_MODEL_ID, 'default', tokens, complexity, 'complex code')
+        else:
+            route = ModelRoute(self.fast_model_id, 'fast', tokens, complexity, 'small and simple')
+        return route
+
+    def _count(self, route: ModelRoute):
+        with self._lock:
+            self._routes[route.tier] += 1
+
+    def route_files(self, parts: List[Tuple[str, List[Dict]]]) -> ModelRoute:
+        """Route a packed prompt: fast only if every file in it would be routed fast on its own"""
+        chosen = None
+        tokens = complexity = 0
+        for code, entities in parts:
+            route = self._choose(code, entities)
+            tokens += route.tokens
+            complexity = max(complexity, route.complexity)
+            if chosen is None or (route.tier == 'default' and chosen.tier == 'fast'):
+                chosen = route
+        route = ModelRoute(chosen.model_id, chosen.tier, tokens, complexity, chosen.reason)
+        self._count(route)
+        return route
+
+    def is_unavailable_error(self, error_code: str, message: str = '') -> bool:
+        """Whether a Bedrock error says the fast model cannot be used, rather than that the request was bad"""
+        if error_code == 'ValidationException':
+            return bool(_MODEL_VALIDATION_PATTERN.search(message) or (self.fast_model_id and self.fast_model_id in message))
+        return error_code in _UNAVAILABLE_MODEL_CODES
+
+    def disable_fast_model(self, reason: str):
+        """Stop routing to the fast model for the rest of the process (e.g. no model access)"""
+        if not self._fast_model_unavailable:
+            logger.warning(f"Fast model {self.fast_model_id} unavailable, routing everything to the default model: {reason}")
+            self._fast_model_unavailable = reason
+
+    def record(self, model_id: str, latency_seconds: float, input_tokens: int, output_tokens: int):
+        """Account one completed model call"""
+        with self._lock:
+            stats = self._stats.setdefault(model_id, {
+                'calls': 0,
+                'total_latency_seconds': 0.0,
+                'input_tokens': 0,
+                'output_tokens': 0,
+            })
+            stats['calls'] += 1
+            stats['total_latency_seconds'] += latency_seconds
+            stats['input_tokens'] += input_tokens
+            stats['output_tokens'] += output_tokens
+
+    def get_statistics(self) -> Dict:
+        """Per-model latency, tokens and estimated cost, plus how requests were routed"""
+        with self._lock:
+            models = {}
+            for model_id, stats in self._stats.items():
+                price = model_price(model_id)
+                cost = None
+                if price:
+                    cost = round(
+                        (stats['input_tokens'] * price[0] + stats['output_tokens'] * price[1]) / 1_000_000, 4
+                    )
+                models[model_id] = {
+                    **stats,
+                    'total_latency_seconds': round(stats['total_latency_seconds'], 2),
+                    'avg_latency_seconds': round(stats['total_latency_seconds'] / stats['calls'], 2),
+                    'estimated_cost_usd': cost,
+                }
+            return {
+                **self.routing_state(),
+                'routes': dict(self._routes),
+                'models': models,
+            }
+
+    def routing_state(self) -> Dict:
+        """Whether and how requests are routed right now, without any call counters"""
+        return {
+            'routing_enabled': self.enabled(),
+            'fast_model_id': self.fast_model_id,
+            'default_model_id': settings.BEDROCK_MODEL_ID,
+            'fast_model_unavailable': self._fast_model_unavailable,
+            'thresholds': {
+                'max_fast_tokens': settings.AI_ROUTING_MAX_FAST_TOKENS,
+                'max_fast_complexity': settings.AI_ROUTING_MAX_FAST_COMPLEXITY,
+            },
+        }
+
+
+# Singleton instance
+model_router = ModelRouter()
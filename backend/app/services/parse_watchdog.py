@@ -0,0 +1,263 @@
+"""
+Isolated file parsing with per-file time and size budgets
+
+Parsers run in a process pool so that a single pathological file (a minified bundle,
+a generated 200k-line class, a regex-hostile JSP) can be abandoned by terminating its
+worker instead of stalling the whole job. A pool with a stuck worker is retired: new
+files go to a fresh pool, and the old one is terminated once the parses still running
+on it have finished. Oversized files are skipped, truncated or given a structural-only
+outline depending on PARSE_OVERSIZE_POLICY.
+"""
+
+import re
+import time
+import shutil
+import asyncio
+import tempfile
+import threading
+import multiprocessing
+from dataclasses import dataclass, field
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Set
+
+from app.core.config import settings
+from app.core.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+OVERSIZE_POLICIES = ('skip', 'truncate', 'structural')
+
+# Declarations recognised by the structural-only outline (Python, Java, JS/TS, Perl, IDL)
+STRUCTURAL_PATTERN = re.compile(
+    r'^\s*(?:(?:public|private|protected|static|final|abstract|export|default|async|sealed)\s+)*'
+    r'(class|interface|enum|struct|module|def|function|sub)\s+([A-Za-z_$][\w$]*)'
+)
+
+
+@dataclass
+class ParseOutcome:
+    """Result of parsing one file under the watchdog"""
+    file_path: str
+    status: str  # parsed, truncated, structural, skipped, timeout, failed
+    size_bytes: int
+    elapsed_seconds: float
+    entities: List[Dict[str, Any]] = field(default_factory=list)
+    detail: Optional[str] = None
+
+    def to_report(self) -> Dict[str, Any]:
+        """Job report entry (without the entities themselves)"""
+        return {
+            'file_path': self.file_path,
+            'status': self.status,
+            'size_bytes': self.size_bytes,
+            'elapsed_seconds': round(self.elapsed_seconds, 3),
+            'entities': len(self.entities),
+            'detail': self.detail
+        }
+
+
+def structural_outline(file_path: Path) -> List[Dict[str, Any]]:
+    """Cheap line-oriented outline of top-level declarations for files too large to parse fully"""
+    entities = []
+    with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+        for line_number, line in enumerate(f, 1):
+            match = STRUCTURAL_PATTERN.match(line[:1000])
+            if not match:
+                continue
+            keyword, name = match.groups()
+            entity_type = 'function' if keyword in ('def', 'function', 'sub') else keyword
+            if entity_type == 'function' and line[:len(line) - len(line.lstrip())]:
+                entity_type = 'method'
+            entities.append({
+                'name': name,
+                'type': entity_type,
+                'file_path': str(file_path),
+                'line_number': line_number,
+                'structural_only': True
+            })
+    return entities
+
+
+def _truncated_copy(file_path: Path, max_bytes: int) -> Path:
+    """Copy the first max_bytes of a file, cut at a line boundary, into a scratch directory"""
+    with open(file_path, 'rb') as f:
+        head = f.read(max_bytes)
+    cut = head.rfind(b'\n')
+    if cut > 0:
+        head = head[:cut + 1]
+
+    scratch_dir = Path(tempfile.mkdtemp(prefix='parse_', dir=settings.TEMP_DIR))
+    truncated_path = scratch_dir / file_path.name
+    with open(truncated_path, 'wb') as f:
+        f.write(head)
+    return truncated_path
+
+
+def _parse_in_worker(parser, file_path: str, mode: str, max_bytes: int) -> List[Dict[str, Any]]:
+    """Worker entry point; runs in a child process"""
+    path = Path(file_path)
+
+    if mode == 'structural':
+        return structural_outline(path)
+
+    if mode == 'truncate':
+        truncated_path = _truncated_copy(path, max_bytes)
+        try:
+            entities = parser.parse(truncated_path)
+        finally:
+            shutil.rmtree(truncated_path.parent, ignore_errors=True)
+        for entity in entities:
+            entity['file_path'] = file_path
+            entity['truncated'] = True
+        return entities
+
+    return parser.parse(path)
+
+
+class ParseWatchdog:
+    """Runs parsers in isolated worker processes with a wall-clock budget per file"""
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        timeout_seconds: Optional[float] = None,
+        max_file_size_kb: Optional[int] = None,
+        oversize_policy: Optional[str] = None
+    ):
+        self.max_workers = max_workers or settings.MAX_WORKERS
+        self.timeout_seconds = timeout_seconds or settings.PARSE_TIMEOUT_SECONDS
+        self.max_bytes = (max_file_size_kb or settings.PARSE_MAX_FILE_SIZE_KB) * 1024
+        self.oversize_policy = oversize_policy or settings.PARSE_OVERSIZE_POLICY
+        if self.oversize_policy not in OVERSIZE_POLICIES:
+            logger.warning(f"Unknown PARSE_OVERSIZE_POLICY '{self.oversize_policy}', using 'structural'")
+            self.oversize_policy = 'structural'
+
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._generation = 0
+        self._lock = threading.Lock()
+        # Per pool generation: parses still running, and those whose budget has run out
+        self._pending: Dict[int, Set[Future]] = {}
+        self._abandoned: Dict[int, Set[Future]] = {}
+        # Pools with a stuck worker, waiting for their other parses to finish before termination
+        self._retiring: Dict[int, ProcessPoolExecutor] = {}
+        # Only as many files in flight as there are workers, so the budget covers parsing, not queueing
+        self._slots = asyncio.Semaphore(self.max_workers)
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                # spawn avoids forking a process that already runs an event loop and DB threads
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+                self._generation += 1
+            return self._pool, self._generation
+
+    def _submit(self, parser, file_path: Path, mode: str) -> Future:
+        pool, generation = self._get_pool()
+        future = pool.submit(_parse_in_worker, parser, str(file_path), mode, self.max_bytes)
+        future.generation = generation
+        with self._lock:
+            self._pending.setdefault(generation, set()).add(future)
+        future.add_done_callback(self._parse_done)
+        return future
+
+    def _parse_done(self, future: Future):
+        """Runs in the pool's management thread when a worker hands back a result"""
+        with self._lock:
+            self._pending.get(future.generation, set()).discard(future)
+        self._terminate_if_idle(future.generation)
+
+    def _retire_pool(self, future: Future):
+        """
+        Give up on a stuck parse. Its pool takes no new files, and is terminated once every
+        other parse on it has finished or run out of budget too, so they are not killed with it.
+        """
+        generation = future.generation
+        with self._lock:
+            self._abandoned.setdefault(generation, set()).add(future)
+            if self._pool is not None and generation == self._generation:
+                self._retiring[generation], self._pool = self._pool, None
+        self._terminate_if_idle(generation)
+
+    def _terminate_if_idle(self, generation: int):
+        with self._lock:
+            pool = self._retiring.get(generation)
+            if pool is None or not self._pending.get(generation, set()) <= self._abandoned.get(generation, set()):
+                return
+            del self._retiring[generation]
+            self._pending.pop(generation, None)
+            self._abandoned.pop(generation, None)
+        self._terminate(pool)
+
+    def _recycle_pool(self, generation: int):
+        """Kill a broken pool's workers; only the first caller for a given pool does the work"""
+        with self._lock:
+            if self._pool is None or generation != self._generation:
+                return
+            pool, self._pool = self._pool, None
+            self._pending.pop(generation, None)
+            self._abandoned.pop(generation, None)
+        self._terminate(pool)
+
+    @staticmethod
+    def _terminate(pool: ProcessPoolExecutor):
+        terminate_workers = getattr(pool, 'terminate_workers', None)
+        if terminate_workers:
+            terminate_workers()
+        else:
+            for process in list((getattr(pool, '_processes', None) or {}).values()):
+                process.terminate()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    async def parse_file(self, parser, file_path: Path) -> ParseOutcome:
+        """Parse one file, never taking longer than the configured budget"""
+        async with self._slots:
+            return await self._parse_file(parser, file_path)
+    
+    async def _parse_file(self, parser, file_path: Path) -> ParseOutcome:
+        start = time.monotonic()
+        try:
+            size_bytes = file_path.stat().st_size
+        except OSError as e:
+            return ParseOutcome(str(file_path), 'failed', 0, 0.0, detail=str(e))
+
+        mode = 'full'
+        if size_bytes > self.max_bytes:
+            if self.oversize_policy == 'skip':
+                return ParseOutcome(str(file_path), 'skipped', size_bytes, 0.0,
+                                    detail=f"larger than {self.max_bytes // 1024} KB")
+            mode = self.oversize_policy
+
+        # A pool whose worker crashed gets one retry on a fresh pool
+        for _ in range(2):
+            future = None
+            try:
+                future = self._submit(parser, file_path, mode)
+                entities = await asyncio.wait_for(asyncio.wrap_future(future), self.timeout_seconds)
+                status = 'parsed' if mode == 'full' else mode
+                return ParseOutcome(str(file_path), status, size_bytes, time.monotonic() - start, entities)
+            except asyncio.TimeoutError:
+                self._retire_pool(future)
+                logger.warning(f"Parsing {file_path} exceeded {self.timeout_seconds}s budget; worker will be terminated")
+                return ParseOutcome(str(file_path), 'timeout', size_bytes, time.monotonic() - start,
+                                    detail=f"exceeded {self.timeout_seconds}s")
+            except BrokenProcessPool:
+                self._recycle_pool(future.generation if future else self._generation)
+            except Exception as e:
+                return ParseOutcome(str(file_path), 'failed', size_bytes, time.monotonic() - start, detail=str(e))
+
+        return ParseOutcome(str(file_path), 'failed', size_bytes, time.monotonic() - start,
+                            detail="parse worker crashed")
+
+    def shutdown(self):
+        """Stop all workers, including any still stuck on an abandoned file"""
+        with self._lock:
+            retiring = list(self._retiring.values())
+            self._retiring.clear()
+        for pool in retiring:
+            self._terminate(pool)
+        self._recycle_pool(self._generation)
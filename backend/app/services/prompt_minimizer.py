@@ -0,0 +1,243 @@
+"""
+Language-aware minimization of source code before it goes into a prompt
+
+Raw files carry a lot of text that costs input tokens but tells the model nothing about
+business rules: license headers, commented-out code, Javadoc tag boilerplate, separator
+banners, long import lists and noise annotations. minimize_source drops or compresses that
+text while keeping explanatory comments, string literals and all code. Line structure is
+preserved - removed lines become empty and grouped imports take the first import's line -
+so the line numbers the model reports in code references match the original file, which
+chunking and rule-to-entity mapping keep working on.
+
+Savings are counted per job through current_minimizer_stats and reported in the job
+report, so the effect on input tokens can be compared against rule yield.
+"""
+
+import re
+from contextvars import ContextVar
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
+from app.services.prompt_packing import estimate_tokens
+
+_C_STYLE = {'.java', '.js', '.jsx', '.ts', '.tsx', '.c', '.h', '.cpp', '.hpp', '.cc', '.cs',
+            '.go', '.kt', '.kts', '.scala', '.groovy', '.swift', '.php', '.rs'}
+_HASH_STYLE = {'.py', '.pl', '.pm', '.rb', '.sh', '.bash', '.ps1', '.r', '.yaml', '.yml', '.properties'}
+_SQL_STYLE = {'.sql', '.pls', '.pkb', '.pks', '.prc', '.fnc', '.trg'}
+_MARKUP_STYLE = {'.xml', '.xsd', '.wsdl', '.html', '.htm', '.jsp', '.jspf', '.tag', '.vm', '.ftl'}
+_JAVA_IMPORTS = {'.java', '.kt', '.kts', '.scala', '.groovy'}
+
+_DOUBLE_QUOTED = r'"(?:\\.|[^"\\\n])*"'
+_SINGLE_QUOTED = r"'(?:\\.|[^'\\\n])*'"
+
+# Strings are matched alongside comments so comment markers inside literals are left alone
+_C_STYLE_PATTERN = re.compile(rf'{_DOUBLE_QUOTED}|{_SINGLE_QUOTED}|/\*.*?\*/|//[^\n]*', re.DOTALL)
+_HASH_STYLE_PATTERN = re.compile(
+    rf'"""[\s\S]*?"""|\'\'\'[\s\S]*?\'\'\'|{_DOUBLE_QUOTED}|{_SINGLE_QUOTED}|#[^\n]*'
+)
+_SQL_STYLE_PATTERN = re.compile(rf"{_SINGLE_QUOTED}|/\*.*?\*/|--[^\n]*", re.DOTALL)
+_MARKUP_PATTERN = re.compile(r'<%--.*?--%>|<!--.*?-->', re.DOTALL)
+
+_LICENSE_PATTERN = re.compile(
+    r'copyright|licen[sc]ed? |license|all rights reserved|spdx-license|\(c\)\s*\d{4}', re.IGNORECASE
+)
+# Comment text that is code rather than prose. Each alternative needs a code shape (a call,
+# an assignment, a keyword statement with its punctuation); a trailing ';' alone is not enough
+_COMMENTED_CODE_PATTERN = re.compile(
+    r'^(?:[;{}]+|\}\s*(?:else\b.*)?\{?'
+    r'|[\w.$]+\(.*\)\s*;?|.*\w\(.*\)\s*[;{]'
+    r'|[\w.$\[\]]+\s*[+\-*/]?=\s*(?:.*;|\S+|.*\w\(.*\))'
+    r'|(?:return(?:\s+[\w.$()]+)?|break|continue);'
+    r'|(?:import|package)\s+[\w.*]+;'
+    r'|(?:if|for|while|switch|catch)\s*\(.*\)\s*\{?'
+    r'|def\s+\w+\(.*\):|class\s+\w+(?:\(.*\))?:|for\s+[\w, ]+\s+in\s+\S.*:'
+    r'|(?:if|elif|while)\s+.*[=<>!(].*:|else:|try:|except\b.*:'
+    r'|(?:public|private|protected)\b.*(?:\w\(.*\)\s*(?:\{|throws\b.*)?|=\s*\S.*;)'
+    r')\s*$'
+)
+_BANNER_PATTERN = re.compile(r'^[\W_]{3,}$|^[-=*#/~+]{3,}.*[-=*#/~+]{3,}$')
+_BOILERPLATE_TAG_PATTERN = re.compile(r'^@(?:author|version|since|see|serial|generated)\b|^@(?:param\s+\w+|return|throws\s+\w+|exception\s+\w+)\s*$')
+_NOISE_ANNOTATIONS = re.compile(r'^\s*@(?:Override|SuppressWarnings(?:\([^)]*\))?|Generated(?:\([^)]*\))?|Deprecated)\s*$')
+_SERIAL_VERSION_PATTERN = re.compile(r'^\s*(?:private\s+)?static\s+final\s+long\s+serialVersionUID\b.*;\s*$')
+_JAVA_IMPORT_PATTERN = re.compile(r'^\s*import\s+(static\s+)?([\w.]+)\.(\w+|\*)\s*;\s*$')
+_SHEBANG_PATTERN = re.compile(r'^#!.*\n|^#.*coding[:=].*\n')
+
+
+@dataclass
+class MinimizerStats:
+    """Estimated input tokens before and after minimization, for one job"""
+    sections: int = 0
+    original_tokens: int = 0
+    minimized_tokens: int = 0
+
+    def record(self, original: str, minimized: str):
+        self.sections += 1
+        self.original_tokens += estimate_tokens(original)
+        self.minimized_tokens += estimate_tokens(minimized)
+
+    def to_dict(self) -> Dict[str, Any]:
+        saved = self.original_tokens - self.minimized_tokens
+        return {
+            'code_sections': self.sections,
+            'original_tokens': self.original_tokens,
+            'minimized_tokens': self.minimized_tokens,
+            'tokens_saved': saved,
+            'percent_saved': round(100.0 * saved / self.original_tokens, 1) if self.original_tokens else 0.0,
+        }
+
+
+# Stats of the job running in the current context, if it collects them
+current_minimizer_stats: ContextVar[Optional[MinimizerStats]] = ContextVar('minimizer_stats', default=None)
+
+
+def _comment_pattern(suffix: str) -> Optional[re.Pattern]:
+    if suffix in _C_STYLE:
+        return _C_STYLE_PATTERN
+    if suffix in _HASH_STYLE:
+        return _HASH_STYLE_PATTERN
+    if suffix in _SQL_STYLE:
+        return _SQL_STYLE_PATTERN
+    if suffix in _MARKUP_STYLE:
+        return _MARKUP_PATTERN
+    return None
+
+
+def _comment_text(comment: str) -> List[str]:
+    """Prose lines of a comment, without markers, leading asterisks and empty lines"""
+    body = re.sub(r'^(?:/\*\*?|<%--|<!--|//+|--|#+)|(?:\*/|--%>|-->)$', '', comment.strip())
+    lines = []
+    for line in body.split('\n'):
+        line = re.sub(r'^\s*(?:\*+|//+|#+)?\s?', '', line).strip()
+        if line:
+            lines.append(line)
+    return lines
+
+
+def _compress_comment(comment: str) -> str:
+    """A comment reduced to its prose on one line, or '' when nothing in it is worth sending"""
+    kept = [
+        line for line in _comment_text(comment)
+        if not _COMMENTED_CODE_PATTERN.match(line)
+        and not _BANNER_PATTERN.match(line)
+        and not _BOILERPLATE_TAG_PATTERN.match(line)
+    ]
+    if not kept:
+        return ''
+    text = re.sub(r'</?(?:p|br|b|i|code|pre|ul|li)\s*/?>', ' ', ' '.join(kept), flags=re.IGNORECASE)
+    text = re.sub(r'\{@(?:code|link)\s+([^}]*)\}', r'\1', text)
+    text = re.sub(r'\s+', ' ', text).strip()
+    if comment.startswith('#'):
+        return f"# {text}"
+    if comment.startswith('--'):
+        return f"-- {text}"
+    if comment.startswith('<'):
+        return f"<!-- {text} -->"
+    return f"// {text}" if comment.startswith('//') or '\n' not in comment else f"/* {text} */"
+
+
+def _blank_out(text: str) -> str:
+    """Empty lines in place of text, so the lines after it keep their numbers"""
+    return '\n' * text.count('\n')
+
+
+def _strip_license_header(content: str, pattern: re.Pattern) -> str:
+    """Blank out license and copyright comments that precede the first line of code"""
+    content = _SHEBANG_PATTERN.sub(lambda match: _blank_out(match.group(0)), content, count=1)
+    position = 0
+    kept_from = 0
+    while True:
+        while position < len(content) and content[position].isspace():
+            position += 1
+        match = pattern.match(content, position)
+        if not match or match.group(0)[:1] in ('"', "'"):
+            break
+        if _LICENSE_PATTERN.search(match.group(0)):
+            kept_from = match.end()
+        position = match.end()
+    return _blank_out(content[:kept_from]) + content[kept_from:]
+
+
+def _group_java_imports(lines: List[str]) -> List[str]:
+    """
+    Runs of Java-style imports grouped by package (import java.util.{List, Map};) on the
+    first line of the run, followed by empty lines so the line count does not change
+    """
+    grouped: List[str] = []
+    packages: Dict[str, List[str]] = {}
+    run_length = 0
+
+    def flush():
+        nonlocal run_length
+        if not run_length:
+            return
+        imports = [f"import {package}.{names[0]};" if len(names) == 1
+                   else f"import {package}.{{{', '.join(names)}}};"
+                   for package, names in packages.items()]
+        grouped.append(' '.join(imports))
+        grouped.extend([''] * (run_length - 1))
+        packages.clear()
+        run_length = 0
+
+    for line in lines:
+        match = _JAVA_IMPORT_PATTERN.match(line)
+        if match:
+            packages.setdefault((match.group(1) or '') + match.group(2), []).append(match.group(3))
+            run_length += 1
+        elif not line.strip() and run_length:
+            run_length += 1  # Blank lines inside an import block stay part of the run
+        else:
+            flush()
+            grouped.append(line)
+    flush()
+    return grouped
+
+
+def minimize_source(content: str, file_path: str = '') -> str:
+    """
+    Source with non-semantic text removed or compressed, line for line: every line of code
+    keeps its original line number. Unknown languages only lose trailing whitespace.
+    """
+    suffix = Path(file_path).suffix.lower()
+    pattern = _comment_pattern(suffix)
+
+    if pattern is not None:
+        content = _strip_license_header(content, pattern)
+
+        def replace(match: re.Match) -> str:
+            text = match.group(0)
+            # String literals (and Python docstrings) are kept as written
+            return text if text[:1] in ('"', "'") else _compress_comment(text) + _blank_out(text)
+
+        content = pattern.sub(replace, content)
+
+    lines = [line.rstrip() for line in content.split('\n')]
+    if suffix in _JAVA_IMPORTS:
+        lines = [
+            '' if _NOISE_ANNOTATIONS.match(line) or _SERIAL_VERSION_PATTERN.match(line) else line
+            for line in lines
+        ]
+        lines = _group_java_imports(lines)
+    return '\n'.join(line if line.strip() else '' for line in lines).rstrip('\n')
+
+
+def minimize_for_prompt(content: str, file_path: str = '') -> str:
+    """minimize_source when AI_PROMPT_MINIMIZE is on, recording the saving for the current job"""
+    if not settings.AI_PROMPT_MINIMIZE:
+        return content
+    minimized = minimize_source(content, file_path)
+    stats = current_minimizer_stats.get()
+    if stats is not None:
+        stats.record(content, minimized)
+    return minimized
+
+
+def summarize_entities(entities: List[Dict], limit: int = 25) -> str:
+    """Entity list for a prompt: type and name only, grouped under each file path once"""
+    by_file: Dict[str, List[str]] = {}
+    for entity in entities[:limit]:
+        by_file.setdefault(entity.get('file_path') or 'unknown', []).append(
+            f"{entity.get('type')} {entity.get('name')}"
+        )
+    return "\n".join(f"- {file_path}: {', '.join(names)}" for file_path, names in by_file.items())
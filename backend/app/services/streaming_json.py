@@ -0,0 +1,94 @@
+"""
+Incremental parsing of a JSON array of objects arriving in text fragments
+
+Used while streaming model output: each object of the first top-level array is decoded
+as soon as its closing brace arrives, instead of waiting for the whole completion and
+re-scanning it. Prose or a code fence before the array is skipped.
+"""
+
+import json
+from typing import Any, Dict, List
+
+
+class IncrementalJSONArrayParser:
+    """Feed text fragments, get back the array's objects as they complete"""
+
+    def __init__(self):
+        self._buffer = ''
+        self._position = 0  # Next unscanned character
+        self._state = 'seek'  # seek, array, object, done
+        self._object_start = 0
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self.objects_emitted = 0
+
+    @property
+    def done(self) -> bool:
+        return self._state == 'done'
+
+    def feed(self, text: str) -> List[Dict[str, Any]]:
+        """Add a fragment and return any objects completed by it"""
+        self._buffer += text
+        completed = []
+        buffer = self._buffer
+
+        while self._position < len(buffer) and self._state != 'done':
+            char = buffer[self._position]
+
+            if self._state == 'seek':
+                if char == '[':
+                    # Only an array whose first element is an object (or that is empty) counts
+                    following = buffer[self._position + 1:].lstrip()
+                    if not following:
+                        break  # Wait for more text to decide
+                    if following[0] in '{]':
+                        self._state = 'array'
+                self._position += 1
+                continue
+
+            if self._state == 'array':
+                if char == '{':
+                    self._state = 'object'
+                    self._object_start = self._position
+                    self._depth = 0
+                    continue  # Re-read the brace in object state
+                if char == ']':
+                    self._state = 'done'
+                self._position += 1
+                continue
+
+            # Inside an object: track strings so braces in values do not count
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == '\\':
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == '{':
+                self._depth += 1
+            elif char == '}':
+                self._depth -= 1
+                if self._depth == 0:
+                    raw = buffer[self._object_start:self._position + 1]
+                    try:
+                        completed.append(json.loads(raw))
+                        self.objects_emitted += 1
+                    except json.JSONDecodeError:
+                        pass  # Malformed element; keep going with the next one
+                    self._state = 'array'
+            self._position += 1
+
+        # Drop consumed text that can no longer be part of an object
+        if self._state in ('seek', 'array') and self._position > 0:
+            self._buffer = self._buffer[self._position:]
+            self._position = 0
+        elif self._state == 'object' and self._object_start > 0:
+            self._buffer = self._buffer[self._object_start:]
+            self._position -= self._object_start
+            self._object_start = 0
+
+        return completed
@@ -0,0 +1,406 @@
+#!/usr/bin/env python3
+"""
+Local Bedrock runtime stand-in for offline load testing
+
+Serves the two Bedrock runtime operations DocXP uses - InvokeModel and
+InvokeModelWithResponseStream - for the Claude Messages and legacy Text Completions
+formats, so the AI path (concurrency limits, throttle backoff, streaming, the circuit
+breaker, usage accounting) can be exercised without AWS. Point DocXP at it with:
+
+    BEDROCK_ENDPOINT_URL=http://127.0.0.1:8500
+
+Requests are not authenticated; with no AWS credentials configured DocXP signs them with
+placeholder keys. Behaviour is configurable from the command line:
+
+    --latency          time to first token: fixed:S, uniform:MIN,MAX, normal:MEAN,SD,
+                       lognormal:MEDIAN,SIGMA or exponential:MEAN (seconds)
+    --token-latency    additional seconds per output token (streamed responses are paced by it)
+    --throttle-rate    fraction of requests rejected with ThrottlingException (HTTP 429)
+    --max-concurrency  requests in flight beyond this are throttled, like an account quota
+    --error-rate       fraction of requests failing with ServiceUnavailableException (HTTP 503)
+    --responses        JSON file overriding DEFAULT_TEMPLATES (rule and text templates)
+
+Business rule prompts are answered with a JSON array of rules built from the templates,
+one set per file or entity named in the prompt; everything else gets templated Markdown.
+Template strings may use ${file}, ${entity}, ${line}, ${n} and ${model} (${body} in text).
+GET /stats reports request, throttle and token counts and the peak concurrency seen.
+"""
+
+import re
+import json
+import math
+import base64
+import random
+import struct
+import asyncio
+import argparse
+import binascii
+from dataclasses import dataclass, field
+from string import Template
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+
+DEFAULT_TEMPLATES: Dict[str, Any] = {
+    'rules_per_target': 2,
+    'max_rules': 12,
+    'rules': [
+        {
+            'id': 'BR-${n}',
+            'description': 'Stand-in rule ${n}: ${entity} validates its input before processing',
+            'confidence_score': 0.85,
+            'category': 'Validation Rules',
+            'code_reference': '${file}:${entity}(), Line ${line}',
+            'validation_logic': 'Rejects the request when required fields of ${entity} are missing',
+            'related_entities': ['${entity}'],
+            'business_impact': 'Keeps invalid data out of downstream processing'
+        },
+        {
+            'id': 'BR-${n}',
+            'description': 'Stand-in rule ${n}: ${entity} caps a calculated amount at a configured limit',
+            'confidence_score': 0.7,
+            'category': 'Calculation Rules',
+            'code_reference': '${file}:${entity}(), Line ${line}',
+            'validation_logic': 'The result never exceeds the configured maximum',
+            'related_entities': ['${entity}'],
+            'business_impact': 'Bounds the amounts charged to customers'
+        }
+    ],
+    'text_tokens': 400,
+    'text': '## Stand-in response\n\nGenerated by the local Bedrock stand-in for ${model}.\n\n${body}'
+}
+
+_FILE_HEADER = re.compile(r'^### FILE: (.+?)\s*$', re.MULTILINE)
+_CHUNK_HEADER = re.compile(r'large file: ([^,\n]+),')
+# Entity summary lines: "- path/to/File.java: class Foo, method bar"
+_ENTITY_LINE = re.compile(r'^- ([^\s*:]*[./\\][^\s:]*): (.+)$', re.MULTILINE)
+_RULE_PROMPT = re.compile(r'JSON array.*"confidence_score"', re.DOTALL)
+
+_FILLER = ("The component coordinates requests between the presentation layer and the services "
+           "that own the business data, validating input and applying configured limits. ")
+
+
+class LatencyModel:
+    """Random time-to-first-token drawn from a named distribution"""
+
+    def __init__(self, spec: str, rng: random.Random):
+        kind, _, params = spec.partition(':')
+        self.kind = kind.strip().lower()
+        self.params = [float(value) for value in params.split(',') if value.strip()]
+        self.rng = rng
+        expected = {'fixed': 1, 'uniform': 2, 'normal': 2, 'lognormal': 2, 'exponential': 1}
+        if self.kind not in expected or len(self.params) != expected[self.kind]:
+            raise ValueError(f"Invalid latency spec '{spec}'; expected one of "
+                             "fixed:S, uniform:MIN,MAX, normal:MEAN,SD, lognormal:MEDIAN,SIGMA, exponential:MEAN")
+
+    def sample(self) -> float:
+        if self.kind == 'fixed':
+            value = self.params[0]
+        elif self.kind == 'uniform':
+            value = self.rng.uniform(*self.params)
+        elif self.kind == 'normal':
+            value = self.rng.gauss(*self.params)
+        elif self.kind == 'lognormal':
+            value = self.rng.lognormvariate(math.log(self.params[0]), self.params[1])
+        else:
+            value = self.rng.expovariate(1.0 / self.params[0])
+        return max(0.0, value)
+
+
+@dataclass
+class StandInConfig:
+    latency: str = 'lognormal:1.0,0.5'
+    token_latency: float = 0.002
+    throttle_rate: float = 0.0
+    max_concurrency: int = 0  # 0 = unlimited
+    error_rate: float = 0.0
+    templates: Dict[str, Any] = field(default_factory=lambda: dict(DEFAULT_TEMPLATES))
+    seed: Optional[int] = None
+
+
+@dataclass
+class StandInStats:
+    requests: int = 0
+    completed: int = 0
+    throttled: int = 0
+    errors: int = 0
+    streamed: int = 0
+    in_flight: int = 0
+    peak_in_flight: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    by_model: Dict[str, int] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(self.__dict__)
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def prompt_text(body: Dict[str, Any]) -> str:
+    """Prompt text of a Messages or Text Completions request body"""
+    if 'messages' in body:
+        parts = [body['system']] if isinstance(body.get('system'), str) else []
+        for message in body['messages']:
+            content = message.get('content')
+            if isinstance(content, str):
+                parts.append(content)
+            else:
+                parts.extend(block.get('text', '') for block in content or [] if isinstance(block, dict))
+        return '\n'.join(parts)
+    return body.get('prompt', '')
+
+
+def _substitute(value: Any, variables: Dict[str, Any]) -> Any:
+    if isinstance(value, str):
+        return Template(value).safe_substitute(variables)
+    if isinstance(value, list):
+        return [_substitute(item, variables) for item in value]
+    if isinstance(value, dict):
+        return {key: _substitute(item, variables) for key, item in value.items()}
+    return value
+
+
+def rule_targets(prompt: str) -> List[Tuple[str, str]]:
+    """(file, entity) pairs named in a rule extraction prompt"""
+    entities: Dict[str, List[str]] = {}
+    for file_path, names in _ENTITY_LINE.findall(prompt):
+        entities.setdefault(file_path.strip(), []).extend(
+            name.strip().split(' ')[-1] for name in names.split(',') if name.strip()
+        )
+    files = _FILE_HEADER.findall(prompt) or _CHUNK_HEADER.findall(prompt) or list(entities)
+
+    targets = []
+    for file_path in files:
+        names = entities.get(file_path) or [file_path.replace('\\', '/').rsplit('/', 1)[-1].split('.')[0] or 'Component']
+        targets.extend((file_path, name) for name in names[:2])
+    return targets or [('unknown', 'Component')]
+
+
+class ResponseSynthesizer:
+    """Canned responses shaped like the ones DocXP's prompts ask for"""
+
+    def __init__(self, templates: Dict[str, Any], rng: random.Random):
+        self.templates = templates
+        self.rng = rng
+
+    def respond(self, prompt: str, model_id: str) -> str:
+        if _RULE_PROMPT.search(prompt):
+            return self._rules(prompt, model_id)
+        return self._text(model_id)
+
+    def _rules(self, prompt: str, model_id: str) -> str:
+        rules = []
+        for file_path, entity in rule_targets(prompt):
+            for template in self.templates['rules'][:self.templates['rules_per_target']]:
+                if len(rules) >= self.templates['max_rules']:
+                    break
+                rules.append(_substitute(template, {
+                    'file': file_path, 'entity': entity, 'model': model_id,
+                    'line': self.rng.randint(1, 400), 'n': f"{len(rules) + 1:03d}"
+                }))
+        return "```json\n" + json.dumps(rules, indent=2) + "\n```"
+
+    def _text(self, model_id: str) -> str:
+        repeats = max(1, self.templates['text_tokens'] * 4 // len(_FILLER))
+        return Template(self.templates['text']).safe_substitute(model=model_id, body=_FILLER * repeats)
+
+
+def encode_event(headers: Dict[str, str], payload: bytes) -> bytes:
+    """One message in the AWS event stream encoding (string headers only)"""
+    encoded_headers = b''
+    for name, value in headers.items():
+        name_bytes, value_bytes = name.encode('utf-8'), value.encode('utf-8')
+        encoded_headers += struct.pack('!B', len(name_bytes)) + name_bytes
+        encoded_headers += struct.pack('!BH', 7, len(value_bytes)) + value_bytes
+    prelude = struct.pack('!II', 16 + len(encoded_headers) + len(payload), len(encoded_headers))
+    message = prelude + struct.pack('!I', binascii.crc32(prelude)) + encoded_headers + payload
+    return message + struct.pack('!I', binascii.crc32(message))
+
+
+def _chunk(event: Dict[str, Any]) -> bytes:
+    payload = json.dumps({'bytes': base64.b64encode(json.dumps(event).encode('utf-8')).decode('ascii')})
+    return encode_event(
+        {':event-type': 'chunk', ':content-type': 'application/json', ':message-type': 'event'},
+        payload.encode('utf-8')
+    )
+
+
+def _error_response(status_code: int, code: str, message: str) -> JSONResponse:
+    return JSONResponse({'message': message}, status_code=status_code, headers={'x-amzn-ErrorType': f"{code}:"})
+
+
+class BedrockStandIn:
+    """Request handling, failure injection and statistics behind the HTTP routes"""
+
+    def __init__(self, config: StandInConfig):
+        self.config = config
+        self.rng = random.Random(config.seed)
+        self.latency = LatencyModel(config.latency, self.rng)
+        self.synthesizer = ResponseSynthesizer(config.templates, self.rng)
+        self.stats = StandInStats()
+
+    def admit(self, model_id: str) -> Optional[JSONResponse]:
+        """Error response for a request that is throttled or fails, else None (request admitted)"""
+        self.stats.requests += 1
+        self.stats.by_model[model_id] = self.stats.by_model.get(model_id, 0) + 1
+        over_quota = self.config.max_concurrency and self.stats.in_flight >= self.config.max_concurrency
+        if over_quota or self.rng.random() < self.config.throttle_rate:
+            self.stats.throttled += 1
+            return _error_response(429, 'ThrottlingException', 'Too many requests, please wait before trying again.')
+        if self.rng.random() < self.config.error_rate:
+            self.stats.errors += 1
+            return _error_response(503, 'ServiceUnavailableException', 'Service unavailable (injected by stand-in).')
+        self.stats.in_flight += 1
+        self.stats.peak_in_flight = max(self.stats.peak_in_flight, self.stats.in_flight)
+        return None
+
+    def release(self, input_tokens: int, output_tokens: int):
+        self.stats.in_flight -= 1
+        self.stats.completed += 1
+        self.stats.input_tokens += input_tokens
+        self.stats.output_tokens += output_tokens
+
+    def generate(self, body: Dict[str, Any], model_id: str) -> Tuple[str, str, int, int]:
+        """Response text, stop reason, input tokens and output tokens for a request body"""
+        prompt = prompt_text(body)
+        text = self.synthesizer.respond(prompt, model_id)
+        max_tokens = body.get('max_tokens') or body.get('max_tokens_to_sample') or 4096
+        stop_reason = 'end_turn' if 'messages' in body else 'stop_sequence'
+        if estimate_tokens(text) > max_tokens:
+            text, stop_reason = text[:max_tokens * 4], 'max_tokens'
+        return text, stop_reason, estimate_tokens(prompt), estimate_tokens(text)
+
+    async def invoke(self, model_id: str, body: Dict[str, Any]) -> Response:
+        rejected = self.admit(model_id)
+        if rejected:
+            return rejected
+        text, stop_reason, input_tokens, output_tokens = self.generate(body, model_id)
+        try:
+            await asyncio.sleep(self.latency.sample() + output_tokens * self.config.token_latency)
+        finally:
+            self.release(input_tokens, output_tokens)
+
+        if 'messages' not in body:
+            return JSONResponse({'completion': text, 'stop_reason': stop_reason, 'stop': None})
+        return JSONResponse({
+            'id': f"msg_standin_{self.stats.requests:08d}",
+            'type': 'message',
+            'role': 'assistant',
+            'model': model_id,
+            'content': [{'type': 'text', 'text': text}],
+            'stop_reason': stop_reason,
+            'stop_sequence': None,
+            'usage': {'input_tokens': input_tokens, 'output_tokens': output_tokens}
+        }, headers={
+            'x-amzn-bedrock-input-token-count': str(input_tokens),
+            'x-amzn-bedrock-output-token-count': str(output_tokens)
+        })
+
+    async def invoke_stream(self, model_id: str, body: Dict[str, Any]) -> Response:
+        rejected = self.admit(model_id)
+        if rejected:
+            return rejected
+        self.stats.streamed += 1
+        text, stop_reason, input_tokens, output_tokens = self.generate(body, model_id)
+
+        async def events():
+            sent = 0
+            try:
+                await asyncio.sleep(self.latency.sample())
+                if 'messages' in body:
+                    yield _chunk({'type': 'message_start', 'message': {
+                        'id': f"msg_standin_{self.stats.requests:08d}", 'type': 'message', 'role': 'assistant',
+                        'model': model_id, 'content': [], 'stop_reason': None,
+                        'usage': {'input_tokens': input_tokens, 'output_tokens': 1}
+                    }})
+                    yield _chunk({'type': 'content_block_start', 'index': 0, 'content_block': {'type': 'text', 'text': ''}})
+                for fragment in _fragments(text, 64):
+                    await asyncio.sleep(estimate_tokens(fragment) * self.config.token_latency)
+                    sent += len(fragment)
+                    if 'messages' in body:
+                        yield _chunk({'type': 'content_block_delta', 'index': 0,
+                                      'delta': {'type': 'text_delta', 'text': fragment}})
+                    else:
+                        yield _chunk({'completion': fragment, 'stop_reason': None, 'stop': None})
+                if 'messages' in body:
+                    yield _chunk({'type': 'content_block_stop', 'index': 0})
+                    yield _chunk({'type': 'message_delta', 'delta': {'stop_reason': stop_reason, 'stop_sequence': None},
+                                  'usage': {'output_tokens': output_tokens}})
+                    yield _chunk({'type': 'message_stop', 'amazon-bedrock-invocationMetrics': {
+                        'inputTokenCount': input_tokens, 'outputTokenCount': output_tokens
+                    }})
+                else:
+                    yield _chunk({'completion': '', 'stop_reason': stop_reason, 'stop': None})
+            finally:
+                # A client that stops reading early is only charged for what it received
+                self.release(input_tokens, estimate_tokens(text[:sent]) if sent else 0)
+
+        return StreamingResponse(events(), media_type='application/vnd.amazon.eventstream')
+
+
+def _fragments(text: str, size: int) -> Iterator[str]:
+    for start in range(0, len(text), size):
+        yield text[start:start + size]
+
+
+def create_app(config: StandInConfig) -> FastAPI:
+    standin = BedrockStandIn(config)
+    app = FastAPI(title="Bedrock runtime stand-in")
+    app.state.standin = standin
+
+    @app.post("/model/{model_id:path}/invoke")
+    async def invoke_model(model_id: str, request: Request):
+        return await standin.invoke(model_id, await request.json())
+
+    @app.post("/model/{model_id:path}/invoke-with-response-stream")
+    async def invoke_model_with_response_stream(model_id: str, request: Request):
+        return await standin.invoke_stream(model_id, await request.json())
+
+    @app.get("/stats")
+    async def stats():
+        return standin.stats.to_dict()
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Bedrock runtime stand-in for offline load testing")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8500)
+    parser.add_argument('--latency', default=StandInConfig.latency, help="e.g. fixed:0.5, lognormal:1.0,0.5")
+    parser.add_argument('--token-latency', type=float, default=StandInConfig.token_latency,
+                        help="seconds per output token")
+    parser.add_argument('--throttle-rate', type=float, default=0.0)
+    parser.add_argument('--max-concurrency', type=int, default=0, help="0 = unlimited")
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--responses', help="JSON file overriding the default rule and text templates")
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args()
+
+    templates = dict(DEFAULT_TEMPLATES)
+    if args.responses:
+        with open(args.responses, encoding='utf-8') as handle:
+            templates.update(json.load(handle))
+
+    config = StandInConfig(
+        latency=args.latency,
+        token_latency=args.token_latency,
+        throttle_rate=args.throttle_rate,
+        max_concurrency=args.max_concurrency,
+        error_rate=args.error_rate,
+        templates=templates,
+        seed=args.seed
+    )
+    print(f"[START] Bedrock stand-in on http://{args.host}:{args.port} "
+          f"(latency {config.latency}, throttle rate {config.throttle_rate}, max concurrency {config.max_concurrency or 'unlimited'})")
+    print(f"[INFO] Set BEDROCK_ENDPOINT_URL=http://{args.host}:{args.port} for DocXP")
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Tests for coalescing identical in-flight AI requests (AIService._invoke_model_async).
+Runs under pytest or as a script.
+"""
+
+import asyncio
+
+from app.services.ai_dispatcher import FairShareDispatcher
+from app.services.ai_response_cache import ai_response_cache
+from app.services.ai_service import AIService
+from app.services.ai_throttle import AdaptiveConcurrencyLimiter, TokenBudget
+from app.services.circuit_breaker import CircuitBreaker
+
+MODEL_ID = 'anthropic.claude-3-haiku-20240307-v1:0'
+BODY = {'messages': [{'role': 'user', 'content': 'Extract rules'}], 'max_tokens': 100}
+
+
+def _service(call_seconds):
+    """An AIService without a Bedrock client whose model calls take call_seconds"""
+    service = object.__new__(AIService)
+    service._limiter = AdaptiveConcurrencyLimiter(max_limit=4, initial_limit=4)
+    service._token_budget = TokenBudget(tokens_per_minute=0)
+    service.dispatcher = FairShareDispatcher(service._limiter, service._token_budget, enabled=False)
+    service.circuit_breaker = CircuitBreaker(failure_threshold=5)
+    service._in_flight = {}
+    service.coalesced_requests = 0
+    service.calls_started = 0
+    service.calls_cancelled = 0
+
+    async def call_model(model_id, body_dict, on_text=None):
+        service.calls_started += 1
+        try:
+            if on_text:
+                await on_text('[{"rule": "partial"')
+            await asyncio.sleep(call_seconds)
+        except asyncio.CancelledError:
+            service.calls_cancelled += 1
+            raise
+        if on_text:
+            await on_text('}]')
+        return {'content': [{'text': '[]'}], 'usage': {'input_tokens': 10, 'output_tokens': 5}}
+
+    service._call_model = call_model
+    return service
+
+
+def _run(scenario):
+    cache_enabled = ai_response_cache.enabled
+    ai_response_cache.enabled = False
+    try:
+        return asyncio.run(scenario())
+    finally:
+        ai_response_cache.enabled = cache_enabled
+
+
+def test_identical_requests_share_one_call():
+    service = _service(0.05)
+
+    async def scenario():
+        return await asyncio.gather(*[service._invoke_model_async(MODEL_ID, dict(BODY)) for _ in range(3)])
+
+    results = _run(scenario)
+    assert service.calls_started == 1
+    assert service.coalesced_requests == 2
+    assert all(result is results[0] for result in results)
+    assert not service._in_flight
+
+
+def test_call_is_cancelled_when_every_waiter_gives_up():
+    service = _service(5)
+
+    async def scenario():
+        waiters = [asyncio.wait_for(service._invoke_model_async(MODEL_ID, dict(BODY)), 0.05) for _ in range(2)]
+        outcomes = await asyncio.gather(*waiters, return_exceptions=True)
+        await asyncio.sleep(0.01)  # Let the cancelled call unwind before the loop shuts down
+        return outcomes, service.calls_cancelled, service._limiter.in_flight, dict(service._in_flight)
+
+    outcomes, calls_cancelled, slots_in_use, in_flight = _run(scenario)
+    assert all(isinstance(outcome, asyncio.TimeoutError) for outcome in outcomes)
+    assert calls_cancelled == 1
+    assert slots_in_use == 0  # The dispatcher slot was handed back
+    assert not in_flight
+
+
+def test_call_continues_for_remaining_waiters_without_streaming_to_departed_caller():
+    service = _service(0.1)
+    fragments = []
+
+    async def on_text(fragment):
+        fragments.append(fragment)
+        return False
+
+    async def scenario():
+        starter = asyncio.create_task(
+            asyncio.wait_for(service._invoke_model_async(MODEL_ID, dict(BODY), on_text), 0.05)
+        )
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(service._invoke_model_async(MODEL_ID, dict(BODY)))
+        starter_outcome = await asyncio.gather(starter, return_exceptions=True)
+        return starter_outcome[0], await follower
+
+    starter_outcome, follower_result = _run(scenario)
+    assert isinstance(starter_outcome, asyncio.TimeoutError)
+    assert follower_result['content'][0]['text'] == '[]'
+    assert service.calls_started == 1 and service.calls_cancelled == 0
+    assert fragments == ['[{"rule": "partial"']  # Nothing after the starter stopped waiting
+
+
+if __name__ == "__main__":
+    tests = [(name, test) for name, test in sorted(globals().items()) if name.startswith('test_') and callable(test)]
+    failed = 0
+    for name, test in tests:
+        try:
+            test()
+            print(f"✅ {name}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {name}: {type(e).__name__}: {e}")
+    print(f"{len(tests) - failed}/{len(tests)} tests passed")
+    raise SystemExit(1 if failed else 0)
@@ -0,0 +1,116 @@
+"""
+Tests for fair-share dispatch of AI calls across concurrent jobs (ai_dispatcher).
+Runs under pytest or as a script.
+"""
+
+import time
+import asyncio
+
+from app.services.ai_dispatcher import NO_JOB, FairShareDispatcher, JobShare, current_job_share
+from app.services.ai_throttle import AdaptiveConcurrencyLimiter, TokenBudget
+
+
+async def _dispatch_order(dispatcher, calls):
+    """Queue (job_id, priority, tokens) calls behind one held slot and record the order they start in"""
+    order = []
+
+    async def call(job_id, priority, tokens):
+        token = current_job_share.set(JobShare(job_id, priority))
+        try:
+            await dispatcher.acquire(tokens)
+        finally:
+            current_job_share.reset(token)
+        order.append(job_id)
+
+    dispatcher.limiter.try_acquire()  # Hold the only slot while the queues fill
+    tasks = [asyncio.create_task(call(*spec)) for spec in calls]
+    await asyncio.sleep(0)
+    for _ in calls:
+        await dispatcher.release()
+        await asyncio.sleep(0)
+    await asyncio.gather(*tasks)
+    return order
+
+
+def _single_slot_dispatcher(quantum_tokens=1000):
+    limiter = AdaptiveConcurrencyLimiter(max_limit=1, initial_limit=1)
+    return FairShareDispatcher(limiter, TokenBudget(tokens_per_minute=0), quantum_tokens=quantum_tokens, enabled=True)
+
+
+def test_dispatcher_deficit_accounting():
+    """A job starts calls until its quantum is spent, then the next job gets its turn"""
+    dispatcher = _single_slot_dispatcher()
+    calls = [('big', 1, 600)] * 3 + [('small', 1, 600)]
+    order = asyncio.run(_dispatch_order(dispatcher, calls))
+
+    # big: 1000 credit covers one call (400 left); small: one call; big: 400 + 1000 covers two
+    assert order == ['big', 'small', 'big', 'big']
+    assert not dispatcher._ring and not dispatcher._flows
+    assert dispatcher.job_statistics('big')['calls'] == 3
+    assert dispatcher.job_statistics('small')['estimated_tokens'] == 600
+
+
+def test_dispatcher_priority_weights_quantum():
+    dispatcher = _single_slot_dispatcher()
+    calls = [('high', 3, 1000)] * 4 + [('low', 1, 1000)] * 4
+    order = asyncio.run(_dispatch_order(dispatcher, calls))
+
+    assert order == ['high', 'high', 'high', 'low', 'high', 'low', 'low', 'low']
+    assert dispatcher.job_statistics('high')['priority'] == 3
+
+
+def test_dispatcher_retries_when_token_budget_refills():
+    async def scenario():
+        limiter = AdaptiveConcurrencyLimiter(max_limit=4, initial_limit=4)
+        budget = TokenBudget(tokens_per_minute=6000)  # 100 tokens a second
+        dispatcher = FairShareDispatcher(limiter, budget, quantum_tokens=1000, enabled=True)
+        assert budget.try_consume(6000) == 0.0  # Drain the bucket
+
+        started = time.monotonic()
+        first = asyncio.create_task(dispatcher.acquire(20))
+        await asyncio.sleep(0)
+        assert not first.done()
+        retry_handle = dispatcher._retry_handle
+        assert retry_handle is not None
+
+        # Further calls wait on the same timer instead of scheduling their own
+        second = asyncio.create_task(dispatcher.acquire(20))
+        await asyncio.sleep(0)
+        assert dispatcher._retry_handle is retry_handle
+
+        await asyncio.wait_for(asyncio.gather(first, second), timeout=2)
+        return time.monotonic() - started, limiter.in_flight
+
+    elapsed, in_flight = asyncio.run(scenario())
+    assert elapsed >= 0.15
+    assert in_flight == 2
+
+
+def test_dispatcher_cancelled_waiter_leaves_the_queue():
+    async def scenario():
+        dispatcher = _single_slot_dispatcher()
+        dispatcher.limiter.try_acquire()
+        waiter = asyncio.create_task(dispatcher.acquire(100))
+        await asyncio.sleep(0)
+        queued = dispatcher.get_statistics()['queued_by_job']
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        return queued, dispatcher.get_statistics()['queued_by_job']
+
+    queued, after_cancel = asyncio.run(scenario())
+    assert queued == {NO_JOB: 1}
+    assert after_cancel == {}
+
+
+if __name__ == "__main__":
+    tests = [(name, test) for name, test in sorted(globals().items()) if name.startswith('test_') and callable(test)]
+    failed = 0
+    for name, test in tests:
+        try:
+            test()
+            print(f"✅ {name}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {name}: {type(e).__name__}: {e}")
+    print(f"{len(tests) - failed}/{len(tests)} tests passed")
+    raise SystemExit(1 if failed else 0)
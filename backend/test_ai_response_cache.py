@@ -0,0 +1,142 @@
+"""
+Tests for the persistent cache of AI model responses (ai_response_cache).
+Runs under pytest or as a script.
+"""
+
+import time
+import asyncio
+import tempfile
+from pathlib import Path
+
+import app.services.ai_service as ai_service_module
+from app.services.ai_dispatcher import FairShareDispatcher
+from app.services.ai_response_cache import AIResponseCache, force_refresh, prompt_fingerprint
+from app.services.ai_service import AIService
+from app.services.ai_throttle import AdaptiveConcurrencyLimiter, TokenBudget
+from app.services.ai_usage import AIUsageTracker, current_usage
+from app.services.circuit_breaker import CircuitBreaker
+from app.services.model_router import ModelRoute
+
+MODEL_ID = 'anthropic.claude-3-haiku-20240307-v1:0'
+
+
+def test_fingerprint_covers_model_template_and_body():
+    body = {'messages': [{'role': 'user', 'content': 'Extract rules'}], 'max_tokens': 100, 'temperature': 0.2}
+    key = prompt_fingerprint('model-a', '1', body)
+    assert key == prompt_fingerprint('model-a', '1', dict(reversed(list(body.items()))))  # Key order is irrelevant
+    assert key != prompt_fingerprint('model-b', '1', body)
+    assert key != prompt_fingerprint('model-a', '2', body)
+    assert key != prompt_fingerprint('model-a', '1', {**body, 'temperature': 0.5})
+
+
+def test_force_refresh_bypasses_lookups_but_still_stores():
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = AIResponseCache(db_path=str(Path(cache_dir) / 'responses.db'), max_size_mb=10, max_age_days=30, enabled=True)
+        token = force_refresh.set(True)
+        try:
+            cache.put('key', 'model', {'text': 'fresh'})
+            assert cache.get('key') is None
+        finally:
+            force_refresh.reset(token)
+        assert cache.get('key') == {'text': 'fresh'}
+
+
+def test_response_cache_evicts_least_recently_used():
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = AIResponseCache(db_path=str(Path(cache_dir) / 'responses.db'), max_age_days=30, enabled=True)
+        response = {'text': 'x' * 100}
+        cache.max_size_bytes = 2 * len('{"text": "' + 'x' * 100 + '"}')  # Room for two entries
+
+        cache.put('a', 'model', response)
+        time.sleep(0.01)
+        cache.put('b', 'model', response)
+        time.sleep(0.01)
+        assert cache.get('a') == response  # 'b' is now least recently used
+        time.sleep(0.01)
+        cache.put('c', 'model', response)
+
+        assert cache.get('b') is None
+        assert cache.get('a') == response
+        assert cache.get('c') == response
+        assert cache.evictions == 1
+        assert cache.get_statistics()['entries'] == 2
+
+
+def test_response_cache_evicts_by_age():
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = AIResponseCache(db_path=str(Path(cache_dir) / 'responses.db'), max_size_mb=10, max_age_days=1, enabled=True)
+        cache.put('old', 'model', {'text': 'stale'})
+        cache.put('older', 'model', {'text': 'staler'})
+        two_days_ago = time.time() - 2 * 86400
+        cache._conn.execute("UPDATE responses SET created_at = ?", (two_days_ago,))
+        cache._conn.commit()
+
+        assert cache.get('old') is None  # Expired on lookup
+        cache.put('new', 'model', {'text': 'fresh'})  # Expired entries go on write
+        assert cache.evictions == 2
+        assert cache.get('new') == {'text': 'fresh'}
+        assert cache.get_statistics()['entries'] == 1
+
+
+
+def _service():
+    """An AIService without a Bedrock client whose model calls answer immediately"""
+    service = object.__new__(AIService)
+    service._limiter = AdaptiveConcurrencyLimiter(max_limit=4, initial_limit=4)
+    service._token_budget = TokenBudget(tokens_per_minute=0)
+    service.dispatcher = FairShareDispatcher(service._limiter, service._token_budget, enabled=False)
+    service.circuit_breaker = CircuitBreaker(failure_threshold=5)
+    service._in_flight = {}
+    service.coalesced_requests = 0
+
+    async def call_model(model_id, body_dict, on_text=None):
+        return {'content': [{'text': '[{"rule": "r"}]'}], 'usage': {'input_tokens': 10, 'output_tokens': 5}}
+
+    service._call_model = call_model
+    return service
+
+
+def test_job_statistics_count_only_the_jobs_own_lookups_and_routes():
+    service = _service()
+    route = ModelRoute(MODEL_ID, 'fast', 100, 1, 'small and simple')
+
+    async def job(prompts):
+        usage = AIUsageTracker()
+        current_usage.set(usage)
+        for prompt in prompts:
+            await service._invoke_routed(prompt, route, 100)
+        return usage
+
+    async def scenario():
+        warm = await job(['shared prompt'])
+        return warm, *await asyncio.gather(job(['shared prompt'] * 3), job(['other prompt']))
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = AIResponseCache(db_path=str(Path(cache_dir) / 'responses.db'), max_age_days=30, enabled=True)
+        original_cache = ai_service_module.ai_response_cache
+        ai_service_module.ai_response_cache = cache
+        try:
+            warm, repeat, other = asyncio.run(scenario())
+        finally:
+            ai_service_module.ai_response_cache = original_cache
+
+    assert warm.cache_statistics() == {'hits': 0, 'misses': 1, 'hit_rate': 0.0}
+    assert repeat.cache_statistics() == {'hits': 3, 'misses': 0, 'hit_rate': 1.0}
+    assert other.cache_statistics() == {'hits': 0, 'misses': 1, 'hit_rate': 0.0}
+    assert repeat.route_counts() == {'fast': 3, 'default': 0}
+    assert other.route_counts() == {'fast': 1, 'default': 0}
+    assert (cache.hits, cache.misses) == (3, 2)  # The process-wide counters still see everything
+
+
+if __name__ == "__main__":
+    tests = [(name, test) for name, test in sorted(globals().items()) if name.startswith('test_') and callable(test)]
+    failed = 0
+    for name, test in tests:
+        try:
+            test()
+            print(f"✅ {name}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {name}: {type(e).__name__}: {e}")
+    print(f"{len(tests) - failed}/{len(tests)} tests passed")
+    raise SystemExit(1 if failed else 0)
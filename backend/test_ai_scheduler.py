@@ -0,0 +1,123 @@
+"""
+Tests for the AI request scheduler and where the per-request timeout is measured from.
+Runs under pytest or as a script.
+"""
+
+import asyncio
+
+from app.core.config import settings
+from app.services.ai_budget import AIBudget, current_budget
+from app.services.ai_dispatcher import FairShareDispatcher
+from app.services.ai_response_cache import ai_response_cache
+from app.services.ai_scheduler import AIScheduler
+from app.services.ai_service import AIService
+from app.services.ai_throttle import AdaptiveConcurrencyLimiter, TokenBudget
+from app.services.circuit_breaker import CircuitBreaker
+
+MODEL_ID = 'anthropic.claude-3-haiku-20240307-v1:0'
+
+
+def _service(call_seconds, slots=1):
+    """An AIService without a Bedrock client, holding at most `slots` calls in flight"""
+    service = object.__new__(AIService)
+    service._limiter = AdaptiveConcurrencyLimiter(max_limit=slots, initial_limit=slots)
+    service._token_budget = TokenBudget(tokens_per_minute=0)
+    service.dispatcher = FairShareDispatcher(service._limiter, service._token_budget, enabled=False)
+    service.circuit_breaker = CircuitBreaker(failure_threshold=5)
+    service._in_flight = {}
+    service.coalesced_requests = 0
+
+    async def call_model(model_id, body_dict, on_text=None):
+        await asyncio.sleep(call_seconds)
+        return {'content': [{'text': '[]'}], 'usage': {'input_tokens': 10, 'output_tokens': 5}}
+
+    service._call_model = call_model
+    return service
+
+
+def _requests(service, count):
+    return [
+        (f"file{i}", lambda i=i: service._invoke_model_async(
+            MODEL_ID, {'messages': [{'role': 'user', 'content': f"Extract rules {i}"}], 'max_tokens': 100}
+        ))
+        for i in range(count)
+    ]
+
+
+def _run(scenario, request_timeout):
+    cache_enabled, timeout = ai_response_cache.enabled, settings.AI_REQUEST_TIMEOUT_SECONDS
+    ai_response_cache.enabled = False
+    settings.AI_REQUEST_TIMEOUT_SECONDS = request_timeout
+    try:
+        return asyncio.run(scenario())
+    finally:
+        ai_response_cache.enabled = cache_enabled
+        settings.AI_REQUEST_TIMEOUT_SECONDS = timeout
+
+
+def test_results_come_back_in_submission_order():
+    async def scenario():
+        async def answer(value, delay):
+            await asyncio.sleep(delay)
+            return value
+        return await AIScheduler(max_in_flight=3).run([
+            ('slow', lambda: answer('a', 0.05)), ('fast', lambda: answer('b', 0)), ('mid', lambda: answer('c', 0.02))
+        ])
+
+    results = asyncio.run(scenario())
+    assert [(r.index, r.key, r.result) for r in results] == [(0, 'slow', 'a'), (1, 'fast', 'b'), (2, 'mid', 'c')]
+    assert all(r.ok for r in results)
+
+
+def test_time_queued_for_a_slot_does_not_count_against_the_request_timeout():
+    # One dispatcher slot: the third call waits ~0.3s before it starts, longer than the 0.25s timeout
+    service = _service(0.15, slots=1)
+
+    async def scenario():
+        return await AIScheduler(max_in_flight=3).run(_requests(service, 3))
+
+    results = _run(scenario, request_timeout=0.25)
+    assert [r.status for r in results] == ['completed'] * 3
+    assert max(r.elapsed_seconds for r in results) > 0.25
+
+
+def test_slow_model_call_times_out_and_frees_its_slot():
+    service = _service(0.3, slots=1)
+
+    async def scenario():
+        results = await AIScheduler(max_in_flight=2).run(_requests(service, 2))
+        return results, service._limiter.in_flight
+
+    results, slots_in_use = _run(scenario, request_timeout=0.05)
+    assert [r.status for r in results] == ['timeout', 'timeout']
+    assert 'exceeded' in results[0].error
+    assert slots_in_use == 0
+
+
+def test_job_deadline_still_cuts_off_queued_and_running_calls():
+    service = _service(0.3, slots=1)
+
+    async def scenario():
+        token = current_budget.set(AIBudget(time_budget_seconds=0.1))
+        try:
+            return await AIScheduler(max_in_flight=2).run(_requests(service, 2))
+        finally:
+            current_budget.reset(token)
+
+    results = _run(scenario, request_timeout=10)
+    assert [r.status for r in results] == ['skipped', 'skipped']
+    assert all(r.elapsed_seconds < 0.25 for r in results)
+
+
+if __name__ == "__main__":
+    tests = [(name, test) for name, test in sorted(globals().items()) if name.startswith('test_') and callable(test)]
+    failed = 0
+    for name, test in tests:
+        try:
+            test()
+            print(f"✅ {name}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {name}: {type(e).__name__}: {e}")
+    print(f"{len(tests) - failed}/{len(tests)} tests passed")
+    raise SystemExit(1 if failed else 0)
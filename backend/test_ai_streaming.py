@@ -0,0 +1,138 @@
+"""
+Tests for streaming model responses: incremental JSON array parsing and rules handed to
+callers while a request is still running. Runs under pytest or as a script.
+"""
+
+import asyncio
+
+from app.services.ai_dispatcher import FairShareDispatcher
+from app.services.ai_response_cache import ai_response_cache
+from app.services.ai_service import AIService
+from app.services.ai_throttle import AdaptiveConcurrencyLimiter, TokenBudget
+from app.services.circuit_breaker import CLOSED, CircuitBreaker
+from app.services.model_router import ModelRoute
+from app.services.streaming_json import IncrementalJSONArrayParser
+
+MODEL_ID = 'anthropic.claude-3-haiku-20240307-v1:0'
+RULES_JSON = (
+    '[{"id": "R1", "description": "Orders over $500 need approval", "confidence_score": 0.9,'
+    ' "category": "Approval", "code_reference": "OrderService.java:12"},'
+    ' {"id": "R2", "description": "Refunds within 30 days", "confidence_score": 0.8,'
+    ' "category": "Refunds", "code_reference": "RefundService.java:40"}]'
+)
+
+
+def _streaming_service(fragments):
+    """An AIService without a Bedrock client whose model streams the given text fragments"""
+    service = object.__new__(AIService)
+    service._limiter = AdaptiveConcurrencyLimiter(max_limit=4, initial_limit=4)
+    service._token_budget = TokenBudget(tokens_per_minute=0)
+    service.dispatcher = FairShareDispatcher(service._limiter, service._token_budget, enabled=False)
+    service.circuit_breaker = CircuitBreaker(failure_threshold=1)
+    service._in_flight = {}
+    service.coalesced_requests = 0
+
+    async def call_model(model_id, body_dict, on_text=None):
+        stopped_early = False
+        for fragment in fragments:
+            await asyncio.sleep(0)
+            if on_text and await on_text(fragment):
+                stopped_early = True
+                break
+        return {'content': [{'text': ''.join(fragments)}], 'usage': {'input_tokens': 10, 'output_tokens': 5},
+                'stopped_early': stopped_early}
+
+    service._call_model = call_model
+    return service
+
+
+def _run(scenario):
+    cache_enabled = ai_response_cache.enabled
+    ai_response_cache.enabled = False
+    try:
+        return asyncio.run(scenario())
+    finally:
+        ai_response_cache.enabled = cache_enabled
+
+
+def _route():
+    return ModelRoute(MODEL_ID, 'default', 100, 1, 'test')
+
+
+def test_parser_handles_escapes_and_braces_in_strings():
+    text = (
+        'Here are the rules [see below]:\n```json\n'
+        '[{"rule": "brace } and { in text", "note": "quote \\" then }"},'
+        ' {"rule": "trailing backslash \\\\", "nested": {"a": [1, {"b": 2}]}}]\n```'
+    )
+    parser = IncrementalJSONArrayParser()
+    objects = []
+    for char in text:  # Worst case: one character per fragment
+        objects.extend(parser.feed(char))
+
+    assert parser.done
+    assert objects == [
+        {'rule': 'brace } and { in text', 'note': 'quote " then }'},
+        {'rule': 'trailing backslash \\', 'nested': {'a': [1, {'b': 2}]}},
+    ]
+    assert parser.objects_emitted == 2
+
+
+def test_parser_skips_malformed_element():
+    parser = IncrementalJSONArrayParser()
+    objects = parser.feed('[{"a": 1}, {"b": oops}, {"c": 3}]')
+    assert objects == [{'a': 1}, {'c': 3}]
+    assert parser.done
+
+
+def test_rules_reach_on_rule_while_streaming():
+    fragments = [RULES_JSON[i:i + 40] for i in range(0, len(RULES_JSON), 40)]
+    service = _streaming_service(fragments)
+    seen = []
+
+    async def on_rule(rule):
+        seen.append(rule.id)
+
+    rules = _run(lambda: service._request_business_rules('prompt', _route(), 100, on_rule=on_rule))
+    assert [rule.id for rule in rules] == ['R1', 'R2']
+    assert seen == ['R1', 'R2']
+
+
+def test_max_rules_stops_generation_early():
+    fragments = [RULES_JSON[i:i + 40] for i in range(0, len(RULES_JSON), 40)]
+    service = _streaming_service(fragments)
+
+    rules = _run(lambda: service._request_business_rules('prompt', _route(), 100, max_rules=1))
+    assert [rule.id for rule in rules] == ['R1']
+
+
+def test_failing_rule_callback_does_not_count_against_the_backend():
+    service = _streaming_service([RULES_JSON])
+
+    async def on_rule(rule):
+        raise RuntimeError('database is locked')
+
+    async def scenario():
+        try:
+            await service._request_business_rules('prompt', _route(), 100, on_rule=on_rule)
+        except RuntimeError as e:
+            return str(e)
+
+    assert _run(scenario) == 'database is locked'
+    assert service.circuit_breaker.state == CLOSED
+    assert service.circuit_breaker.consecutive_failures == 0
+    assert service._limiter.in_flight == 0
+
+
+if __name__ == "__main__":
+    tests = [(name, test) for name, test in sorted(globals().items()) if name.startswith('test_') and callable(test)]
+    failed = 0
+    for name, test in tests:
+        try:
+            test()
+            print(f"✅ {name}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {name}: {type(e).__name__}: {e}")
+    print(f"{len(tests) - failed}/{len(tests)} tests passed")
+    raise SystemExit(1 if failed else 0)
@@ -0,0 +1,83 @@
+"""
+Tests for throttling-aware rate control of Bedrock calls (ai_throttle).
+Runs under pytest or as a script.
+"""
+
+import random
+
+from app.services.ai_throttle import AdaptiveConcurrencyLimiter, TokenBudget, backoff_delay
+
+
+def test_limiter_additive_increase():
+    limiter = AdaptiveConcurrencyLimiter(max_limit=3, initial_limit=2)
+    limits = []
+    for latency in (1.0, 1.0, 5.0):
+        assert limiter.try_acquire()
+        limiter.release(latency=latency)
+        limits.append(limiter.limit)
+    for _ in range(20):
+        limiter.try_acquire()
+        limiter.release(latency=1.0)
+
+    assert limits[0] == 2.5
+    assert limits[1] == 2.9
+    assert limits[2] == 2.9  # Slower than twice the best latency: hold
+    assert limiter.limit == 3  # Capped at max_limit
+
+
+def test_limiter_multiplicative_decrease_once_per_burst():
+    limiter = AdaptiveConcurrencyLimiter(max_limit=16, initial_limit=8)
+    for _ in range(3):
+        limiter.try_acquire()
+    limiter.min_latency = 10.0  # Throttles within one call latency belong to the same burst
+    for _ in range(3):
+        limiter.release(throttled=True)
+
+    assert limiter.limit == 4
+    assert limiter.throttles == 3
+    assert limiter.in_flight == 0
+
+
+def test_limiter_try_acquire_respects_limit():
+    limiter = AdaptiveConcurrencyLimiter(max_limit=2, initial_limit=2)
+    assert limiter.try_acquire()
+    assert limiter.try_acquire()
+    assert not limiter.try_acquire()
+    assert limiter.in_flight == 2
+
+
+def test_token_budget_reports_wait_until_refill():
+    budget = TokenBudget(tokens_per_minute=600)  # 10 tokens a second
+    assert budget.try_consume(600) == 0.0
+    wait_seconds = budget.try_consume(50)
+    assert 4.9 < wait_seconds <= 5.0
+    budget.adjust(-100)  # The call used 100 tokens less than estimated
+    assert budget.try_consume(50) == 0.0
+
+
+def test_token_budget_lets_an_oversized_request_through_when_full():
+    budget = TokenBudget(tokens_per_minute=100)
+    assert budget.try_consume(1000) == 0.0
+    assert TokenBudget(tokens_per_minute=0).try_consume(10 ** 9) == 0.0  # Disabled
+
+
+def test_backoff_delay_is_jittered_and_capped():
+    random.seed(7)
+    delays = [backoff_delay(attempt, base_seconds=1.0, max_seconds=8.0) for attempt in range(10) for _ in range(20)]
+    assert all(0 <= delay <= 8.0 for delay in delays)
+    assert all(backoff_delay(0, base_seconds=1.0, max_seconds=8.0) <= 1.0 for _ in range(20))
+    assert len(set(delays)) > 100  # Full jitter, not a fixed schedule
+
+
+if __name__ == "__main__":
+    tests = [(name, test) for name, test in sorted(globals().items()) if name.startswith('test_') and callable(test)]
+    failed = 0
+    for name, test in tests:
+        try:
+            test()
+            print(f"✅ {name}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {name}: {type(e).__name__}: {e}")
+    print(f"{len(tests) - failed}/{len(tests)} tests passed")
+    raise SystemExit(1 if failed else 0)
@@ -0,0 +1,90 @@
+"""
+Tests for per-job accounting of AI token use, latency and cost (ai_usage).
+Runs under pytest or as a script.
+"""
+
+from app.services.ai_usage import AIUsageTracker, histogram_percentile, merge_usage
+
+SONNET = 'anthropic.claude-3-5-sonnet-20240620-v1:0'
+HAIKU = 'anthropic.claude-3-haiku-20240307-v1:0'
+
+
+def _job():
+    usage = AIUsageTracker()
+    usage.stage = 'business_rules'
+    usage.record_call(SONNET, 1.0, input_tokens=1_000_000, output_tokens=100_000, throttles=2)
+    usage.record_call(HAIKU, 0.2, input_tokens=400_000, output_tokens=40_000)
+    usage.stage = 'summary'
+    usage.record_call(SONNET, 3.0, input_tokens=200_000, output_tokens=20_000)
+    usage.record_failure(SONNET, throttles=1)
+    usage.record_cache_hit(HAIKU)
+    return usage
+
+
+def test_calls_are_totalled_by_stage_and_model_with_costs():
+    summary = _job().to_dict(files=10, files_by_stage={'business_rules': 4})
+    total, stages, models = summary['total'], summary['stages'], summary['models']
+
+    assert (total['calls'], total['input_tokens'], total['output_tokens']) == (3, 1_600_000, 160_000)
+    assert (total['throttles'], total['retries'], total['failures'], total['cache_hits']) == (3, 3, 1, 1)
+    assert total['tokens_per_file'] == 176_000.0
+    assert stages['business_rules']['calls'] == 2 and stages['business_rules']['tokens_per_file'] == 385_000.0
+    assert stages['summary']['failures'] == 1 and 'files' not in stages['summary']
+
+    # 1.2M in at $3 + 120k out at $15 for Sonnet, 400k in at $0.25 + 40k out at $1.25 for Haiku
+    assert models[SONNET]['estimated_cost_usd'] == 5.4
+    assert models[HAIKU]['estimated_cost_usd'] == 0.15
+    assert total['estimated_cost_usd'] == 5.55
+    assert stages['business_rules']['estimated_cost_usd'] == 4.65
+    assert stages['summary']['estimated_cost_usd'] == 0.9
+
+
+def test_unknown_models_have_no_cost():
+    usage = AIUsageTracker()
+    usage.record_call('vendor.unpriced-model', 0.5, input_tokens=100, output_tokens=10)
+    summary = usage.to_dict()
+    assert summary['models']['vendor.unpriced-model']['estimated_cost_usd'] is None
+    assert summary['total']['estimated_cost_usd'] is None
+    assert list(summary['stages']) == ['other']
+
+
+def test_latency_percentiles_come_from_the_histogram():
+    usage = AIUsageTracker()
+    for latency in [0.1] * 90 + [2.0] * 9 + [20.0]:
+        usage.record_call(SONNET, latency, input_tokens=10, output_tokens=1)
+    total = usage.to_dict()['total']
+
+    assert 0.1 <= total['p50_latency_seconds'] < 0.1 * 1.25
+    assert 2.0 <= total['p95_latency_seconds'] < 2.0 * 1.25
+    assert total['p99_latency_seconds'] == total['p95_latency_seconds']  # 99 of 100 calls took 2s or less
+    assert 20.0 <= histogram_percentile(total['latency_histogram'], 100) < 20.0 * 1.25
+    assert total['avg_latency_seconds'] == 0.47
+    assert histogram_percentile({}, 50) is None
+
+
+def test_merged_jobs_add_counters_histograms_and_costs():
+    first = _job().to_dict(files=10)
+    second = _job().to_dict(files=5)
+    merged = merge_usage([first, second, None])
+
+    assert merged['jobs'] == 2
+    assert merged['total']['calls'] == 6 and merged['total']['files'] == 15
+    assert merged['total']['estimated_cost_usd'] == 11.1
+    assert merged['stages']['summary']['estimated_cost_usd'] == 1.8
+    assert sum(merged['total']['latency_histogram'].values()) == 6
+    assert merged['total']['p50_latency_seconds'] == first['total']['p50_latency_seconds']
+    assert merged['models'][HAIKU]['cache_hits'] == 2
+
+
+if __name__ == "__main__":
+    tests = [(name, test) for name, test in sorted(globals().items()) if name.startswith('test_') and callable(test)]
+    failed = 0
+    for name, test in tests:
+        try:
+            test()
+            print(f"✅ {name}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {name}: {type(e).__name__}: {e}")
+    print(f"{len(tests) - failed}/{len(tests)} tests passed")
+    raise SystemExit(1 if failed else 0)
@@ -0,0 +1,80 @@
+"""
+Tests for the content-addressed cache of per-file analyzer facts (analysis_cache).
+Runs under pytest or as a script.
+"""
+
+import asyncio
+import tempfile
+from pathlib import Path
+
+import app.services.database_analyzer as database_analyzer
+from app.services.analysis_cache import AnalysisCache, read_source_file
+from app.services.database_analyzer import DatabaseAnalyzer
+
+DAO_SOURCE = '''public class OrderDao {
+    public List<Order> findOpen() {
+        return jdbc.query("SELECT id, total FROM orders WHERE status = 'OPEN'", mapper);
+    }
+}
+'''
+
+
+def test_entries_are_keyed_by_content_and_namespaced_by_version():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = AnalysisCache(cache_dir=str(Path(tmp) / 'cache'), enabled=True)
+        path = Path(tmp) / 'Orders.java'
+        path.write_text('class Orders {}')
+        key = cache.file_key(path)
+
+        assert cache.get('facts', '1', key) is None
+        cache.put('facts', '1', key, [{'name': 'Orders'}])
+        assert cache.get('facts', '1', key) == [{'name': 'Orders'}]
+        assert cache.get('facts', '2', key) is None  # A new analyzer version starts empty
+
+        path.write_text('class Orders { int total; }')
+        assert cache.file_key(path) != key
+        assert cache.file_key(path) == cache.file_key(path, path.read_bytes())
+        assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_read_source_file_normalises_line_endings():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'legacy.jsp'
+        path.write_bytes(b'line one\r\nline two\rline three\xff\n')
+        raw, text = read_source_file(path)
+    assert raw.endswith(b'\xff\n')
+    assert text == 'line one\nline two\nline three\n'
+
+
+def test_unchanged_files_are_not_rescanned_for_sql():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'OrderDao.java'
+        path.write_text(DAO_SOURCE)
+        cache = AnalysisCache(cache_dir=str(Path(tmp) / 'cache'), enabled=True)
+        original_cache = database_analyzer.analysis_cache
+        database_analyzer.analysis_cache = cache
+        try:
+            analyzer = DatabaseAnalyzer()
+            first = asyncio.run(analyzer._extract_queries_from_file(path))
+            analyzer._scan_queries = lambda *args: (_ for _ in ()).throw(AssertionError("rescanned"))
+            second = asyncio.run(analyzer._extract_queries_from_file(path))
+        finally:
+            database_analyzer.analysis_cache = original_cache
+
+    assert first and any('orders' in query.tables for query in first)
+    assert [analyzer._query_to_dict(q) for q in second] == [analyzer._query_to_dict(q) for q in first]
+    assert cache.hits == 1
+
+
+if __name__ == "__main__":
+    tests = [(name, test) for name, test in sorted(globals().items()) if name.startswith('test_') and callable(test)]
+    failed = 0
+    for name, test in tests:
+        try:
+            test()
+            print(f"✅ {name}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {name}: {type(e).__name__}: {e}")
+    print(f"{len(tests) - failed}/{len(tests)} tests passed")
+    raise SystemExit(1 if failed else 0)
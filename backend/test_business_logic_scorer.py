@@ -0,0 +1,121 @@
+"""
+Tests for static pre-screening of files before business rule extraction (business_logic_scorer).
+Runs under pytest or as a script.
+"""
+
+from pathlib import Path
+
+from app.core.config import settings
+from app.models.schemas import DocumentationRequest
+from app.services.business_logic_scorer import score_file
+from app.services.documentation_service import DocumentationService
+from app.services.prompt_packing import SourceFile
+
+ORDER_SERVICE = """public class OrderService {
+    public void submit(Order order) {
+        if (order.getAmount() > approvalLimit && !order.isApproved()) {
+            throw new ApprovalRequiredException(order.getId());
+        }
+        for (OrderLine line : order.getLines()) {
+            if (line.getDiscount() > MAX_DISCOUNT) {
+                line.setDiscount(MAX_DISCOUNT);
+            }
+        }
+        order.setStatus(order.getPriority() == Priority.HIGH ? Status.EXPEDITED : Status.QUEUED);
+    }
+}
+"""
+
+ORDER_DTO = """public class OrderDto {
+    private BigDecimal amount;
+    private String status;
+    public BigDecimal getAmount() { return amount; }
+    public void setAmount(BigDecimal amount) { this.amount = amount; }
+    public String getStatus() { return status; }
+    public void setStatus(String status) { this.status = status; }
+}
+"""
+
+GENERATED_STUB = """// Generated by the protocol buffer compiler.  DO NOT EDIT!
+public final class OrderProto {
+    public boolean isValid() { if (a) { return b; } else { throw new IllegalStateException(); } }
+}
+"""
+
+COMMENTED_ONLY = """public class Notes {
+    // if (order.getAmount() > limit) throw new Exception("if the amount is over the limit");
+    /* for each order: if status is overdue, apply penalty */
+    private String help = "if the payment fails, retry while the balance allows";
+}
+"""
+
+
+def _file(name, content):
+    return SourceFile(f"/repo/src/{name}.java", content)
+
+
+def test_logic_scores_above_accessors_generated_code_and_comments():
+    service = score_file(_file('OrderService', ORDER_SERVICE))
+    dto = score_file(_file('OrderDto', ORDER_DTO))
+    generated = score_file(_file('OrderProto', GENERATED_STUB))
+    comments = score_file(_file('Notes', COMMENTED_ONLY))
+
+    assert service.score >= settings.AI_PRESCREEN_MIN_SCORE and service.reason == ''
+    assert service.signals['throws'] == 1 and service.signals['decisions'] >= 4
+    assert dto.score < settings.AI_PRESCREEN_MIN_SCORE and dto.reason in ('accessors only', 'no decision logic')
+    assert (generated.score, generated.reason) == (0.0, 'generated code')
+    assert comments.score == 0 and comments.signals['decisions'] == 0
+
+
+def test_parser_signals_raise_the_score():
+    plain = SourceFile('/repo/app/rates.py', 'def rate(x):\n    return x * 2\n')
+    annotated = SourceFile('/repo/app/rates.py', plain.content, entities=[{
+        'type': 'function', 'name': 'rate', 'complexity': 4,
+        'business_logic_patterns': ['calculation'],
+        'conditional_logic': [{'is_business_logic': True}],
+    }])
+    assert score_file(plain).score == 0
+    assert score_file(annotated).score > score_file(plain).score
+
+
+def _prescreen(mode, keywords=None):
+    service = object.__new__(DocumentationService)
+    service.job_report = {}
+    files = [_file('OrderService', ORDER_SERVICE), _file('OrderDto', ORDER_DTO), _file('OrderProto', GENERATED_STUB)]
+    saved = settings.AI_PRESCREEN_MODE
+    settings.AI_PRESCREEN_MODE = mode
+    try:
+        kept, _ = service._prescreen_files(files, DocumentationRequest(repository_path='/repo', keywords=keywords))
+    finally:
+        settings.AI_PRESCREEN_MODE = saved
+    return [Path(f.file_path).name for f in kept], service.job_report['prescreen']
+
+
+def test_prescreen_modes_and_keyword_override():
+    kept, report = _prescreen('skip')
+    assert kept == ['OrderService.java']
+    assert report['skipped_files'] == 2
+    assert sorted(item['file'] for item in report['skipped']) == ['/repo/src/OrderDto.java', '/repo/src/OrderProto.java']
+
+    kept, report = _prescreen('skip', keywords=['OrderProto'])
+    assert kept == ['OrderService.java', 'OrderProto.java'] and report['skipped_files'] == 1
+
+    kept, report = _prescreen('deprioritize')
+    assert len(kept) == 3 and report['below_threshold'] == 2 and report['skipped_files'] == 0
+
+    kept, report = _prescreen('off')
+    assert len(kept) == 3 and report['below_threshold'] == 0
+
+
+if __name__ == "__main__":
+    tests = [(name, test) for name, test in sorted(globals().items()) if name.startswith('test_') and callable(test)]
+    failed = 0
+    for name, test in tests:
+        try:
+            test()
+            print(f"✅ {name}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {name}: {type(e).__name__}: {e}")
+    print(f"{len(tests) - failed}/{len(tests)} tests passed")
+    raise SystemExit(1 if failed else 0)
@@ -0,0 +1,82 @@
+"""
+Tests for the circuit breaker around Bedrock calls (circuit_breaker).
+Runs under pytest or as a script.
+"""
+
+import time
+
+from botocore.exceptions import ClientError
+
+from app.services.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError, is_backend_failure
+
+
+def _client_error(code):
+    return ClientError({'Error': {'Code': code, 'Message': code}}, 'InvokeModel')
+
+
+def test_only_backend_failures_count():
+    assert is_backend_failure(_client_error('ServiceUnavailableException'))
+    assert is_backend_failure(_client_error('ExpiredTokenException'))
+    assert is_backend_failure(ConnectionError('connection refused'))
+    assert not is_backend_failure(_client_error('ValidationException'))
+    assert not is_backend_failure(ValueError('unparseable response'))
+    assert not is_backend_failure(CircuitOpenError('open'))
+
+
+def test_circuit_breaker_half_open_probe():
+    breaker = CircuitBreaker(failure_threshold=2, reset_seconds=0.05)
+    breaker.record_failure(ValueError('bad prompt'))  # Not a backend failure
+    breaker.record_failure(RuntimeError('connection refused'))
+    assert breaker.state == CLOSED
+    breaker.record_failure(RuntimeError('connection refused'))
+    assert breaker.state == OPEN
+
+    try:
+        breaker.before_call()
+        assert False, "an open circuit must fail fast"
+    except CircuitOpenError:
+        pass
+
+    time.sleep(0.06)
+    breaker.before_call()  # The single probe
+    assert breaker.state == HALF_OPEN
+    try:
+        breaker.before_call()
+        assert False, "only one probe may be in flight"
+    except CircuitOpenError:
+        pass
+
+    breaker.record_failure(RuntimeError('still down'))
+    assert breaker.state == OPEN
+    assert breaker.times_opened == 2
+
+    time.sleep(0.06)
+    breaker.before_call()
+    breaker.release_probe()  # Throttled probe: no verdict, the next call probes again
+    breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    breaker.before_call()
+    assert breaker.get_statistics()['fast_failures'] == 2
+
+
+def test_disabled_breaker_never_opens():
+    breaker = CircuitBreaker(failure_threshold=0)
+    for _ in range(10):
+        breaker.record_failure(RuntimeError('down'))
+    breaker.before_call()
+    assert breaker.get_statistics()['enabled'] is False
+
+
+if __name__ == "__main__":
+    tests = [(name, test) for name, test in sorted(globals().items()) if name.startswith('test_') and callable(test)]
+    failed = 0
+    for name, test in tests:
+        try:
+            test()
+            print(f"✅ {name}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {name}: {type(e).__name__}: {e}")
+    print(f"{len(tests) - failed}/{len(tests)} tests passed")
+    raise SystemExit(1 if failed else 0)
@@ -0,0 +1,97 @@
+"""
+Tests for structure-aware chunking of large source files (code_chunker.chunk_source).
+Runs under pytest or as a script.
+"""
+
+from app.services.code_chunker import chunk_source
+from app.services.prompt_packing import estimate_tokens
+
+
+def _java_source(methods=6, body_lines=12, imports=3, fields=1):
+    lines = ['package com.example;']
+    lines += [f'import com.example.util.Helper{i};' for i in range(imports)]
+    lines += ['', 'public class OrderService {']
+    lines += [f'    private int count{i} = {i};' for i in range(fields)]
+    entities = [{'type': 'class', 'name': 'OrderService', 'line_number': imports + 3}]
+    for method in range(methods):
+        entities.append({'type': 'method', 'name': f'step{method}', 'line_number': len(lines) + 1})
+        lines.append(f'    public void step{method}() {{')
+        lines += [f'        count0 = count0 + {method} * {line};' for line in range(body_lines)]
+        lines.append('    }')
+    lines.append('}')
+    return '\n'.join(lines), entities
+
+
+def _covered_lines(chunks):
+    """Line numbers that reach the model through some chunk's header or body"""
+    covered = set()
+    for chunk in chunks:
+        covered.update(range(chunk.start_line, chunk.end_line + 1))
+        header_lines = [line for line in chunk.header.split('\n') if not line.startswith('# ...')]
+        covered.update(range(1, len(header_lines) + 1) if chunk.header else [])
+    return covered
+
+
+def test_chunk_source_overlaps_previous_chunk():
+    content, entities = _java_source()
+    lines = content.split('\n')
+    first_member_line = entities[1]['line_number']
+    chunks = chunk_source(content, entities, max_tokens=250, overlap_lines=3, header_max_tokens=100)
+
+    assert len(chunks) > 1
+    assert chunks[0].start_line == first_member_line
+    assert chunks[-1].end_line == len(lines)
+    for previous, chunk in zip(chunks, chunks[1:]):
+        assert chunk.start_line == previous.end_line + 1 - 3
+        assert chunk.body == '\n'.join(lines[chunk.start_line - 1:chunk.end_line])
+    for chunk in chunks:
+        assert chunk.header.startswith('package com.example;')
+        assert 'public class OrderService {' in chunk.header
+        # Cuts fall on method boundaries, so every body ends with a closing brace
+        assert chunk.body.rstrip().endswith('}')
+
+
+def test_chunk_source_caps_header():
+    content, entities = _java_source(methods=3, imports=40)
+    chunks = chunk_source(content, entities, max_tokens=400, overlap_lines=0, header_max_tokens=50)
+
+    header_lines = chunks[0].header.split('\n')
+    assert header_lines[-1].startswith('# ... header continues')
+    assert sum(estimate_tokens(line) + 1 for line in header_lines[:-1]) <= 50
+    assert all(chunk.header == chunks[0].header for chunk in chunks)
+    # The imports the header had no room for open the first code section
+    assert chunks[0].start_line == len(header_lines)
+
+
+def test_chunk_source_covers_every_line_of_long_top_level_code():
+    lines = [f'RATE_{i} = {i} * 0.01' for i in range(3000)]
+    lines += ['def apply(rate):', '    return rate * 2']
+    content = '\n'.join(lines)
+    entities = [{'type': 'function', 'name': 'apply', 'line_number': 3001}]
+    chunks = chunk_source(content, entities, max_tokens=3000, overlap_lines=2)
+
+    assert len(chunks) > 1
+    assert _covered_lines(chunks) == set(range(1, len(lines) + 1))
+    assert all(estimate_tokens(chunk.header) + estimate_tokens(chunk.body) <= 3000 + 50 for chunk in chunks)
+
+
+def test_chunk_source_covers_every_line_of_large_field_table():
+    content, entities = _java_source(methods=2, fields=400)
+    chunks = chunk_source(content, entities, max_tokens=600, overlap_lines=0)
+
+    assert len(chunks) > 1
+    assert _covered_lines(chunks) == set(range(1, len(content.split('\n')) + 1))
+
+
+if __name__ == "__main__":
+    tests = [(name, test) for name, test in sorted(globals().items()) if name.startswith('test_') and callable(test)]
+    failed = 0
+    for name, test in tests:
+        try:
+            test()
+            print(f"✅ {name}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {name}: {type(e).__name__}: {e}")
+    print(f"{len(tests) - failed}/{len(tests)} tests passed")
+    raise SystemExit(1 if failed else 0)
@@ -0,0 +1,148 @@
+"""
+Tests for building the code intelligence graph from parsed entities (CodeIntelligenceBuilder).
+Runs under pytest or as a script.
+"""
+
+from app.models.schemas import BusinessRule
+from app.services.code_intelligence import CodeIntelligenceGraph
+from app.services.code_intelligence_builder import CodeIntelligenceBuilder, ModulePathTrie
+
+
+def _entity(file_path, name, entity_type='class', **extra):
+    return {'file_path': file_path, 'name': name, 'type': entity_type, 'line_number': 1, **extra}
+
+
+def _build(entities):
+    builder = CodeIntelligenceBuilder(CodeIntelligenceGraph())
+    builder.build_from_entities(entities)
+    return builder
+
+
+def _module_id(builder, file_path):
+    return builder.file_modules[file_path]
+
+
+def test_trie_resolves_the_longest_module_prefix_of_an_import():
+    trie = ModulePathTrie()
+    trie.insert(['repo', 'com', 'acme', 'billing', 'Invoice'], 'invoice')
+    trie.insert(['repo', 'com', 'acme', 'billing'], 'billing')
+
+    assert trie.resolve(['com', 'acme', 'billing', 'Invoice', 'Line'], []) == ('invoice', ['Line'])
+    assert trie.resolve(['acme', 'billing', 'Tax'], []) == ('billing', ['Tax'])
+    assert trie.resolve(['org', 'other', 'Thing'], []) is None
+
+
+def test_trie_prefers_the_module_closest_to_the_importing_file():
+    trie = ModulePathTrie()
+    trie.insert(['repo', 'orders', 'models'], 'orders.models')
+    trie.insert(['repo', 'billing', 'models'], 'billing.models')
+
+    assert trie.resolve(['models'], ['repo', 'billing', 'service'])[0] == 'billing.models'
+    assert trie.resolve(['models'], ['repo', 'orders', 'views'])[0] == 'orders.models'
+
+
+def test_imports_resolve_to_modules_and_symbols():
+    invoice = '/repo/src/main/java/com/acme/billing/Invoice.java'
+    service = '/repo/src/main/java/com/acme/orders/OrderService.java'
+    models = '/repo/app/orders/models.py'
+    views = '/repo/app/orders/views.py'
+    builder = _build([
+        _entity(invoice, 'Invoice'),
+        _entity(service, 'OrderService'),
+        _entity(models, 'Order'),
+        _entity(views, 'list_orders', 'function'),
+    ])
+    order_class = builder.graph.find_by_name('Order', ['class'])
+
+    # Java: fully qualified class and external library; packages have no entity of their own
+    assert builder._find_dependency_target('com.acme.billing.Invoice;', service) == _module_id(builder, invoice)
+    assert builder._find_dependency_target('com.acme.billing.Invoice.Line', service) == _module_id(builder, invoice)
+    assert builder._find_dependency_target('com.acme.billing.*', service) is None
+    assert builder._find_dependency_target('java.util.List', service) is None
+
+    # Python: absolute and relative imports, and a symbol inside the module
+    assert builder._find_dependency_target('orders.models', views) == _module_id(builder, models)
+    assert builder._find_dependency_target('.models', views) == _module_id(builder, models)
+    assert builder._find_dependency_target('.models.Order', views) == order_class
+
+
+def test_dependencies_become_depends_on_relationships():
+    models = '/repo/app/orders/models.py'
+    views = '/repo/app/orders/views.py'
+    builder = _build([
+        _entity(models, 'Order'),
+        _entity(views, 'list_orders', 'function', dependencies=['.models.Order', 'django.http']),
+    ])
+    relationships = [(r.relationship_type, r.context) for r in builder.graph.relationships]
+    assert relationships == [('depends_on', 'imports .models.Order')]
+
+
+
+def _orders_and_billing():
+    service = '/repo/app/orders/service.py'
+    return _build([
+        _entity('/repo/app/orders/models.py', 'Order'),
+        _entity('/repo/app/billing/models.py', 'Order'),
+        _entity('/repo/app/orders/models.py', 'Base'),
+        _entity(service, 'OrderService', base_classes=[{'name': 'models.Base', 'type': 'class'}]),
+        _entity(service, 'submit', 'method', class_name='OrderService', body='self.validate(order)\nnotify(order)'),
+        _entity(service, 'validate', 'method', class_name='OrderService'),
+        _entity('/repo/app/billing/service.py', 'validate', 'function'),
+        _entity('/repo/app/billing/service.py', 'notify', 'function'),
+    ])
+
+
+def test_name_lookup_prefers_same_file_then_same_package():
+    builder = _orders_and_billing()
+    graph = builder.graph
+    orders_order, billing_order = graph.name_index[('class', 'Order')]
+
+    assert graph.entities[orders_order].file_path == '/repo/app/orders/models.py'
+    assert graph.find_by_name('Order', ['class'], '/repo/app/billing/service.py') == billing_order
+    assert graph.find_by_name('Order', ['class'], '/repo/app/orders/service.py') == orders_order
+    assert graph.find_by_name('Order', ['class'], '/elsewhere/job.py') == orders_order
+    assert graph.find_by_name('Missing', ['class']) is None
+
+
+def test_relationships_use_the_indexes():
+    builder = _orders_and_billing()
+    graph = builder.graph
+    by_id = graph.entities
+    relationships = {(by_id[r.source_id].name, r.relationship_type, by_id[r.target_id].file_path, by_id[r.target_id].name)
+                     for r in graph.relationships}
+
+    assert ('OrderService', 'inherits', '/repo/app/orders/models.py', 'Base') in relationships
+    # validate exists in this file and in billing; the local method wins. notify only exists in billing
+    assert ('submit', 'calls', '/repo/app/orders/service.py', 'validate') in relationships
+    assert ('submit', 'calls', '/repo/app/billing/service.py', 'notify') in relationships
+
+
+def test_rules_attach_to_entities_by_qualified_name_and_file():
+    builder = _orders_and_billing()
+    graph = builder.graph
+
+    def rule(code_reference):
+        return BusinessRule(id='r', description='d', confidence_score=0.9, category='Validation',
+                            code_reference=code_reference)
+
+    submit = graph.qualified_name_index[('/repo/app/orders/service.py', 'OrderService.submit')]
+    assert graph.entities[submit].name == 'submit'
+    assert builder._find_entity_for_rule(rule('orders/service.py:OrderService.submit')) == submit
+    assert builder._find_entity_for_rule(rule('service.py: submit')) == submit
+    assert builder._find_entity_for_rule(rule('orders/service.py')) == builder.file_modules['/repo/app/orders/service.py']
+    assert graph.find_files('billing/service.py') == ['/repo/app/billing/service.py']
+    assert builder._find_entity_for_rule(rule('payments/service.py')) is None
+
+
+if __name__ == "__main__":
+    tests = [(name, test) for name, test in sorted(globals().items()) if name.startswith('test_') and callable(test)]
+    failed = 0
+    for name, test in tests:
+        try:
+            test()
+            print(f"✅ {name}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {name}: {type(e).__name__}: {e}")
+    print(f"{len(tests) - failed}/{len(tests)} tests passed")
+    raise SystemExit(1 if failed else 0)
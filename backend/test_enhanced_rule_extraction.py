@@ -0,0 +1,92 @@
+"""
+Tests for per-file enhanced business rule extraction
+(EnhancedDocumentationIntegration._extract_enhanced_business_rules).
+Runs under pytest or as a script.
+"""
+
+import asyncio
+
+from app.services.circuit_breaker import CircuitOpenError
+from app.services.code_intelligence_builder import CodeIntelligenceBuilder
+from app.services.enhanced_documentation_integration import EnhancedDocumentationIntegration
+
+
+def _entities(file_path, *names):
+    entities = [{'type': 'class', 'name': names[0], 'file_path': file_path, 'line_number': 1}]
+    entities += [{'type': 'method', 'name': name, 'file_path': file_path, 'line_number': 10 * index,
+                  'parent': names[0]} for index, name in enumerate(names[1:], start=1)]
+    return entities
+
+
+class _FakeEnhancedAIService:
+    """Records one call per file; files under down/ fail fast as if the circuit were open"""
+
+    def __init__(self):
+        self.calls = []
+
+    async def extract_business_rules_for_file(self, file_path, entity_ids, full_code, keywords=None):
+        self.calls.append((file_path, len(entity_ids)))
+        await asyncio.sleep(0.01)
+        if file_path.startswith('down/'):
+            raise CircuitOpenError('AI backend unavailable (circuit open)')
+        return []
+
+
+def _integration(entities):
+    integration = object.__new__(EnhancedDocumentationIntegration)
+    integration.intelligence_builder = CodeIntelligenceBuilder()
+    integration.intelligence_graph = integration.intelligence_builder.build_from_entities(entities)
+    integration.enhanced_ai_service = _FakeEnhancedAIService()
+
+    async def full_code(file_path):
+        return f'// source of {file_path}'
+
+    integration._get_full_code_content = full_code
+    return integration
+
+
+def test_one_request_per_file_covers_all_of_its_entities():
+    entities = _entities('up/Order.java', 'Order', 'total', 'discount') + _entities('up/Invoice.java', 'Invoice', 'due')
+    integration = _integration(entities)
+    coverage = {}
+
+    asyncio.run(integration._extract_enhanced_business_rules(entities, coverage))
+
+    assert sorted(integration.enhanced_ai_service.calls) == [('up/Invoice.java', 2), ('up/Order.java', 3)]
+    assert coverage['enhanced_business_rules']['files'] == 2
+    assert coverage['enhanced_business_rules']['files_analyzed'] == 2
+
+
+def test_concurrent_jobs_keep_their_own_coverage():
+    failing_job = _entities('down/Order.java', 'Order', 'total')
+    healthy_job = _entities('up/Invoice.java', 'Invoice', 'due')
+    integration = _integration(failing_job + healthy_job)
+    failing_coverage, healthy_coverage = {}, {}
+
+    async def scenario():
+        await asyncio.gather(
+            integration._extract_enhanced_business_rules(failing_job, failing_coverage),
+            integration._extract_enhanced_business_rules(healthy_job, healthy_coverage),
+        )
+
+    asyncio.run(scenario())
+
+    assert failing_coverage['ai_unavailable'].startswith('AI backend unavailable')
+    assert failing_coverage['enhanced_business_rules']['files_failed_fast'] == 1
+    assert failing_coverage['enhanced_business_rules']['not_analyzed'] == ['down/Order.java']
+    assert 'ai_unavailable' not in healthy_coverage
+    assert healthy_coverage['enhanced_business_rules']['files_analyzed'] == 1
+
+
+if __name__ == "__main__":
+    tests = [(name, test) for name, test in sorted(globals().items()) if name.startswith('test_') and callable(test)]
+    failed = 0
+    for name, test in tests:
+        try:
+            test()
+            print(f"✅ {name}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {name}: {type(e).__name__}: {e}")
+    print(f"{len(tests) - failed}/{len(tests)} tests passed")
+    raise SystemExit(1 if failed else 0)
@@ -0,0 +1,105 @@
+"""
+Tests for map-reduce summarization of modules, subsystems and the system (hierarchical_summarizer).
+Runs under pytest or as a script.
+"""
+
+import asyncio
+import tempfile
+from contextlib import contextmanager
+
+import app.services.hierarchical_summarizer as hierarchical_summarizer
+from app.core.config import settings
+from app.models.schemas import BusinessRule
+from app.services.analysis_cache import AnalysisCache
+from app.services.hierarchical_summarizer import HierarchicalSummarizer, group_modules
+
+
+class _FakeAIService:
+    """Answers every prompt with a summary of about max_tokens words"""
+
+    def __init__(self):
+        self.prompts = []
+
+    async def generate_content(self, prompt, max_tokens=1000, temperature=0.2):
+        self.prompts.append(prompt)
+        return f"summary {len(self.prompts)} " + 'word ' * max_tokens
+
+
+def _entities(layout):
+    """Entities for {directory: entity count}, one file per entity"""
+    return [
+        {'name': f"{directory.split('/')[-1].title()}{i}", 'type': 'class',
+         'file_path': f"/repo/src/{directory}/File{i}.java", 'line_number': 1}
+        for directory, count in layout.items() for i in range(count)
+    ]
+
+
+@contextmanager
+def _summary_settings(reduce_budget=6000, min_entities=10):
+    saved = (settings.AI_SUMMARY_REDUCE_TOKEN_BUDGET, settings.AI_SUMMARY_MIN_ENTITIES,
+             settings.AI_SUMMARY_MIN_MODULE_ENTITIES, hierarchical_summarizer.analysis_cache)
+    with tempfile.TemporaryDirectory() as cache_dir:
+        settings.AI_SUMMARY_REDUCE_TOKEN_BUDGET = reduce_budget
+        settings.AI_SUMMARY_MIN_ENTITIES = min_entities
+        settings.AI_SUMMARY_MIN_MODULE_ENTITIES = 5
+        hierarchical_summarizer.analysis_cache = AnalysisCache(cache_dir=cache_dir, enabled=True)
+        try:
+            yield
+        finally:
+            (settings.AI_SUMMARY_REDUCE_TOKEN_BUDGET, settings.AI_SUMMARY_MIN_ENTITIES,
+             settings.AI_SUMMARY_MIN_MODULE_ENTITIES, hierarchical_summarizer.analysis_cache) = saved
+
+
+def test_group_modules_folds_small_directories_into_their_parent():
+    grouped = group_modules(_entities({'orders/api': 6, 'orders/api/dto': 2, 'billing': 5}))
+
+    assert set(grouped) == {'orders', 'billing'}
+    assert len(grouped['orders']['orders/api']) == 8  # dto had too few entities of its own
+    assert len(grouped['billing']['billing']) == 5
+
+
+def test_summarize_attributes_rules_and_reuses_cached_summaries():
+    entities = _entities({'orders': 6, 'billing': 6})
+    rules = [BusinessRule(id='r1', description='Orders over 500 need approval', confidence_score=0.9,
+                          category='Validation', code_reference='/repo/src/orders/File2.java:10')]
+    with _summary_settings():
+        service = _FakeAIService()
+        summary = asyncio.run(HierarchicalSummarizer(service).summarize(entities, rules))
+        assert summary.modules == 2 and set(summary.subsystems) == {'orders', 'billing'}
+        assert summary.summaries_generated == 3 and summary.summaries_cached == 0
+        orders_prompt = next(prompt for prompt in service.prompts if 'Module: orders' in prompt)
+        billing_prompt = next(prompt for prompt in service.prompts if 'Module: billing' in prompt)
+        assert 'Orders over 500 need approval' in orders_prompt
+        assert 'Orders over 500' not in billing_prompt
+
+        again = asyncio.run(HierarchicalSummarizer(_FakeAIService()).summarize(entities, rules))
+        assert again.summaries_generated == 0 and again.summaries_cached == 3
+        assert again.system == summary.system
+
+
+def test_reduce_terminates_when_the_budget_holds_only_one_summary():
+    # Each reduced summary (~600 tokens) is larger than the whole reduce budget
+    children = [(f"module{i}", 'word ' * 600) for i in range(6)]
+    with _summary_settings(reduce_budget=500):
+        service = _FakeAIService()
+        summarizer = HierarchicalSummarizer(service)
+        system = asyncio.run(asyncio.wait_for(summarizer._reduce('system', 'system', children, 600), 5))
+
+    assert system.startswith('summary ')
+    assert len(service.prompts) <= 2 * len(children)
+    final_prompt = service.prompts[-1]
+    assert final_prompt.count('### ') >= 2  # The last stage combined everything in one prompt
+
+
+if __name__ == "__main__":
+    tests = [(name, test) for name, test in sorted(globals().items()) if name.startswith('test_') and callable(test)]
+    failed = 0
+    for name, test in tests:
+        try:
+            test()
+            print(f"✅ {name}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {name}: {type(e).__name__}: {e}")
+    print(f"{len(tests) - failed}/{len(tests)} tests passed")
+    raise SystemExit(1 if failed else 0)
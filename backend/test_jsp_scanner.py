@@ -0,0 +1,110 @@
+"""
+Tests for the single-pass JSP scanner shared by the Struts parsers and integration analysis (jsp_scanner).
+Runs under pytest or as a script.
+"""
+
+import re
+import tempfile
+from pathlib import Path
+
+from app.parsers.jsp_scanner import scan_jsp
+from app.parsers.struts2_parser import Struts2Parser
+from app.services.integration_analyzer import IntegrationAnalyzer
+
+ORDER_PAGE = """<%@ taglib prefix="s" uri="/struts-tags" %>
+<%@ include file="/common/header.jsp" %>
+<html>
+<body>
+<s:form action="placeOrder" method="post">
+  <s:textfield name="order.quantity" label="Quantity"/>
+  <s:select name="order.shipping" list="%{shippingOptions}"/>
+  <input type="hidden" name="order.id" value="${order.id}"/>
+  <s:submit value="Place order"/>
+</s:form>
+<a href="orders/history.action">History</a>
+<s:url action="cancelOrder" var="cancelUrl"/>
+<p>Total: %{order.total}</p>
+<jsp:include page="/common/footer.jsp"/>
+<form action="/search.do">
+  <input name="query"/>
+</form>
+</body>
+</html>
+"""
+
+# The per-pattern regular expressions the parsers and the integration analyzer used before the scanner
+_LEGACY_S_TAGS = re.compile(r'<s:(\w+)[^>]*>')
+_LEGACY_OGNL = re.compile(r'%{([^}]+)}')
+_LEGACY_ACTIONS = {
+    'form': [re.compile(r'<form[^>]*action\s*=\s*[\'"`]([^\'"`]*)[\'"`][^>]*>', re.IGNORECASE),
+             re.compile(r'<s:form[^>]*action\s*=\s*[\'"`]([^\'"`]*)[\'"`][^>]*>', re.IGNORECASE)],
+    'link': [re.compile(r'<a[^>]*href\s*=\s*[\'"`]([^\'"`]*)[\'"`][^>]*>', re.IGNORECASE),
+             re.compile(r'<s:url[^>]*action\s*=\s*[\'"`]([^\'"`]*)[\'"`][^>]*>', re.IGNORECASE)],
+}
+
+
+def _legacy_actions(content):
+    return sorted(
+        (component_type, match.group(1), content[:match.start()].count('\n') + 1)
+        for component_type, patterns in _LEGACY_ACTIONS.items()
+        for pattern in patterns
+        for match in pattern.finditer(content)
+    )
+
+
+def test_scanner_matches_the_per_pattern_scans_it_replaced():
+    scan = scan_jsp(ORDER_PAGE)
+
+    assert scan.tags_with_prefix('s') == _LEGACY_S_TAGS.findall(ORDER_PAGE)
+    assert sorted(scan.ognl_expressions) == sorted(_LEGACY_OGNL.findall(ORDER_PAGE))
+    assert sorted((a.component_type, a.action_url, a.line_number) for a in scan.form_actions) == _legacy_actions(ORDER_PAGE)
+    assert scan.includes == ['/common/header.jsp', '/common/footer.jsp']
+    assert scan.taglibs == {'s': '/struts-tags'}
+
+
+def test_scanner_ignores_comments_and_scriptlets_and_quoted_angle_brackets():
+    content = """<%-- <s:form action="oldOrder"> --%>
+<% if (a > b) { out.print("<s:property value='x'/>"); } %>
+<s:if test="total > 100"><s:property value="%{discount}"/></s:if>
+"""
+    scan = scan_jsp(content)
+    assert scan.tags_with_prefix('s') == ['if', 'property']
+    assert scan.form_actions == []
+    assert scan.ognl_expressions == ['discount']
+    assert [tag.line_number for tag in scan.tags] == [3, 3]
+
+
+def test_inputs_near_finds_fields_around_a_form():
+    scan = scan_jsp(ORDER_PAGE)
+    search_form = next(action for action in scan.form_actions if action.action_url == '/search.do')
+    assert 'query' in scan.inputs_near(search_form.position, window=50)
+    assert 'order.id' not in scan.inputs_near(search_form.position, window=50)
+
+
+def test_parsers_and_integration_analysis_share_the_scan():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'order.jsp'
+        path.write_text(ORDER_PAGE)
+        entities = Struts2Parser().parse(path)
+        components = IntegrationAnalyzer()._extract_jsp_components_from_file(path, ORDER_PAGE)
+
+    jsp_entity = next(entity for entity in entities if entity.get('form_actions'))
+    assert jsp_entity['form_actions'] == ['placeOrder', 'orders/history.action', 'cancelOrder', '/search.do']
+    assert [(c.component_type, c.action_url) for c in components] == [
+        ('form', 'placeOrder'), ('link', 'orders/history.action'), ('link', 'cancelOrder'), ('form', '/search.do')
+    ]
+    assert 'order.id' in components[0].parameters
+
+
+if __name__ == "__main__":
+    tests = [(name, test) for name, test in sorted(globals().items()) if name.startswith('test_') and callable(test)]
+    failed = 0
+    for name, test in tests:
+        try:
+            test()
+            print(f"✅ {name}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {name}: {type(e).__name__}: {e}")
+    print(f"{len(tests) - failed}/{len(tests)} tests passed")
+    raise SystemExit(1 if failed else 0)
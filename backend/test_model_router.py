@@ -0,0 +1,109 @@
+"""
+Tests for cost- and complexity-based model routing (model_router).
+Runs under pytest or as a script.
+"""
+
+import asyncio
+
+from botocore.exceptions import ClientError
+
+from app.core.config import settings
+from app.services.ai_service import AIService
+from app.services.model_router import ModelRouter, model_router
+
+SIMPLE_CODE = 'public class Money {\n    private long cents;\n    public long getCents() { return cents; }\n}\n'
+COMPLEX_CODE = 'class Rules {\n' + '\n'.join(
+    f'    void r{i}(int x) {{ if (x > {i} && x < {i + 5}) {{ x++; }} }}' for i in range(20)
+) + '\n}\n'
+
+
+def _client_error(code, message):
+    return ClientError({'Error': {'Code': code, 'Message': message}}, 'InvokeModel')
+
+
+def test_small_simple_code_goes_to_the_fast_model():
+    router = ModelRouter()
+    route = router.route(SIMPLE_CODE, [])
+    assert route.tier == 'fast'
+    assert route.model_id == settings.BEDROCK_FAST_MODEL_ID
+
+
+def test_complex_or_large_code_goes_to_the_default_model():
+    router = ModelRouter()
+    assert router.route(COMPLEX_CODE, []).reason == 'complex code'
+    assert router.route(SIMPLE_CODE * 200, []).reason == 'large input'
+
+
+def test_packed_prompt_is_fast_only_if_every_file_is():
+    router = ModelRouter()
+    assert router.route_files([(SIMPLE_CODE, []), (SIMPLE_CODE, [])]).tier == 'fast'
+    assert router.route_files([(SIMPLE_CODE, []), (COMPLEX_CODE, [])]).tier == 'default'
+
+
+def test_bad_request_is_not_an_unavailable_model():
+    router = ModelRouter()
+    assert not router.is_unavailable_error('ValidationException', 'Input is too long for requested model.')
+    assert not router.is_unavailable_error('ValidationException', 'max_tokens: Input should be less than 8192')
+    assert router.is_unavailable_error('ValidationException', 'The provided model identifier is invalid.')
+    assert router.is_unavailable_error(
+        'ValidationException', "Invocation of model ID x with on-demand throughput isn't supported.")
+    assert router.is_unavailable_error('AccessDeniedException', 'You don\'t have access to the model')
+    assert not router.is_unavailable_error('ThrottlingException', 'Too many requests')
+
+
+def _routed_service(error):
+    service = object.__new__(AIService)
+    service.calls = []
+
+    async def invoke(model_id, body_dict, on_text=None):
+        service.calls.append(model_id)
+        if model_id == settings.BEDROCK_FAST_MODEL_ID:
+            raise error
+        return {'content': [{'text': '[]'}]}
+
+    service._invoke_model_async = invoke
+    return service
+
+
+def _invoke_fast(service):
+    route = ModelRouter().route(SIMPLE_CODE, [])
+    try:
+        return asyncio.run(service._invoke_routed('prompt', route, 100))
+    except ClientError as e:
+        return e
+
+
+def test_oversized_prompt_does_not_disable_fast_routing():
+    service = _routed_service(_client_error('ValidationException', 'Input is too long for requested model.'))
+    try:
+        outcome = _invoke_fast(service)
+        assert isinstance(outcome, ClientError)
+        assert service.calls == [settings.BEDROCK_FAST_MODEL_ID]
+        assert model_router.enabled()
+    finally:
+        model_router._fast_model_unavailable = None
+
+
+def test_missing_model_access_falls_back_and_disables_fast_routing():
+    service = _routed_service(_client_error('AccessDeniedException', "You don't have access to the model"))
+    try:
+        result, model_id = _invoke_fast(service)
+        assert model_id == settings.BEDROCK_MODEL_ID
+        assert service.calls == [settings.BEDROCK_FAST_MODEL_ID, settings.BEDROCK_MODEL_ID]
+        assert not model_router.enabled()
+    finally:
+        model_router._fast_model_unavailable = None
+
+
+if __name__ == "__main__":
+    tests = [(name, test) for name, test in sorted(globals().items()) if name.startswith('test_') and callable(test)]
+    failed = 0
+    for name, test in tests:
+        try:
+            test()
+            print(f"✅ {name}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {name}: {type(e).__name__}: {e}")
+    print(f"{len(tests) - failed}/{len(tests)} tests passed")
+    raise SystemExit(1 if failed else 0)
@@ -0,0 +1,97 @@
+"""
+Tests for isolated file parsing with per-file time and size budgets (parse_watchdog).
+Runs under pytest or as a script.
+"""
+
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+
+from app.services.parse_watchdog import ParseWatchdog, structural_outline
+
+
+class _SleepyParser:
+    """Sleeps for the number of seconds named in the file and logs each attempt; picklable for spawn workers"""
+
+    def __init__(self, log_path):
+        self.log_path = log_path
+
+    def parse(self, file_path):
+        with open(self.log_path, 'a') as log:
+            log.write(f"{file_path.name}\n")
+        time.sleep(float(file_path.read_text()))
+        return [{'name': file_path.stem, 'type': 'file', 'file_path': str(file_path), 'line_number': 1}]
+
+
+def _files(tmp, **delays):
+    paths = {}
+    for name, delay in delays.items():
+        paths[name] = Path(tmp) / f"{name}.txt"
+        paths[name].write_text(str(delay))
+    return paths
+
+
+def test_structural_outline_lists_top_level_declarations():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'Orders.java'
+        path.write_text('public class Orders {\n    public void place() {}\n}\ndef helper():\n    pass\n')
+        outline = structural_outline(path)
+    assert [(e['name'], e['type'], e['line_number']) for e in outline] == [('Orders', 'class', 1), ('helper', 'function', 4)]
+    assert all(e['structural_only'] for e in outline)
+
+
+def test_oversized_files_follow_the_policy():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'big.py'
+        path.write_text('def f():\n    pass\n' * 200)
+        outcome = asyncio.run(ParseWatchdog(max_workers=1, timeout_seconds=5, max_file_size_kb=1,
+                                            oversize_policy='skip').parse_file(None, path))
+    assert outcome.status == 'skipped' and outcome.entities == []
+
+
+def test_timeout_does_not_kill_other_parses_in_progress():
+    with tempfile.TemporaryDirectory() as tmp:
+        files = _files(tmp, warm_a=0, warm_b=0, hang=30, slow=1.8, after=0)
+        log_path = Path(tmp) / 'attempts.log'
+        parser = _SleepyParser(str(log_path))
+        watchdog = ParseWatchdog(max_workers=2, timeout_seconds=2.0, max_file_size_kb=1024, oversize_policy='structural')
+
+        async def slow_after_a_moment():
+            await asyncio.sleep(0.5)
+            return await watchdog.parse_file(parser, files['slow'])
+
+        async def scenario():
+            # Start both workers first so spawning them does not eat into the budgets below
+            await asyncio.gather(watchdog.parse_file(parser, files['warm_a']), watchdog.parse_file(parser, files['warm_b']))
+            hang, slow = await asyncio.gather(watchdog.parse_file(parser, files['hang']), slow_after_a_moment())
+            await asyncio.sleep(0.2)  # Let the retired pool's termination run
+            retiring = dict(watchdog._retiring)
+            after = await watchdog.parse_file(parser, files['after'])
+            return hang, slow, retiring, after
+
+        try:
+            hang, slow, retiring, after = asyncio.run(scenario())
+        finally:
+            watchdog.shutdown()
+        attempts = log_path.read_text().split()
+
+    assert hang.status == 'timeout'
+    assert slow.status == 'parsed' and slow.entities[0]['name'] == 'slow'
+    assert attempts.count('slow.txt') == 1  # Finished on the retiring pool rather than being killed and retried
+    assert not retiring  # The stuck worker was terminated once the slow parse was done
+    assert after.status == 'parsed'
+
+
+if __name__ == "__main__":
+    tests = [(name, test) for name, test in sorted(globals().items()) if name.startswith('test_') and callable(test)]
+    failed = 0
+    for name, test in tests:
+        try:
+            test()
+            print(f"✅ {name}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {name}: {type(e).__name__}: {e}")
+    print(f"{len(tests) - failed}/{len(tests)} tests passed")
+    raise SystemExit(1 if failed else 0)
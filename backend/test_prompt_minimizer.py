@@ -0,0 +1,99 @@
+"""
+Tests for minimizing source code before it goes into a prompt (prompt_minimizer).
+Runs under pytest or as a script.
+"""
+
+from app.services.prompt_minimizer import minimize_source
+
+JAVA_SOURCE = '''/*
+ * Copyright (c) 2009 Example Corp. All rights reserved.
+ */
+package com.example.orders;
+
+import java.util.List;
+import java.util.Map;
+import java.math.BigDecimal;
+
+/**
+ * Prices orders.
+ * @author someone
+ */
+public class OrderPricer {
+    private static final long serialVersionUID = 1L;
+
+    // Apply a 10% discount for premium customers over $500;
+    // for example:
+    // a $600 order from a premium customer costs $540
+    // total = total.multiply(RATE);
+    // applyLegacyDiscount(order);
+    // if (order.isRush()) {
+    // }
+    // ---------------------------------
+    @Override
+    public BigDecimal price(Order order) {
+        BigDecimal total = order.subtotal(); // before tax
+        String marker = "// not a comment";
+        return total;
+    }
+}
+'''
+
+
+def test_explanatory_comments_are_kept():
+    minimized = minimize_source(JAVA_SOURCE, 'OrderPricer.java')
+    assert '// Apply a 10% discount for premium customers over $500;' in minimized
+    assert '// for example:' in minimized
+    assert '// a $600 order from a premium customer costs $540' in minimized
+    assert 'Prices orders.' in minimized
+    assert '// before tax' in minimized
+    assert '"// not a comment"' in minimized
+
+
+def test_commented_out_code_and_boilerplate_are_dropped():
+    minimized = minimize_source(JAVA_SOURCE, 'OrderPricer.java')
+    for dropped in ('total.multiply(RATE)', 'applyLegacyDiscount', 'isRush', '-----',
+                    'Copyright', '@author', 'serialVersionUID', '@Override'):
+        assert dropped not in minimized, dropped
+    assert 'import java.util.{List, Map}; import java.math.BigDecimal;' in minimized
+
+
+def test_code_lines_keep_their_line_numbers():
+    original = JAVA_SOURCE.split('\n')
+    minimized = minimize_source(JAVA_SOURCE, 'OrderPricer.java').split('\n')
+    assert len(minimized) <= len(original)
+    for number, line in enumerate(original):
+        stripped = line.strip()
+        if stripped and not stripped.startswith(('/', '*', '@', 'import', 'private static final long')):
+            # Code lines come back on the same line, minus any trailing comment
+            assert minimized[number].startswith(line.split(' //')[0].rstrip()), (number + 1, line)
+
+
+def test_python_comments():
+    source = '\n'.join([
+        '#!/usr/bin/env python',
+        '# Orders above the credit limit are held for review',
+        '# for example:',
+        '# if order.total > limit:',
+        '# hold(order)',
+        'def check(order, limit):',
+        '    return order.total > limit',
+    ])
+    minimized = minimize_source(source, 'orders.py').split('\n')
+    assert minimized[1] == '# Orders above the credit limit are held for review'
+    assert minimized[2] == '# for example:'
+    assert minimized[3] == minimized[4] == ''
+    assert minimized[5] == 'def check(order, limit):'
+
+
+if __name__ == "__main__":
+    tests = [(name, test) for name, test in sorted(globals().items()) if name.startswith('test_') and callable(test)]
+    failed = 0
+    for name, test in tests:
+        try:
+            test()
+            print(f"✅ {name}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {name}: {type(e).__name__}: {e}")
+    print(f"{len(tests) - failed}/{len(tests)} tests passed")
+    raise SystemExit(1 if failed else 0)
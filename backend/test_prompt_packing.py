@@ -0,0 +1,78 @@
+"""
+Tests for packing small files into multi-file rule extraction prompts (prompt_packing)
+and attributing the rules that come back to their files. Runs under pytest or as a script.
+"""
+
+from app.models.schemas import BusinessRule
+from app.services.ai_service import AIService
+from app.services.prompt_packing import UNATTRIBUTED, SourceFile, pack_files
+
+
+def _file(path, tokens):
+    return SourceFile(path, f'// {path}', tokens=tokens)
+
+
+def _rule(rule_id, code_reference):
+    return BusinessRule(id=rule_id, description=f'rule {rule_id}', confidence_score=0.8,
+                        category='General', code_reference=code_reference)
+
+
+def test_small_files_share_batches_within_the_budget():
+    files = [_file(f'src/orders/File{i}.java', 300) for i in range(5)] + [_file('src/big/Large.java', 2000)]
+    batches = pack_files(files, token_budget=1000, small_file_tokens=800)
+
+    assert [len(batch.files) for batch in batches] == [1, 3, 2]
+    assert batches[0].files[0].file_path == 'src/big/Large.java'
+    assert all(batch.tokens <= 1000 for batch in batches[1:])
+
+
+def test_same_directory_files_are_packed_together():
+    files = [_file('src/b/B1.java', 100), _file('src/a/A1.java', 100), _file('src/b/B2.java', 100),
+             _file('src/a/A2.java', 100)]
+    batches = pack_files(files, token_budget=200, small_file_tokens=800)
+
+    assert [[f.file_path for f in batch.files] for batch in batches] == [
+        ['src/a/A1.java', 'src/a/A2.java'], ['src/b/B1.java', 'src/b/B2.java']
+    ]
+
+
+def test_packed_rules_are_attributed_by_file_reference():
+    files = [_file('src/orders/Order.java', 100), _file('src/billing/Order.java', 100),
+             _file('src/billing/Invoice.java', 100)]
+    rules = [
+        _rule('R1', 'src/billing/Order.java:12'),
+        _rule('R2', 'Invoice.java line 40'),  # Shortened path: matched by file name
+        _rule('R3', 'src/orders/Order.java:3'),
+        _rule('R4', ''),  # No reference
+        _rule('R5', 'Customer.java:7'),  # A file that is not in the batch
+    ]
+    service = object.__new__(AIService)
+    rules_by_file = service._attribute_rules_to_files(rules, files)
+
+    assert [r.id for r in rules_by_file['src/billing/Order.java']] == ['R1']
+    assert [r.id for r in rules_by_file['src/billing/Invoice.java']] == ['R2']
+    assert [r.id for r in rules_by_file['src/orders/Order.java']] == ['R3']
+    assert [r.id for r in rules_by_file[UNATTRIBUTED]] == ['R4', 'R5']
+
+
+def test_fully_attributed_batch_has_no_unattributed_bucket():
+    files = [_file('src/a/A.java', 100), _file('src/a/B.java', 100)]
+    service = object.__new__(AIService)
+    rules_by_file = service._attribute_rules_to_files([_rule('R1', 'src/a/B.java:1')], files)
+
+    assert UNATTRIBUTED not in rules_by_file
+    assert rules_by_file['src/a/A.java'] == []
+
+
+if __name__ == "__main__":
+    tests = [(name, test) for name, test in sorted(globals().items()) if name.startswith('test_') and callable(test)]
+    failed = 0
+    for name, test in tests:
+        try:
+            test()
+            print(f"✅ {name}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {name}: {type(e).__name__}: {e}")
+    print(f"{len(tests) - failed}/{len(tests)} tests passed")
+    raise SystemExit(1 if failed else 0)
@@ -0,0 +1,102 @@
+"""
+Tests for batched plain-English business rule explanations (EnhancedAIService).
+Runs under pytest or as a script.
+"""
+
+import asyncio
+import json
+import re
+import tempfile
+from pathlib import Path
+
+from app.core.config import settings
+from app.services.code_intelligence import BusinessRuleContext, CodeEntityData, CodeIntelligenceGraph
+from app.services.enhanced_ai_service import EnhancedAIService
+
+
+class _FakeAIService:
+    """Explains every rule listed in the prompt except those named in skip"""
+
+    def __init__(self, skip=()):
+        self.prompts = []
+        self.skip = set(skip)
+
+    async def generate_content(self, prompt, max_tokens=1000, temperature=0.2):
+        self.prompts.append(prompt)
+        keys = re.findall(r'^- \*\*(.+?)\*\*', prompt, re.MULTILINE)
+        return json.dumps([{'rule_id': key, 'explanation': f"explained {key}"} for key in keys if key not in self.skip])
+
+
+def _rule(rule_id, entity_id, description='Orders over 500 need approval'):
+    return BusinessRuleContext(rule_id=rule_id, description=description, plain_english='', confidence_score=0.9,
+                               category='Validation', code_entity_id=entity_id, module_path='orders.service')
+
+
+def _service(tmp, ai_service):
+    source = Path(tmp) / 'OrderService.java'
+    source.write_text('public class OrderService {\n    public void submit(Order order) {\n    }\n}\n')
+    graph = CodeIntelligenceGraph()
+    graph.add_entity(CodeEntityData(id='class:orders', name='OrderService', type='class', file_path=str(source), line_number=1))
+    graph.add_entity(CodeEntityData(id='method:submit', name='submit', type='method', file_path=str(source),
+                                    line_number=2, parent_id='class:orders'))
+    return EnhancedAIService(ai_service, graph)
+
+
+def _with_caps(max_rules, token_budget, scenario):
+    saved = settings.AI_EXPLAIN_MAX_RULES, settings.AI_EXPLAIN_TOKEN_BUDGET
+    settings.AI_EXPLAIN_MAX_RULES, settings.AI_EXPLAIN_TOKEN_BUDGET = max_rules, token_budget
+    try:
+        return scenario()
+    finally:
+        settings.AI_EXPLAIN_MAX_RULES, settings.AI_EXPLAIN_TOKEN_BUDGET = saved
+
+
+def test_rules_are_explained_in_batches_with_each_excerpt_once():
+    ai_service = _FakeAIService()
+    with tempfile.TemporaryDirectory() as tmp:
+        service = _service(tmp, ai_service)
+        rules = [_rule(f"R{i}", 'method:submit' if i % 2 else 'class:orders') for i in range(5)]
+        explained = _with_caps(3, 4000, lambda: asyncio.run(service.generate_plain_english_explanations(rules)))
+
+    assert explained == 5
+    assert len(ai_service.prompts) == 2  # Five rules, at most three per prompt
+    assert [rule.plain_english for rule in rules] == [f"explained R{i}" for i in range(5)]
+    first_prompt = ai_service.prompts[0]
+    assert first_prompt.count('public void submit(Order order) {') == 2  # Class and method excerpts, each once
+    assert first_prompt.count('### Method "submit"') == 1
+
+
+def test_duplicate_ids_get_suffixes_and_unanswered_rules_keep_their_description():
+    ai_service = _FakeAIService(skip={'R2'})
+    with tempfile.TemporaryDirectory() as tmp:
+        service = _service(tmp, ai_service)
+        rules = [_rule('R1', 'method:submit', 'first'), _rule('R1', 'method:submit', 'second'),
+                 _rule('R2', 'method:submit', 'Discount capped at 20%')]
+        explained = _with_caps(20, 4000, lambda: asyncio.run(service.generate_plain_english_explanations(rules)))
+
+    assert explained == 2
+    assert [rule.plain_english for rule in rules] == ['explained R1', 'explained R1#2', 'Discount capped at 20%']
+
+
+def test_token_budget_splits_batches():
+    with tempfile.TemporaryDirectory() as tmp:
+        service = _service(tmp, _FakeAIService())
+        rules = [_rule(f"R{i}", 'method:submit', 'word ' * 60) for i in range(4)]
+        batches = _with_caps(20, 150, lambda: service._pack_explanation_batches(rules))
+
+    assert [len(batch.rules) for batch in batches] == [1, 1, 1, 1]
+    assert all(batch.excerpts for batch in batches)  # Every prompt carries the code it explains
+
+
+if __name__ == "__main__":
+    tests = [(name, test) for name, test in sorted(globals().items()) if name.startswith('test_') and callable(test)]
+    failed = 0
+    for name, test in tests:
+        try:
+            test()
+            print(f"✅ {name}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {name}: {type(e).__name__}: {e}")
+    print(f"{len(tests) - failed}/{len(tests)} tests passed")
+    raise SystemExit(1 if failed else 0)
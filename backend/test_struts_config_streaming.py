@@ -0,0 +1,131 @@
+"""
+Tests for single-pass streaming of Struts configuration files (IntegrationAnalyzer, StrutsParser).
+Runs under pytest or as a script.
+"""
+
+import asyncio
+import builtins
+import os
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+
+import app.services.integration_analyzer as integration_analyzer
+from app.parsers.struts_parser import StrutsParser
+from app.services.analysis_cache import AnalysisCache
+from app.services.integration_analyzer import IntegrationAnalyzer
+
+STRUTS_XML = """<?xml version="1.0" encoding="UTF-8"?>
+<struts>
+  <package name="orders" extends="struts-default">
+    <interceptors>
+      <interceptor name="audit" class="com.example.AuditInterceptor"/>
+    </interceptors>
+    <action name="placeOrder" class="com.example.PlaceOrderAction" method="place">
+      <result name="success">/orders/done.jsp</result>
+      <result name="input">/orders/form.jsp</result>
+    </action>
+    <action name="cancelOrder" class="com.example.CancelOrderAction">
+      <result>/orders/cancelled.jsp</result>
+    </action>
+  </package>
+</struts>
+"""
+
+
+@contextmanager
+def _counting_opens(path):
+    """Count how many times the given file is opened"""
+    opens = []
+    real_open = builtins.open
+
+    def counting_open(file, *args, **kwargs):
+        if isinstance(file, (str, Path)) and Path(file) == path:
+            opens.append(args[0] if args else kwargs.get('mode', 'r'))
+        return real_open(file, *args, **kwargs)
+
+    builtins.open = counting_open
+    try:
+        yield opens
+    finally:
+        builtins.open = real_open
+
+
+@contextmanager
+def _struts_config():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'struts.xml'
+        path.write_text(STRUTS_XML, encoding='utf-8')
+        cache = AnalysisCache(cache_dir=str(Path(tmp) / 'cache'), enabled=True)
+        original_cache = integration_analyzer.analysis_cache
+        integration_analyzer.analysis_cache = cache
+        try:
+            yield path, cache
+        finally:
+            integration_analyzer.analysis_cache = original_cache
+
+
+def test_struts_config_is_read_once_on_a_miss_and_not_at_all_on_a_hit():
+    analyzer = IntegrationAnalyzer()
+    with _struts_config() as (path, cache):
+        with _counting_opens(path) as opens:
+            actions = asyncio.run(analyzer._parse_struts_config([path]))
+        assert len(opens) == 1
+        assert [(a.name, a.class_name, a.method) for a in actions] == [
+            ('placeOrder', 'com.example.PlaceOrderAction', 'place'),
+            ('cancelOrder', 'com.example.CancelOrderAction', 'execute'),
+        ]
+        assert actions[0].result_pages == {'success': '/orders/done.jsp', 'input': '/orders/form.jsp'}
+
+        # The entry is stored under the same content key a full read would produce
+        assert cache.get('struts_config_actions', analyzer.ANALYZER_VERSION, cache.file_key(path)) is not None
+
+        with _counting_opens(path) as opens:
+            cached_actions = asyncio.run(analyzer._parse_struts_config([path]))
+        assert len(opens) == 0
+        assert cached_actions == actions
+
+
+def test_changed_struts_config_is_reparsed():
+    analyzer = IntegrationAnalyzer()
+    with _struts_config() as (path, _):
+        asyncio.run(analyzer._parse_struts_config([path]))
+        path.write_text(STRUTS_XML.replace('cancelOrder', 'refundOrder'), encoding='utf-8')
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+        actions = asyncio.run(analyzer._parse_struts_config([path]))
+        assert [a.name for a in actions] == ['placeOrder', 'refundOrder']
+
+
+def test_struts_parser_collects_dependencies_while_parsing():
+    parser = StrutsParser()
+    with _struts_config() as (path, _):
+        entities = parser.parse(path)
+        with _counting_opens(path) as opens:
+            dependencies = parser.extract_dependencies(path)
+        # parse() already streamed the file and collected the dependencies on the way
+        assert len(opens) == 0
+        assert sorted(entity['name'] for entity in entities if entity['type'] == 'struts_action') == [
+            'cancelOrder', 'placeOrder'
+        ]
+        assert sorted(dependencies) == [
+            'com.example.AuditInterceptor', 'com.example.CancelOrderAction', 'com.example.PlaceOrderAction'
+        ]
+
+        # Without a preceding parse() the dependencies still come from one pass of their own
+        assert sorted(StrutsParser().extract_dependencies(path)) == sorted(dependencies)
+
+
+if __name__ == "__main__":
+    tests = [(name, test) for name, test in sorted(globals().items()) if name.startswith('test_') and callable(test)]
+    failed = 0
+    for name, test in tests:
+        try:
+            test()
+            print(f"✅ {name}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {name}: {type(e).__name__}: {e}")
+    print(f"{len(tests) - failed}/{len(tests)} tests passed")
+    raise SystemExit(1 if failed else 0)